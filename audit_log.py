@@ -0,0 +1,212 @@
+"""
+Módulo de registro de auditoría de conversaciones
+Guarda un registro JSONL de solo anexado por turno de /chat (sesión, intención,
+sentimiento, latencia y modo; no el texto de los mensajes). registrar() solo
+añade el registro a una cola en memoria; un hilo aparte lo escribe por lotes
+(cada `lote` registros o cada `intervalo` segundos) con una sola escritura,
+rota el archivo al superar `max_bytes` y comprime con gzip los rotados.
+Cuando la sesión se identifica por la IP del cliente, se guarda un seudónimo
+(HMAC de la IP) en lugar de la IP.
+"""
+
+import atexit
+import gzip
+import hashlib
+import hmac
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+from log_pipeline import obtener_logger
+from response_encoding import dumps
+
+try:
+    from config import AUDIT_CONFIG
+except ImportError:
+    AUDIT_CONFIG = {
+        'enabled': False,
+        'path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'conversaciones.jsonl'),
+        'pseudonym_key': '', 'max_bytes': 10 * 2**20, 'backups': 5, 'compress': True, 'batch_size': 200,
+        'flush_interval': 1.0, 'max_pending': 100000
+    }
+
+logger = obtener_logger(__name__)
+
+
+class AuditLog:
+    """
+    Escritor JSONL por lotes con rotación por tamaño.
+    Los registros pendientes se escriben al cerrar (también al salir del proceso).
+    """
+
+    def __init__(self, ruta, max_bytes=10 * 2**20, copias=5, comprimir=True, lote=200, intervalo=1.0,
+                 max_pendientes=100000, clave_seudonimo=None):
+        """
+        Args:
+            ruta (str): Archivo JSONL activo
+            max_bytes (int): Tamaño a partir del cual se rota
+            copias (int): Archivos rotados que se conservan (ruta.1 ... ruta.N, el 1 es el más reciente)
+            comprimir (bool): Comprimir con gzip los archivos rotados
+            lote (int): Registros pendientes que despiertan al escritor antes del intervalo
+            intervalo (float): Segundos máximos entre escrituras
+            max_pendientes (int): Registros en cola a partir de los que se descartan los nuevos
+            clave_seudonimo (str): Clave HMAC de los seudónimos de IP (None = aleatoria)
+        """
+        self.ruta = ruta
+        self._clave = clave_seudonimo.encode() if clave_seudonimo else os.urandom(32)
+        self.max_bytes = max_bytes
+        self.copias = copias
+        self.comprimir = comprimir
+        self.lote = lote
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self.estadisticas = {'registrados': 0, 'escritos': 0, 'lotes': 0, 'rotaciones': 0, 'descartados': 0}
+        # deque.append y popleft son atómicos: registrar() no toma ningún lock
+        self._pendientes = deque()
+        self._despertar = threading.Event()
+        self._detener = False
+        self._lock_escritura = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._archivo = open(ruta, 'ab')
+        self._hilo = threading.Thread(target=self._bucle, name='auditoria', daemon=True)
+        self._hilo.start()
+
+    def seudonimo(self, valor):
+        """Identificador estable y no reversible de un valor (p. ej. una IP)."""
+        return 'ip-' + hmac.new(self._clave, valor.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def registrar(self, session_id, intencion, sentimiento=None, latencia_ms=None, ip=None, **extra):
+        """
+        Encola el registro de un turno (no bloquea ni escribe).
+
+        Args:
+            session_id (str): Sesión del cliente (si coincide con `ip` se guarda su seudónimo)
+            intencion (str): Intención detectada
+            sentimiento (str): Sentimiento del turno o None si no se calculó
+            latencia_ms (float): Latencia de la petición
+            ip (str): IP del cliente; nunca se escribe
+            **extra: Campos adicionales (p. ej. modo, código HTTP)
+        """
+        if len(self._pendientes) >= self.max_pendientes:
+            self.estadisticas['descartados'] += 1
+            return
+        if ip and session_id == ip:
+            session_id = self.seudonimo(session_id)
+        registro = {'ts': round(time.time(), 3), 'session_id': session_id, 'intencion': intencion,
+                    'sentimiento': sentimiento, 'latencia_ms': latencia_ms}
+        registro.update(extra)
+        self._pendientes.append(registro)
+        self.estadisticas['registrados'] += 1
+        if len(self._pendientes) >= self.lote:
+            self._despertar.set()
+
+    def _bucle(self):
+        while not self._detener:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            try:
+                self.volcar()
+            except OSError as e:
+                logger.error(f"⚠️ Error al escribir el registro de auditoría: {e}")
+
+    def volcar(self):
+        """
+        Escribe los registros pendientes en una sola escritura.
+
+        Returns:
+            int: Registros escritos
+        """
+        with self._lock_escritura:
+            lineas = []
+            while self._pendientes:
+                lineas.append(dumps(self._pendientes.popleft()))
+            if not lineas:
+                return 0
+            self._archivo.write(b'\n'.join(lineas) + b'\n')
+            self._archivo.flush()
+            self.estadisticas['escritos'] += len(lineas)
+            self.estadisticas['lotes'] += 1
+            if self._archivo.tell() >= self.max_bytes:
+                self._rotar()
+            return len(lineas)
+
+    def _nombre_rotado(self, indice):
+        return f"{self.ruta}.{indice}" + ('.gz' if self.comprimir else '')
+
+    def _rotar(self):
+        """ruta → ruta.1(.gz), ruta.1 → ruta.2, ...; el más antiguo se pierde (con _lock_escritura tomado)."""
+        self._archivo.close()
+        for indice in range(self.copias - 1, 0, -1):
+            if os.path.exists(self._nombre_rotado(indice)):
+                os.replace(self._nombre_rotado(indice), self._nombre_rotado(indice + 1))
+        if self.comprimir:
+            with open(self.ruta, 'rb') as origen, gzip.open(self._nombre_rotado(1), 'wb', compresslevel=6) as destino:
+                shutil.copyfileobj(origen, destino)
+            os.remove(self.ruta)
+        else:
+            os.replace(self.ruta, self._nombre_rotado(1))
+        self._archivo = open(self.ruta, 'ab')
+        self.estadisticas['rotaciones'] += 1
+
+    def cerrar(self):
+        """Detiene el escritor y escribe lo pendiente."""
+        if self._detener:
+            return
+        self._detener = True
+        self._despertar.set()
+        self._hilo.join()
+        self.volcar()
+        self._archivo.close()
+
+    def obtener_estadisticas(self):
+        """
+        Returns:
+            dict: Registrados, escritos, lotes, rotaciones, descartados y pendientes
+        """
+        return dict(self.estadisticas, pendientes=len(self._pendientes))
+
+
+# Instancia global del registro
+_audit_log = None
+
+def get_audit_log():
+    """
+    Obtiene el registro de auditoría global según AUDIT_CONFIG.
+
+    Returns:
+        AuditLog: Instancia o None si está desactivado
+    """
+    global _audit_log
+    if _audit_log is None and AUDIT_CONFIG.get('enabled', False):
+        _audit_log = AuditLog(
+            AUDIT_CONFIG.get('path') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs',
+                                                     'conversaciones.jsonl'),
+            max_bytes=AUDIT_CONFIG.get('max_bytes', 10 * 2**20),
+            copias=AUDIT_CONFIG.get('backups', 5),
+            comprimir=AUDIT_CONFIG.get('compress', True),
+            lote=AUDIT_CONFIG.get('batch_size', 200),
+            intervalo=AUDIT_CONFIG.get('flush_interval', 1.0),
+            max_pendientes=AUDIT_CONFIG.get('max_pending', 100000),
+            clave_seudonimo=AUDIT_CONFIG.get('pseudonym_key') or None
+        )
+        atexit.register(_audit_log.cerrar)
+    return _audit_log
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    import tempfile
+
+    print("=== Prueba del Registro de Auditoría ===\n")
+
+    directorio = tempfile.mkdtemp()
+    registro = AuditLog(os.path.join(directorio, 'auditoria.jsonl'), max_bytes=64 * 1024, copias=3, intervalo=0.1)
+    for i in range(5000):
+        registro.registrar(f"sesion-{i % 50}", 'tema_ia', 'POS', 12.5, modo='hybrid')
+    registro.cerrar()
+    print(f"Sesión identificada por la IP 203.0.113.7 registrada como: {registro.seudonimo('203.0.113.7')}")
+    print(f"Estadísticas: {registro.obtener_estadisticas()}")
+    print(f"Archivos: {sorted(os.listdir(directorio))}")
+    shutil.rmtree(directorio)
@@ -1,50 +1,197 @@
+import json
+import time
+from contextlib import nullcontext
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from chatbot_logic import responder, analizar_texto
+from chatbot_logic import responder, analizar_texto, gestor_modelos, metricas_intenciones, diagnostico_memoria
+from model_server import servidor_habilitado, obtener_cliente
+from session_store import crear_session_store, id_sesion
+from rate_limiter import TokenBucketLimiter
+from single_flight import estadisticas_coalescencia
+from mode_controller import crear_controlador
+from response_encoding import respuesta_json, analisis_en_columnas, comprimir_respuesta, dumps
+from log_pipeline import obtener_logger
+from audit_log import get_audit_log
+
+logger = obtener_logger(__name__)
 
 try:
-    from config import CHATBOT_CONFIG, print_config
+    from config import CHATBOT_CONFIG, SESSION_CONFIG, LIMITS, OPERATION_MODE, DEBUG_MODE, print_config
     print_config()
 except ImportError:
     CHATBOT_CONFIG = {'nombre': 'SciTech Bot', 'version': '3.0'}
-    print("⚠️ Archivo config.py no encontrado, usando configuración por defecto")
+    OPERATION_MODE = 'hybrid'
+    DEBUG_MODE = False
+    SESSION_CONFIG = {'backend': 'memory', 'ttl': 1800}
+    LIMITS = {'max_message_length': 1000, 'rate_limit_messages': 100, 'max_body_bytes': 8192}
+    logger.warning("⚠️ Archivo config.py no encontrado, usando configuración por defecto")
+
+# Canal WebSocket opcional (si no está, el frontend usa POST /chat)
+try:
+    from flask_sock import Sock
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app) if WEBSOCKET_AVAILABLE else None
+# Werkzeug corta la lectura de cuerpos mayores aunque no declaren Content-Length
+app.config['MAX_CONTENT_LENGTH'] = LIMITS.get('max_body_bytes', 8192)
 
-# Estado de la conversación por sesión (mejorado con sentimientos)
-estado = {
-    'saludo': False,
-    'ultimo_tema': None,
-    'temas_discutidos': [],
-    'analisis_sentimiento': None,
-    'contador_mensajes': 0
-}
+# Limitador de mensajes por sesión (cubeta de tokens con memoria acotada)
+limitador = TokenBucketLimiter(
+    capacidad=LIMITS.get('rate_limit_messages', 100),
+    periodo=LIMITS.get('rate_limit_window', 60),
+    max_claves=LIMITS.get('rate_limit_max_keys', 10000)
+)
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    data = request.get_json()
+# Limitador por IP: el session_id lo elige el cliente, así que cambiarlo en cada
+# petición no evita este límite ni llena de claves nuevas el de sesiones
+limitador_ip = TokenBucketLimiter(
+    capacidad=LIMITS.get('rate_limit_ip_messages', 300),
+    periodo=LIMITS.get('rate_limit_window', 60),
+    max_claves=LIMITS.get('rate_limit_max_keys', 10000)
+)
+
+# Limitador por IP de /analisis (el frontend lo llama mientras se escribe)
+limitador_analisis = TokenBucketLimiter(
+    capacidad=LIMITS.get('rate_limit_analysis', 600),
+    periodo=LIMITS.get('rate_limit_window', 60),
+    max_claves=LIMITS.get('rate_limit_max_keys', 10000)
+)
+
+@app.before_request
+def rechazar_cuerpos_grandes():
+    """Rechaza cuerpos demasiado grandes antes de leerlos o parsear el JSON."""
+    if request.content_length and request.content_length > LIMITS.get('max_body_bytes', 8192):
+        return jsonify({'respuesta': 'El mensaje es demasiado grande.'}), 413
+
+@app.after_request
+def comprimir(respuesta):
+    """Comprime con gzip/brotli según Accept-Encoding."""
+    return comprimir_respuesta(respuesta, request.headers.get('Accept-Encoding', ''))
+
+# Campos de /chat con 'compacto': true (se omiten las listas que no cambian en cada turno)
+CAMPOS_COMPACTOS = ('respuesta', 'intencion', 'tema_actual', 'sentimiento', 'modo')
+
+# Modo efectivo por petición según el p95 de /chat (None = siempre OPERATION_MODE)
+controlador_modo = crear_controlador()
+
+# Estado de la conversación por sesión (en memoria o en Redis según SESSION_CONFIG)
+session_store = crear_session_store(SESSION_CONFIG)
+
+diagnostico_memoria.registrar_sesiones(session_store)
+
+# Registro JSONL de los turnos de /chat, escrito por lotes en segundo plano (None = desactivado)
+audit_log = get_audit_log()
+
+def obtener_id_sesion(data):
+    """
+    Identifica la sesión del cliente: campo 'session_id', cabecera X-Session-Id
+    o, en su defecto, la IP de origen.
+    """
+    return id_sesion(data, request.headers, request.remote_addr)
+
+def obtener_ip_cliente():
+    """
+    IP del cliente para el límite por IP: la de la conexión o, si la petición llega
+    de un proxy de confianza (LIMITS['trusted_proxies'], p. ej. session_router.py),
+    la última de X-Forwarded-For que no sea de un proxy de confianza.
+    """
+    ip = request.remote_addr or 'anonimo'
+    confianza = LIMITS.get('trusted_proxies', ())
+    if ip in confianza:
+        for salto in reversed(request.headers.get('X-Forwarded-For', '').split(',')):
+            salto = salto.strip()
+            if salto and salto not in confianza:
+                return salto
+    return ip
+
+def _limitar(ip, session_id=None, limitador_ip=limitador_ip):
+    """
+    Aplica el límite por IP y, si se indica sesión, el de la sesión.
+
+    Returns:
+        tuple: (datos, 429, cabeceras) si se supera algún límite; None si no
+    """
+    permitido, espera = limitador_ip.permitir(ip)
+    if permitido and session_id is not None:
+        permitido, espera = limitador.permitir(session_id)
+    if permitido:
+        return None
+    return {
+        'respuesta': 'Estás enviando mensajes muy rápido. Espera un momento e inténtalo de nuevo.'
+    }, 429, {'Retry-After': str(int(espera) + 1)}
+
+def _procesar_chat(data, session_id, ip):
+    """
+    Procesa un mensaje de chat (común a POST /chat y al canal WebSocket).
+    
+    Args:
+        data (dict): Cuerpo recibido con el campo 'mensaje'
+        session_id (str): Sesión del cliente
+        ip (str): IP del cliente
+        
+    Returns:
+        tuple: (datos_respuesta, código_http, cabeceras)
+    """
     mensaje = data.get('mensaje', '')
     
     # Validación básica
-    if not mensaje:
-        return jsonify({'respuesta': 'Por favor, escribe un mensaje.'}), 400
+    if not mensaje or not isinstance(mensaje, str):
+        return {'respuesta': 'Por favor, escribe un mensaje.'}, 400, {}
+    
+    max_longitud = LIMITS.get('max_message_length', 1000)
+    if len(mensaje) > max_longitud:
+        return {
+            'respuesta': f'Tu mensaje es demasiado largo. Máximo {max_longitud} caracteres.'
+        }, 413, {}
+    
+    limitada = _limitar(ip, session_id)
+    if limitada:
+        return limitada
+    
+    # El controlador decide el modo de esta petición y mide su latencia
+    inicio = time.perf_counter()
+    with controlador_modo.peticion() if controlador_modo else nullcontext(None) as modo:
+        datos, codigo, cabeceras = _atender_chat(mensaje, data, session_id, modo)
+    if audit_log is not None:
+        sentimiento = datos.get('sentimiento')
+        audit_log.registrar(
+            session_id, datos.get('intencion'), sentimiento['tipo'] if sentimiento else None,
+            round((time.perf_counter() - inicio) * 1000, 2), ip=ip, modo=modo, codigo=codigo
+        )
+    return datos, codigo, cabeceras
+
+def _atender_chat(mensaje, data, session_id, modo):
+    """Carga la sesión, responde y arma la respuesta de /chat en el modo efectivo indicado."""
+    estado = session_store.cargar(session_id)
     
     # Incrementar contador de mensajes
     estado['contador_mensajes'] += 1
     
     try:
-        respuesta = responder(mensaje, estado)
+        respuesta = responder(mensaje, estado, modo=modo)
+        session_store.guardar(session_id, estado)
         
         # Preparar respuesta con metadata
         response_data = {
+            'session_id': session_id,
             'respuesta': respuesta,
+            'modo': modo or OPERATION_MODE,
             'tema_actual': estado.get('ultimo_tema'),
             'estado_conversacion': 'activo' if estado['saludo'] else 'sin_saludo',
             'temas_discutidos': estado.get('temas_discutidos', []),
-            'num_mensajes': estado['contador_mensajes']
+            'num_mensajes': estado['contador_mensajes'],
+            'intencion': estado.get('ultima_intencion'),
         }
         
+        # Resumen de temas a partir del historial acotado de la sesión
+        if estado.get('historial') is not None:
+            response_data['resumen_temas'] = estado['historial'].resumen_temas()
+        
         # Agregar análisis de sentimiento si está disponible
         if estado.get('analisis_sentimiento'):
             sentiment = estado['analisis_sentimiento']
@@ -52,22 +199,121 @@ def chat():
                 'tipo': sentiment.get('descripcion', 'neutral'),
                 'confianza': round(sentiment.get('confianza', 0) * 100, 1)
             }
+            if sentiment.get('emocion'):
+                response_data['sentimiento']['emocion'] = sentiment['emocion']['etiqueta']
+            if sentiment.get('odio'):
+                response_data['sentimiento']['odio'] = sentiment['odio']['etiquetas']
         
-        return jsonify(response_data)
+        if data.get('compacto'):
+            response_data = {k: response_data[k] for k in CAMPOS_COMPACTOS if k in response_data}
+        
+        return response_data, 200, {}
         
     except Exception as e:
-        print(f"Error en el chatbot: {e}")
-        return jsonify({
+        logger.error(f"Error en el chatbot: {e}")
+        return {
             'respuesta': 'Lo siento, ocurrió un error. ¿Podrías reformular tu pregunta?',
             'error': str(e) if CHATBOT_CONFIG.get('debug', False) else 'Error interno'
-        }), 500
+        }, 500, {}
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return respuesta_json({'respuesta': 'Por favor, escribe un mensaje.'}, 400)
+    datos, codigo, cabeceras = _procesar_chat(data, obtener_id_sesion(data), obtener_ip_cliente())
+    return respuesta_json(datos, codigo, cabeceras)
+
+if WEBSOCKET_AVAILABLE:
+    @sock.route('/ws')
+    def chat_ws(ws):
+        """
+        Canal de chat persistente: una conexión por sesión (?session_id=...).
+        Cada mensaje JSON {'mensaje', 'id'} recibe la misma respuesta que POST /chat
+        más 'id' (para que el cliente mida la latencia) y 'status'.
+        """
+        session_id = obtener_id_sesion(request.args)
+        ip = obtener_ip_cliente()
+        while True:
+            crudo = ws.receive()
+            if crudo is None:
+                break
+            if len(crudo) > LIMITS.get('max_body_bytes', 8192):
+                datos, codigo = {'respuesta': 'Mensaje demasiado grande.'}, 413
+            else:
+                try:
+                    data = json.loads(crudo)
+                except ValueError:
+                    data = None
+                if isinstance(data, dict):
+                    datos, codigo, _ = _procesar_chat(data, session_id, ip)
+                    datos['id'] = data.get('id')
+                else:
+                    datos, codigo = {'respuesta': 'Por favor, escribe un mensaje.'}, 400
+            datos['status'] = codigo
+            ws.send(dumps(datos).decode('utf-8'))
 
 @app.route('/analisis', methods=['POST'])
 def analisis():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('mensaje', ''), str):
+        return respuesta_json({'analisis': []}, 400)
+    limitada = _limitar(obtener_ip_cliente(), limitador_ip=limitador_analisis)
+    if limitada:
+        datos, codigo, cabeceras = limitada
+        return respuesta_json(dict(datos, analisis=[]), codigo, cabeceras)
     texto = data.get('mensaje', '')
+    # El análisis en vivo se recorta al límite de mensaje en lugar de rechazarse
+    texto = texto[:LIMITS.get('max_message_length', 1000)]
     resultado = analizar_texto(texto)
-    return jsonify({'analisis': resultado})
+    # 'columnas': arrays paralelos por campo en lugar de un dict por token
+    if (data.get('formato') or request.args.get('formato')) == 'columnas':
+        return respuesta_json({'formato': 'columnas', 'analisis': analisis_en_columnas(resultado)})
+    return respuesta_json({'analisis': resultado})
+
+@app.route('/modelos', methods=['GET'])
+def modelos():
+    """Estado de los modelos: cargados, inactividad, cargas/descargas, arranques en frío y llamadas coalescidas."""
+    if servidor_habilitado():
+        return jsonify(obtener_cliente().llamar('models'))
+    return jsonify(dict(gestor_modelos.estado(), coalescencia=estadisticas_coalescencia()))
+
+@app.route('/metricas/modo', methods=['GET'])
+def metricas_modo():
+    """Modo efectivo, p95 de /chat, peticiones en curso y cambios de modo recientes."""
+    if controlador_modo is None:
+        return jsonify({'modo_efectivo': OPERATION_MODE, 'adaptativo': False})
+    return jsonify(dict(controlador_modo.estado(), adaptativo=True))
+
+@app.route('/metricas/intenciones', methods=['GET'])
+def metricas():
+    """Informe de cobertura: tasa de fallback, latencia por intención y palabras sin coincidencia."""
+    if metricas_intenciones is None:
+        return jsonify({'error': 'Métricas desactivadas (METRICS_CONFIG)'}), 404
+    return jsonify(metricas_intenciones.informe())
+
+@app.route('/debug/memory', methods=['GET'])
+def debug_memoria():
+    """
+    Memoria del proceso (solo con DEBUG_MODE): RSS, bytes por modelo, sesiones y
+    sitios de asignación que más crecen. ?trazar=1 / ?trazar=0 activa o desactiva
+    tracemalloc; ?referencia=inicial compara con la primera instantánea; ?top=N.
+    """
+    if not DEBUG_MODE:
+        return jsonify({'error': 'No encontrado'}), 404
+    trazar = request.args.get('trazar')
+    if trazar == '1':
+        diagnostico_memoria.iniciar_trazado()
+    elif trazar == '0':
+        diagnostico_memoria.detener_trazado()
+    informe = diagnostico_memoria.informe(
+        top=request.args.get('top', type=int),
+        referencia=request.args.get('referencia', 'anterior'),
+        instantanea=True
+    )
+    # Con el servidor de modelos, los modelos ocupan memoria en ese proceso y no en este
+    informe['modelos_en_servidor'] = servidor_habilitado()
+    return respuesta_json(informe)
 
 @app.route('/')
 def home():
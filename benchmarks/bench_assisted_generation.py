@@ -0,0 +1,88 @@
+"""
+Benchmark de generación asistida (decodificación especulativa) en GemmaLLM
+Reescribe respuestas predefinidas del chatbot con mejorar_respuesta y compara
+tokens/s y tasa de aceptación estimada entre: sin asistencia, prompt lookup
+y modelo borrador (si se indica --draft)
+
+La tasa de aceptación se estima contando las pasadas del modelo principal:
+cada pasada produce 1 token propio más los candidatos aceptados.
+
+Uso:
+    python benchmarks/bench_assisted_generation.py [--draft modelo] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from llm_module import GemmaLLM, LLM_AVAILABLE  # noqa: E402
+
+RESPUESTAS_BASE = [
+    "**ChatGPT y GPT** 🤖\n\nSon modelos de lenguaje desarrollados por OpenAI que revolucionaron la IA "
+    "conversacional. Estos sistemas utilizan redes neuronales transformers con miles de millones de parámetros.",
+    "**Fusión Nuclear** ⚡\n\nLa fusión nuclear es el santo grial energético: en 2022, el NIF logró ganancia "
+    "neta de energía por primera vez. Proyectos como ITER en Francia buscan comercializar fusión para 2030s.",
+    "**CRISPR y Edición Genética** 🧬\n\nCRISPR-Cas9 revoluciona la edición genética: permite corregir "
+    "mutaciones causantes de enfermedades, desarrollar cultivos resistentes y crear terapias personalizadas.",
+]
+
+
+def medir_modo(llm, nombre, asistencia, repeticiones):
+    llm.asistencia = dict(asistencia, greedy=True, tasks=('mejorar_respuesta',))
+    if asistencia.get('mode') is None:
+        llm.asistencia['mode'] = None
+
+    pasadas = [0]
+    gancho = llm.model.register_forward_hook(lambda *args: pasadas.__setitem__(0, pasadas[0] + 1))
+    tokens = 0
+    inicio = time.perf_counter()
+    try:
+        for _ in range(repeticiones):
+            for base in RESPUESTAS_BASE:
+                respuesta = llm.mejorar_respuesta(base, 'NEU') or ''
+                tokens += len(llm.tokenizer(respuesta, add_special_tokens=False)['input_ids'])
+    finally:
+        gancho.remove()
+    duracion = time.perf_counter() - inicio
+
+    por_pasada = tokens / pasadas[0] if pasadas[0] else 0.0
+    candidatos = asistencia.get('prompt_lookup_num_tokens') or asistencia.get('num_assistant_tokens') or 0
+    aceptacion = (por_pasada - 1) / candidatos if candidatos else 0.0
+    print(f"{nombre:<15} {tokens / duracion:8.2f} tokens/s | {por_pasada:5.2f} tokens/pasada | "
+          f"aceptación estimada {max(aceptacion, 0.0):6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--draft', help="Modelo borrador (mismo tokenizer que el principal)")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print("=== Benchmark de Generación Asistida ===\n")
+    if not LLM_AVAILABLE:
+        print("❌ Dependencias no disponibles. Instala: pip install transformers huggingface_hub torch")
+        return
+
+    llm = GemmaLLM()
+    if args.draft:
+        llm.asistencia = {'mode': 'draft_model', 'draft_model_name': args.draft}
+    if not llm.load_model():
+        print("❌ No se pudo cargar el modelo")
+        return
+
+    # Calentamiento
+    llm.mejorar_respuesta(RESPUESTAS_BASE[0], 'NEU')
+
+    medir_modo(llm, "sin asistencia", {'mode': None}, args.repeticiones)
+    medir_modo(llm, "prompt lookup", {'mode': 'prompt_lookup', 'prompt_lookup_num_tokens': 10},
+               args.repeticiones)
+    if llm.draft_model is not None:
+        medir_modo(llm, "modelo borrador", {'mode': 'draft_model', 'num_assistant_tokens': 5},
+                   args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
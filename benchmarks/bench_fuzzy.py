@@ -0,0 +1,124 @@
+"""
+Benchmark del índice difuso de palabras clave
+Mide el tiempo de construcción y la latencia añadida por token y por mensaje,
+y comprueba que las frases con palabras reales cercanas a una palabra clave
+no se modifican
+
+Uso:
+    python benchmarks/bench_fuzzy.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fuzzy_matcher import IndiceDifuso, crear_verificador_palabras  # noqa: E402
+from routing_keywords import (  # noqa: E402
+    VOCABULARIO_ENRUTAMIENTO, PALABRAS_NO_CORREGIBLES, PALABRAS_CONVERSACIONALES
+)
+
+TOKENS_ERRONEOS = [
+    "inteligensia", "criptomonedas", "telescpio", "bitcoim", "galxia", "computacion",
+    "medisina", "geneticca", "baterias", "exoplanetas", "procesadr", "renovables",
+]
+TOKENS_NORMALES = [
+    "que", "sobre", "puedes", "contarme", "quiero", "saber", "explicame", "como",
+    "funciona", "el", "la", "de", "nuevo", "mucho", "interesante", "porque",
+]
+MENSAJES = [
+    "hola quiero saber sobre inteligensia artificial",
+    "que hay de nuevo con el telescpio james webb",
+    "explicame como funcionan las criptomonedas y el bitcoim",
+    "me interesa la computacion cuantica y los procesadores",
+    "cuentame algo interesante sobre medicina y genetica",
+]
+# Palabras reales a una edición de una palabra clave: ningún token debe cambiar
+NO_CORREGIR = [
+    "dame contexto sobre la fusión nuclear",
+    "una pregunta graciosa sobre robots",
+    "quiero actuar en una pelicula",
+    "hace buen tiempo para estudiar",
+    "no me contesta el asistente",
+    "un chiste gracioso sobre planetas",
+    "riego la planta por la tarde",
+]
+REPETICIONES = 2000
+
+
+def crear_indice(es_palabra, **opciones):
+    """Construye el índice con la misma configuración que chatbot_logic."""
+    return IndiceDifuso(
+        VOCABULARIO_ENRUTAMIENTO, excluidas=PALABRAS_NO_CORREGIBLES,
+        protegidas=PALABRAS_CONVERSACIONALES, es_palabra=es_palabra, **opciones
+    )
+
+
+def medir(funcion, repeticiones):
+    """Devuelve el tiempo medio por llamada en microsegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    print("=== Benchmark del Índice Difuso ===\n")
+
+    # El diccionario se carga una vez al arrancar: fuera de la medición
+    es_palabra = crear_verificador_palabras(adicionales=PALABRAS_NO_CORREGIBLES)
+    es_palabra("hola")
+
+    inicio = time.perf_counter()
+    indice = crear_indice(es_palabra)
+    construccion = (time.perf_counter() - inicio) * 1000
+    print(f"Construcción: {construccion:.1f} ms "
+          f"({len(indice.vocabulario)} palabras, {len(indice.borrados)} variantes)\n")
+
+    # Sin caché: cada consulta recorre el índice de borrados
+    sin_cache = crear_indice(es_palabra, cache_size=0)
+    for nombre, tokens in [("errores", TOKENS_ERRONEOS), ("normales", TOKENS_NORMALES)]:
+        peor = 0.0
+        total = 0.0
+        for token in tokens:
+            t = medir(lambda: sin_cache.corregir(token), REPETICIONES // 10)
+            peor = max(peor, t)
+            total += t
+        print(f"Token {nombre:<9} sin caché: media {total / len(tokens):7.1f} µs | peor {peor:7.1f} µs")
+
+    # Por mensaje, con la caché caliente como en producción
+    tokens_mensajes = [m.split() for m in MENSAJES]
+    for tokens in tokens_mensajes:
+        indice.corregir_tokens(tokens)
+    por_mensaje = medir(
+        lambda: [indice.corregir_tokens(t) for t in tokens_mensajes], REPETICIONES
+    ) / len(tokens_mensajes)
+    print(f"\nMensaje completo (caché caliente): {por_mensaje:.1f} µs")
+
+    frio = medir(
+        lambda: [sin_cache.corregir_tokens(t) for t in tokens_mensajes], REPETICIONES // 10
+    ) / len(tokens_mensajes)
+    print(f"Mensaje completo (sin caché):      {frio:.1f} µs")
+
+    # Frases que deben quedar intactas
+    print()
+    cambiadas = 0
+    for frase in NO_CORREGIR:
+        tokens = frase.split()
+        corregidos = indice.corregir_tokens(tokens)
+        cambios = [f"{a} -> {b}" for a, b in zip(tokens, corregidos) if a != b]
+        if cambios:
+            cambiadas += 1
+        print(f"{'❌' if cambios else '✅'} {frase!r} {', '.join(cambios)}")
+
+    limite_us = 1000
+    estado = "✅" if frio < limite_us else "❌"
+    print(f"\n{estado} Latencia añadida por mensaje < {limite_us / 1000:.0f} ms")
+    estado = "✅" if not cambiadas else "❌"
+    print(f"{estado} Frases sin correcciones indebidas: {len(NO_CORREGIR) - cambiadas}/{len(NO_CORREGIR)}")
+    return 0 if frio < limite_us and not cambiadas else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
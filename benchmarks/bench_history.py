@@ -0,0 +1,89 @@
+"""
+Benchmark de memoria del historial de conversación
+Mide los bytes por sesión con 10k sesiones concurrentes y el historial lleno,
+comparando el buffer de columnas con una lista de diccionarios
+
+Uso:
+    python benchmarks/bench_history.py [num_sesiones] [max_historial]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from conversation_history import HistorialConversacion  # noqa: E402
+
+MENSAJES = [
+    "hola", "¿qué es chatgpt?", "háblame del telescopio james webb",
+    "me interesa la computación cuántica y los qubits",
+    "¿cómo funciona crispr para curar enfermedades genéticas?",
+    "gracias por la información", "¿qué novedades hay sobre fusión nuclear?",
+    "explícame el bitcoin y la tecnología blockchain en pocas palabras",
+]
+INTENCIONES = ["saludo", "ia.chatgpt", "espacio.webb", "computacion.cuantica",
+               "medicina.genetica", "agradecimiento", "energia.fusion", "blockchain.cripto"]
+SENTIMIENTOS = ["POS", "NEG", "NEU", None]
+
+
+def _texto(rng, i):
+    # Cada mensaje es un objeto distinto, como ocurre con peticiones reales
+    return f"{rng.choice(MENSAJES)} #{i}"
+
+
+def medir(crear, agregar, num_sesiones, turnos):
+    """Devuelve (bytes por sesión, segundos) para llenar num_sesiones historiales."""
+    rng = random.Random(42)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    inicio = time.perf_counter()
+    sesiones = []
+    for _ in range(num_sesiones):
+        historial = crear()
+        for i in range(turnos):
+            k = rng.randrange(len(INTENCIONES))
+            agregar(historial, _texto(rng, i), INTENCIONES[k], rng.choice(SENTIMIENTOS), time.time())
+        sesiones.append(historial)
+    duracion = time.perf_counter() - inicio
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del sesiones
+    return usado / num_sesiones, duracion
+
+
+def main():
+    num_sesiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    max_historial = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    # Se escriben el doble de turnos para ejercitar la sobrescritura circular
+    turnos = max_historial * 2
+
+    print("=== Benchmark de Memoria del Historial ===\n")
+    print(f"Sesiones: {num_sesiones} | max_historial: {max_historial} | turnos escritos: {turnos}\n")
+
+    por_sesion, duracion = medir(
+        lambda: HistorialConversacion(max_historial),
+        lambda h, texto, intencion, sentimiento, ts: h.agregar(texto, intencion, sentimiento, ts),
+        num_sesiones, turnos
+    )
+    print(f"Columnas compactas: {por_sesion / 1024:6.1f} KiB/sesión "
+          f"| total {por_sesion * num_sesiones / 2**20:7.1f} MiB | {duracion:.2f} s")
+
+    def agregar_dict(historial, texto, intencion, sentimiento, ts):
+        historial.append({'texto': texto, 'intencion': intencion,
+                          'sentimiento': sentimiento, 'timestamp': ts})
+        if len(historial) > max_historial:
+            del historial[0]
+
+    por_sesion_dict, duracion = medir(list, agregar_dict, num_sesiones, turnos)
+    print(f"Lista de dicts:     {por_sesion_dict / 1024:6.1f} KiB/sesión "
+          f"| total {por_sesion_dict * num_sesiones / 2**20:7.1f} MiB | {duracion:.2f} s")
+
+    print(f"\nAhorro: {(1 - por_sesion / por_sesion_dict) * 100:.0f}% "
+          "(el texto de los mensajes domina lo que queda)")
+
+
+if __name__ == "__main__":
+    main()
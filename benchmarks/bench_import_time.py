@@ -0,0 +1,96 @@
+"""
+Auditoría del tiempo de importación de backend.py por modo de operación
+Para cada OPERATION_MODE lanza un proceso nuevo con `python -X importtime`,
+mide el tiempo de importación, reparte el tiempo propio de cada módulo
+entre sus paquetes raíz (nltk, flask, numpy...) y comprueba que torch/transformers no se importan si el LLM está
+desactivado. En modo basic el objetivo es importar en menos de 1 s.
+
+Uso:
+    python benchmarks/bench_import_time.py [--modos basic,sentiment,hybrid,llm] [--top 10] [--repeticiones 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Módulos pesados que solo deberían aparecer en modo llm
+PESADOS = ('torch', 'transformers', 'huggingface_hub', 'pysentimiento')
+
+OBJETIVO_BASIC_S = 1.0
+
+
+def medir_importacion(modo, modulo='backend'):
+    """
+    Importa `modulo` en un proceso nuevo con -X importtime.
+
+    Returns:
+        dict: segundos de reloj, microsegundos propios por paquete raíz y módulos importados
+    """
+    entorno = dict(os.environ, OPERATION_MODE=modo, PYTHONDONTWRITEBYTECODE='1')
+    inicio = time.perf_counter()
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True
+    )
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+
+    por_paquete = {}
+    importados = set()
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or '|' not in linea:
+            continue
+        propio, _, nombre = linea[len('import time:'):].split('|')
+        if not propio.strip().isdigit():
+            continue  # cabecera
+        nombre = nombre.strip()
+        importados.add(nombre)
+        raiz = nombre.split('.')[0]
+        por_paquete[raiz] = por_paquete.get(raiz, 0) + int(propio)
+    return {'segundos': segundos, 'por_paquete': por_paquete, 'importados': importados}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación de backend.py por OPERATION_MODE")
+    parser.add_argument('--modos', default='basic,sentiment,hybrid,llm', help="Modos separados por comas")
+    parser.add_argument('--top', type=int, default=10, help="Módulos más costosos a mostrar")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Procesos por modo (se toma la mediana)")
+    args = parser.parse_args()
+
+    print("=== Benchmark de Tiempo de Importación ===\n")
+
+    resultados = {}
+    for modo in args.modos.split(','):
+        try:
+            medidas = sorted(
+                (medir_importacion(modo) for _ in range(args.repeticiones)), key=lambda m: m['segundos']
+            )
+        except RuntimeError as e:
+            print(f"❌ {modo}: {e}\n")
+            continue
+        mediana = medidas[len(medidas) // 2]
+        resultados[modo] = mediana
+
+        pesados = [m for m in PESADOS if m in mediana['importados']]
+        print(f"--- OPERATION_MODE={modo}: {mediana['segundos']:.2f} s "
+              f"({len(mediana['importados'])} módulos) ---")
+        print(f"Pesados importados: {', '.join(pesados) if pesados else 'ninguno'}")
+        for nombre, us in sorted(mediana['por_paquete'].items(), key=lambda x: -x[1])[:args.top]:
+            print(f"  {nombre:<32} {us / 1000:8.1f} ms")
+        print()
+
+    if 'basic' in resultados:
+        basic = resultados['basic']
+        estado = "✅" if basic['segundos'] < OBJETIVO_BASIC_S else "❌"
+        print(f"{estado} Importación en modo basic < {OBJETIVO_BASIC_S:.0f} s ({basic['segundos']:.2f} s)")
+        sin_pesados = not any(m in basic['importados'] for m in ('torch', 'transformers'))
+        print(f"{'✅' if sin_pesados else '❌'} Modo basic sin torch ni transformers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de la lematización del enrutamiento
+Compara el coste de la tokenización de NLTK con el de la búsqueda de lemas
+(caché fría y caliente) y cuenta cuántos tokens de mensajes con plurales y
+formas sin tilde pasan a coincidir con una palabra clave.
+
+Uso:
+    python benchmarks/bench_lemmas.py [--spacy]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import nltk  # noqa: E402
+
+from lemma_matcher import LematizadorEnrutamiento  # noqa: E402
+from routing_keywords import VOCABULARIO_ENRUTAMIENTO  # noqa: E402
+
+MENSAJES = [
+    "háblame de los planetas y las galaxias más lejanas",
+    "qué opinas de los robots y los chips de las computadoras cuanticas",
+    "las baterías de los coches eléctricos y las energías renovables",
+    "estoy muy contenta pero algo cansada hoy",
+    "cuáles son las últimas vacunas contra enfermedades raras",
+    "me interesan las criptomonedas y los contratos inteligentes",
+]
+REPETICIONES = 2000
+
+
+def medir(funcion, repeticiones):
+    """Devuelve el tiempo medio por llamada en microsegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def tokenizador():
+    """word_tokenize de NLTK; sin los datos de punkt, wordpunct_tokenize."""
+    try:
+        nltk.word_tokenize("prueba")
+        return nltk.word_tokenize, 'word_tokenize'
+    except LookupError:
+        return nltk.wordpunct_tokenize, 'wordpunct_tokenize (sin punkt)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lematización del enrutamiento")
+    parser.add_argument('--spacy', action='store_true', help="Consultar spaCy para las formas desconocidas")
+    args = parser.parse_args()
+
+    print("=== Benchmark de Lematización ===\n")
+
+    inicio = time.perf_counter()
+    lematizador = LematizadorEnrutamiento(VOCABULARIO_ENRUTAMIENTO, usar_spacy=args.spacy)
+    construccion = (time.perf_counter() - inicio) * 1000
+    print(f"Construcción de la tabla: {construccion:.1f} ms ({len(lematizador.tabla)} formas)\n")
+
+    tokenizar, nombre = tokenizador()
+    tokens_mensajes = [tokenizar(m.lower()) for m in MENSAJES]
+    n_mensajes = len(MENSAJES)
+
+    t_tokenizar = medir(lambda: [tokenizar(m.lower()) for m in MENSAJES], REPETICIONES // 10) / n_mensajes
+    print(f"Tokenización ({nombre}): {t_tokenizar:8.1f} µs/mensaje")
+
+    # Caché fría: se vacía la caché antes de cada pasada
+    def pasada_fria():
+        lematizador._cache.clear()
+        for tokens in tokens_mensajes:
+            lematizador.lematizar_tokens(tokens)
+    frio = medir(pasada_fria, 20 if args.spacy else REPETICIONES // 10) / n_mensajes
+    for tokens in tokens_mensajes:
+        lematizador.lematizar_tokens(tokens)
+    caliente = medir(lambda: [lematizador.lematizar_tokens(t) for t in tokens_mensajes], REPETICIONES) / n_mensajes
+    print(f"Lematización (caché fría):    {frio:8.1f} µs/mensaje")
+    print(f"Lematización (caché caliente): {caliente:7.1f} µs/mensaje\n")
+
+    claves = set(VOCABULARIO_ENRUTAMIENTO)
+    antes = sum(token in claves for tokens in tokens_mensajes for token in tokens)
+    despues = sum(token in claves for tokens in tokens_mensajes for token in lematizador.lematizar_tokens(tokens))
+    print(f"Tokens que coinciden con una palabra clave: {antes} -> {despues}")
+
+    estado = "✅" if caliente < t_tokenizar else "❌"
+    print(f"{estado} La lematización cuesta menos que la tokenización")
+
+
+if __name__ == "__main__":
+    main()
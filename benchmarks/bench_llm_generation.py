@@ -0,0 +1,88 @@
+"""
+Benchmark del presupuesto de generación de GemmaLLM
+Compara la generación anterior (max_length, prompt incluido en el límite y
+decodificación completa) con la actual (max_new_tokens acotado por
+LIMITS['max_tokens_llm'] y criterios de parada) sobre preguntas científicas
+
+Uso:
+    python benchmarks/bench_llm_generation.py [--repeticiones 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from llm_module import GemmaLLM, LLM_AVAILABLE  # noqa: E402
+
+PREGUNTAS = [
+    ("¿Qué descubrió el telescopio James Webb?", "espacio"),
+    ("¿Cómo funciona CRISPR?", "medicina"),
+    ("¿Qué es un qubit?", "computacion"),
+    ("¿Cuándo habrá fusión nuclear comercial?", "energia"),
+]
+
+
+def generacion_anterior(llm, prompt):
+    """Reproduce la llamada previa: max_length=250 incluye el prompt."""
+    import torch
+    inputs = llm.tokenizer(prompt, return_tensors="pt").to(llm.model.device)
+    with torch.no_grad():
+        output = llm.model.generate(**inputs, max_length=250, temperature=0.6, top_p=0.9,
+                                    do_sample=True, pad_token_id=llm.tokenizer.eos_token_id)
+    respuesta = llm.tokenizer.decode(output[0], skip_special_tokens=True)
+    if respuesta.startswith(prompt):
+        respuesta = respuesta[len(prompt):].strip()
+    return respuesta, output.shape[1] - inputs['input_ids'].shape[1]
+
+
+def medir(nombre, funcion, repeticiones):
+    tokens = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for pregunta, tema in PREGUNTAS:
+            tokens += funcion(pregunta, tema)
+    llamadas = repeticiones * len(PREGUNTAS)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<10} {tokens / llamadas:7.1f} tokens/respuesta | {duracion / llamadas * 1000:8.1f} ms/respuesta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print("=== Benchmark del Presupuesto de Generación ===\n")
+    if not LLM_AVAILABLE:
+        print("❌ Dependencias no disponibles. Instala: pip install transformers huggingface_hub torch")
+        return
+
+    llm = GemmaLLM()
+    if not llm.load_model():
+        print("❌ No se pudo cargar el modelo")
+        return
+
+    def anterior(pregunta, tema):
+        prompt = (
+            "Eres un asistente experto en ciencia y tecnología. Responde de manera clara, precisa y académica.\n\n"
+            f"Tema: {tema}\nPregunta del usuario: {pregunta}\n\nRespuesta:"
+        )
+        return generacion_anterior(llm, prompt)[1]
+
+    def actual(pregunta, tema):
+        antes = llm.estadisticas['tokens_generados']
+        llm.generar_respuesta_cientifica(tema, pregunta)
+        return llm.estadisticas['tokens_generados'] - antes
+
+    # Calentamiento
+    actual(*PREGUNTAS[0])
+
+    medir("anterior", anterior, args.repeticiones)
+    medir("actual", actual, args.repeticiones)
+    print(f"\nEstadísticas acumuladas: {llm.obtener_estadisticas()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark del logging asíncrono y del registro de auditoría
+Mide el coste por llamada, en el hilo que atiende la petición, de:
+  - print (escritura síncrona en el archivo de salida)
+  - logging con StreamHandler (síncrono, con su lock)
+  - logging con la cola de log_pipeline (el hilo solo encola)
+  - AuditLog.registrar (el hilo solo encola; escribe otro hilo por lotes)
+con un hilo y con varios escribiendo a la vez. La salida va a un archivo
+temporal que imita una terminal o una tubería leída por un recolector: cada
+escritura tarda --latencia-us y las escrituras se atienden de una en una.
+
+Uso:
+    python benchmarks/bench_logging.py [--hilos 16] [--llamadas 2000] [--latencia-us 50]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import log_pipeline  # noqa: E402
+from audit_log import AuditLog  # noqa: E402
+
+
+class SalidaLenta:
+    """Archivo cuyas escrituras tardan `latencia` segundos y se atienden de una en una."""
+
+    def __init__(self, archivo, latencia):
+        self.archivo = archivo
+        self.latencia = latencia
+        self._lock = threading.Lock()
+
+    def write(self, texto):
+        with self._lock:
+            time.sleep(self.latencia)
+            return self.archivo.write(texto)
+
+    def flush(self):
+        self.archivo.flush()
+
+
+def medir(funcion, hilos, llamadas):
+    """Microsegundos por llamada (mediana entre hilos) con `hilos` hilos haciendo `llamadas` cada uno."""
+    barrera = threading.Barrier(hilos)
+
+    def trabajo(_):
+        barrera.wait()
+        inicio = time.perf_counter()
+        for i in range(llamadas):
+            funcion(i)
+        return (time.perf_counter() - inicio) / llamadas * 1e6
+
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        tiempos = sorted(ejecutor.map(trabajo, range(hilos)))
+    return tiempos[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del logging asíncrono y la auditoría")
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--llamadas', type=int, default=2000, help="Llamadas por hilo")
+    parser.add_argument('--latencia-us', type=float, default=50, help="Duración de cada escritura en la salida")
+    args = parser.parse_args()
+
+    print("=== Benchmark de Logging Asíncrono y Auditoría ===\n")
+    print(f"{args.llamadas} llamadas por hilo | escritura de {args.latencia_us:.0f} µs en la salida\n")
+
+    directorio = tempfile.mkdtemp()
+    archivo = open(os.path.join(directorio, 'salida.log'), 'w')
+    salida = SalidaLenta(archivo, args.latencia_us / 1e6)
+    mensaje = "Error al analizar sentimiento: ejemplo %d"
+    resultados = {}
+
+    def comparar(nombre, funcion):
+        resultados[nombre] = (medir(funcion, 1, args.llamadas), medir(funcion, args.hilos, args.llamadas))
+
+    comparar('print', lambda i: print(mensaje % i, file=salida))
+
+    sincrono = logging.getLogger('bench.sincrono')
+    sincrono.propagate = False
+    manejador = logging.StreamHandler(salida)
+    manejador.setFormatter(logging.Formatter('%(message)s'))
+    sincrono.addHandler(manejador)
+    sincrono.setLevel(logging.INFO)
+    comparar('logging síncrono', lambda i: sincrono.info(mensaje, i))
+
+    destino = logging.StreamHandler(salida)
+    destino.setFormatter(logging.Formatter('%(message)s'))
+    # Importar audit_log ya lo configuró hacia stdout: se reinicia con el archivo como destino
+    log_pipeline.detener_logging()
+    log_pipeline.configurar_logging(destino)
+    asincrono = log_pipeline.obtener_logger('bench')
+    comparar('logging con cola', lambda i: asincrono.info(mensaje, i))
+    descartados = log_pipeline.registros_descartados()
+    inicio = time.perf_counter()
+    log_pipeline.detener_logging()
+    vaciado = time.perf_counter() - inicio
+
+    auditoria = AuditLog(os.path.join(directorio, 'auditoria.jsonl'), max_bytes=8 * 2**20)
+    comparar('auditoría', lambda i: auditoria.registrar(
+        f"sesion-{i % 100}", 'tema_ia', 'POS', 12.34, modo='hybrid', codigo=200
+    ))
+    auditoria.cerrar()
+    estadisticas = auditoria.obtener_estadisticas()
+
+    print(f"{'µs por llamada':<18} {'1 hilo':>10} {f'{args.hilos} hilos':>10}")
+    for nombre, (uno, varios) in resultados.items():
+        print(f"{nombre:<18} {uno:10.2f} {varios:10.2f}")
+    print(f"\nCola de logging: {descartados} descartados, vaciada en {vaciado * 1000:.0f} ms al detener")
+    print(f"Auditoría: {estadisticas['escritos']} registros en {estadisticas['lotes']} escrituras, "
+          f"{estadisticas['rotaciones']} rotaciones, {estadisticas['descartados']} descartados")
+
+    archivo.close()
+    shutil.rmtree(directorio)
+    # Por petición de /chat: una línea de log y un registro de auditoría, con un solo hilo activo
+    por_peticion = resultados['logging con cola'][0] + resultados['auditoría'][0]
+    print(f"\n{'✅' if por_peticion < 100 else '❌'} Coste por petición en el hilo de /chat: {por_peticion:.1f} µs "
+          f"(print síncrono: {resultados['print'][0]:.1f} µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark del arranque del modelo LLM
+Carga GemmaLLM en procesos nuevos desde el hub (caché de HuggingFace + login)
+y desde el snapshot local en safetensors, en frío (páginas del snapshot
+expulsadas de la caché del sistema) y en caliente (segunda carga)
+
+Uso:
+    python benchmarks/bench_model_load.py [--repeticiones 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from config import LLM_CONFIG  # noqa: E402
+from llm_module import LLM_AVAILABLE, leer_snapshot  # noqa: E402
+
+# Se ejecuta en un proceso nuevo para no reutilizar nada del anterior
+CARGA = """
+import json, sys
+from llm_module import GemmaLLM
+llm = GemmaLLM(model_name=sys.argv[1])
+llm.snapshot_dir = sys.argv[2] or None
+ok = llm.load_model()
+print(json.dumps(llm.tiempos_carga[-1] if ok else None))
+"""
+
+
+def expulsar_cache(directorio):
+    """Pide al kernel que descarte las páginas en caché de los archivos (Linux)."""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if os.path.isfile(ruta):
+            fd = os.open(ruta, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+
+def cargar(snapshot_dir):
+    salida = subprocess.run(
+        [sys.executable, '-c', CARGA, LLM_CONFIG.get('model_name', 'google/gemma-2b-it'), snapshot_dir or ''],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    lineas = salida.stdout.strip().splitlines()
+    return json.loads(lineas[-1]) if lineas else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print("=== Benchmark del Arranque del Modelo ===\n")
+    if not LLM_AVAILABLE:
+        print("❌ Dependencias no disponibles. Instala: pip install transformers huggingface_hub torch")
+        return
+
+    directorio = LLM_CONFIG.get('snapshot_dir')
+    if not leer_snapshot(directorio):
+        print(f"⚠️ No hay snapshot en {directorio}. Créalo con: python start.py --snapshot\n")
+        directorio = None
+
+    casos = [('hub', None)]
+    if directorio:
+        casos.append(('snapshot', directorio))
+
+    for nombre, origen in casos:
+        for i in range(args.repeticiones):
+            frio = i == 0 and origen and expulsar_cache(origen)
+            resultado = cargar(origen)
+            if resultado is None:
+                print(f"❌ {nombre}: error al cargar")
+                break
+            estado = 'frío' if frio else 'caliente' if i else 'primera'
+            print(f"{nombre:<9} {estado:<9} {resultado['segundos']:7.2f} s (origen: {resultado['origen']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark del servidor de modelos frente a la inferencia en proceso
+Lanza N workers que analizan sentimiento en paralelo y mide el RSS total
+(workers + servidor) y el throughput en ambos modos
+
+Uso:
+    python benchmarks/bench_model_server.py [--workers 4] [--mensajes 200]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+TEXTOS = [
+    "Me encanta aprender sobre inteligencia artificial",
+    "Esto es muy complicado y frustrante",
+    "¿Qué es el James Webb?",
+    "Gracias por la información, fue muy útil",
+]
+
+
+def rss_mb(pid):
+    """RSS de un proceso en MiB (Linux /proc o psutil)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 2**20
+    except Exception:
+        return 0.0
+
+
+def _worker(modo, direccion, mensajes, listo, inicio, resultados):
+    if modo == 'remoto':
+        from model_server import ModelServerClient, RemoteSentimentAnalyzer
+        analizador = RemoteSentimentAnalyzer(ModelServerClient(direccion))
+    else:
+        from sentiment_analyzer import SentimentAnalyzer
+        analizador = SentimentAnalyzer()
+    listo.release()
+    inicio.wait()
+
+    t0 = time.perf_counter()
+    for i in range(mensajes):
+        analizador.analyze(TEXTOS[i % len(TEXTOS)])
+    resultados.put((os.getpid(), time.perf_counter() - t0, rss_mb(os.getpid())))
+
+
+def ejecutar(modo, workers, mensajes, direccion=None, pid_servidor=None):
+    ctx = mp.get_context('spawn')
+    listo = ctx.Semaphore(0)
+    inicio = ctx.Event()
+    resultados = ctx.Queue()
+    procesos = [ctx.Process(target=_worker, args=(modo, direccion, mensajes, listo, inicio, resultados))
+                for _ in range(workers)]
+    for p in procesos:
+        p.start()
+    for _ in procesos:
+        listo.acquire()
+
+    t0 = time.perf_counter()
+    inicio.set()
+    datos = [resultados.get() for _ in procesos]
+    total = time.perf_counter() - t0
+    for p in procesos:
+        p.join()
+
+    rss_workers = sum(d[2] for d in datos)
+    rss_servidor = rss_mb(pid_servidor) if pid_servidor else 0.0
+    throughput = workers * mensajes / total
+    print(f"{modo:<9} RSS workers {rss_workers:8.1f} MiB | servidor {rss_servidor:8.1f} MiB | "
+          f"total {rss_workers + rss_servidor:8.1f} MiB | {throughput:8.1f} mensajes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mensajes', type=int, default=200)
+    args = parser.parse_args()
+
+    print("=== Benchmark: Servidor de Modelos vs En Proceso ===\n")
+    print(f"Workers: {args.workers} | mensajes por worker: {args.mensajes}\n")
+
+    ejecutar('local', args.workers, args.mensajes)
+
+    direccion = os.path.join(tempfile.mkdtemp(), 'modelos.sock') if hasattr(os, 'fork') else '127.0.0.1:8765'
+    entorno = dict(os.environ, MODEL_SERVER_ADDRESS=direccion)
+    servidor = subprocess.Popen([sys.executable, os.path.join(RAIZ, 'model_server.py')],
+                                cwd=RAIZ, env=entorno,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        from model_server import ModelServerClient
+        cliente = ModelServerClient(direccion, timeout=5)
+        for _ in range(600):
+            try:
+                cliente.llamar('ping')
+                break
+            except OSError:
+                time.sleep(0.5)
+        else:
+            print("❌ El servidor de modelos no arrancó")
+            return
+        ejecutar('remoto', args.workers, args.mensajes, direccion, servidor.pid)
+        estadisticas = cliente.llamar('stats')
+        if estadisticas['lotes']:
+            print(f"\nTamaño medio de lote: {estadisticas['textos_en_lotes'] / estadisticas['lotes']:.1f}")
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
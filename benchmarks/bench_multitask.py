@@ -0,0 +1,122 @@
+"""
+Benchmark del análisis multitarea
+Compara, cada uno en su propio proceso, tres analizadores de pysentimiento
+independientes (sentiment, emotion, hate_speech) con AnalizadorMultitarea
+(preprocesado y tokenización compartidos; encoder compartido entre los
+modelos con los mismos pesos): memoria (RSS y bytes de parámetros) y
+latencia por lote. Requiere pysentimiento.
+
+Uso:
+    python benchmarks/bench_multitask.py [--tareas sentiment,emotion,hate_speech] [--lote 16] [--repeticiones 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+MENSAJES = [
+    "Me encanta aprender sobre inteligencia artificial",
+    "Esto es muy complicado y frustrante",
+    "¿Qué es el James Webb?",
+    "Eres inútil y no me ayudas en nada",
+    "Gracias por la información, fue muy útil",
+    "Tengo miedo de lo que pueda pasar con el cambio climático",
+    "¡Qué sorpresa, no sabía que existían los agujeros negros supermasivos!",
+    "Odio cuando las respuestas son tan lentas",
+]
+
+
+def rss_mb():
+    """RSS del proceso actual en MiB (Linux /proc o psutil)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except Exception:
+        return 0.0
+
+
+def bytes_parametros(modelos):
+    """Bytes de parámetros y buffers distintos de varios modelos."""
+    vistos, total = set(), 0
+    for modelo in modelos:
+        for tensor in list(modelo.parameters()) + list(modelo.buffers()):
+            if tensor.data_ptr() not in vistos:
+                vistos.add(tensor.data_ptr())
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def _medir(modo, tareas, lote, repeticiones, resultados):
+    """Carga la configuración `modo` en este proceso y mide memoria y latencia."""
+    import pysentimiento  # noqa: F401  (torch y transformers fuera de la medida de memoria)
+    base = rss_mb()
+    if modo == 'independientes':
+        from pysentimiento import create_analyzer
+        analizadores = [create_analyzer(task=tarea, lang='es') for tarea in tareas]
+        parametros = bytes_parametros(a.model for a in analizadores)
+
+        def predecir(textos):
+            return [a.predict(textos) for a in analizadores]
+    else:
+        from multitask_analyzer import AnalizadorMultitarea
+        analizador = AnalizadorMultitarea(tareas)
+        analizador.cargar()
+        parametros = analizador.memoria_bytes()
+        predecir = analizador.predecir
+
+    textos = (MENSAJES * (lote // len(MENSAJES) + 1))[:lote]
+    predecir(textos)  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        predecir(textos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    resultados.put((modo, rss_mb() - base, parametros / 2**20, statistics.median(tiempos)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del análisis multitarea")
+    parser.add_argument('--tareas', default='sentiment,emotion,hate_speech')
+    parser.add_argument('--lote', type=int, default=16, help="Mensajes por llamada")
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+    tareas = [t.strip() for t in args.tareas.split(',') if t.strip()]
+
+    print("=== Benchmark de Análisis Multitarea ===\n")
+
+    from multitask_analyzer import PYSENTIMIENTO_AVAILABLE
+    if not PYSENTIMIENTO_AVAILABLE:
+        print("❌ pysentimiento no está instalado")
+        return
+
+    print(f"Tareas: {', '.join(tareas)} | lote de {args.lote} mensajes\n")
+    contexto = multiprocessing.get_context('spawn')
+    medidas = {}
+    for modo in ('independientes', 'multitarea'):
+        resultados = contexto.Queue()
+        proceso = contexto.Process(target=_medir, args=(modo, tareas, args.lote, args.repeticiones, resultados))
+        proceso.start()
+        _, rss, parametros, latencia = resultados.get()
+        proceso.join()
+        medidas[modo] = (rss, parametros, latencia)
+        print(f"{modo:<15} RSS +{rss:8.1f} MiB | parámetros {parametros:8.1f} MiB | {latencia:8.1f} ms/lote")
+
+    ahorro = 1 - medidas['multitarea'][0] / medidas['independientes'][0] if medidas['independientes'][0] else 0.0
+    mejora = medidas['independientes'][2] / medidas['multitarea'][2]
+    print(f"\n{'✅' if mejora >= 1 else '❌'} Multitarea: latencia ×{mejora:.2f}, memoria {ahorro:.0%} menor")
+
+
+if __name__ == "__main__":
+    main()
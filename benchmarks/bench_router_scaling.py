@@ -0,0 +1,299 @@
+"""
+Benchmark del enrutador de sesiones (session_router.py)
+1. Movimiento de sesiones en el anillo: fracción de claves que cambian de
+   nodo al añadir o quitar uno (ideal ~1/N) frente a hash % N, y equilibrio
+   del reparto con los nodos virtuales configurados.
+2. Escalado: arranca N procesos de backend.py y, para 1..N nodos, un
+   enrutador en su propio proceso; varios procesos cliente envían /chat
+   repartido entre muchas sesiones y se mide el throughput agregado, la
+   latencia y que cada sesión haya ido siempre al mismo nodo.
+3. Caída de un nodo: con N nodos se detiene uno y se comprueba que solo sus
+   sesiones cambian de nodo.
+El escalado está limitado por los núcleos de la máquina (cada nodo, el
+enrutador y los clientes compiten por ellos).
+
+Uso:
+    python benchmarks/bench_router_scaling.py [--nodos 4] [--segundos 10] [--clientes 2] [--hilos 8] [--sesiones 400]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from session_router import AnilloHash, CABECERA_NODO  # noqa: E402
+
+MENSAJES = [
+    "hola", "háblame de inteligencia artificial", "¿qué es el James Webb?", "explícame la fusión nuclear",
+    "quiero saber sobre CRISPR", "¿qué es bitcoin?", "cuéntame sobre los robots", "gracias",
+]
+
+
+def movimiento(antes, despues):
+    """Fracción de claves cuyo nodo cambió."""
+    return sum(a != d for a, d in zip(antes, despues)) / len(antes)
+
+
+def comparar_anillo(maximo, virtuales, n_claves):
+    """Imprime el movimiento al añadir/quitar nodos y el equilibrio del reparto."""
+    claves = [f"sesion-{i}" for i in range(n_claves)]
+    nodos = [f"http://127.0.0.1:{5001 + i}" for i in range(maximo + 1)]
+    print(f"{'nodos':>5} {'añadir (ideal)':>16} {'hash % N':>9} {'quitar (ideal)':>16} {'máx/media':>10}")
+    for n in range(1, maximo + 1):
+        anillo = AnilloHash(nodos[:n], virtuales)
+        antes = [anillo.nodo_para(c) for c in claves]
+        anillo.agregar(nodos[n])
+        anadido = movimiento(antes, [anillo.nodo_para(c) for c in claves])
+        anillo.quitar(nodos[n])
+        cuentas = {}
+        for nodo in antes:
+            cuentas[nodo] = cuentas.get(nodo, 0) + 1
+        equilibrio = max(cuentas.values()) / (n_claves / n)
+
+        # Reparto ingenuo: casi todas las claves cambian de nodo al cambiar N
+        modulo = [zlib.crc32(c.encode()) % n for c in claves]
+        modulo_mas = [zlib.crc32(c.encode()) % (n + 1) for c in claves]
+
+        quitado = 0.0
+        if n > 1:
+            anillo.quitar(nodos[0])
+            quitado = movimiento(antes, [anillo.nodo_para(c) for c in claves])
+        ideal_quitar = f"({cuentas[nodos[0]] / n_claves:.1%})" if n > 1 else ""
+        print(f"{n:>5} {anadido:>7.1%} ({1 / (n + 1):.1%}) {movimiento(modulo, modulo_mas):>9.1%} "
+              f"{(f'{quitado:.1%}' if n > 1 else '-'):>7} {ideal_quitar:>8} {equilibrio:>10.2f}")
+
+
+def pedir(puerto, metodo, ruta, cuerpo=None, timeout=5):
+    """Petición sencilla a 127.0.0.1:puerto; devuelve el código o None si no conecta."""
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=timeout)
+    try:
+        conexion.request(metodo, ruta, body=cuerpo, headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        return respuesta.status
+    except OSError:
+        return None
+    finally:
+        conexion.close()
+
+
+def esperar(proceso, puerto, ruta, nombre, limite=120):
+    """Espera a que el proceso responda en la ruta indicada."""
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"{nombre} terminó al arrancar (código {proceso.returncode})")
+        if pedir(puerto, 'GET', ruta, timeout=2) == 200:
+            return
+        time.sleep(0.3)
+    proceso.kill()
+    raise RuntimeError(f"{nombre} no respondió en {limite} s")
+
+
+def arrancar_nodo(puerto, directorio):
+    """Lanza backend.py en un proceso aparte."""
+    entorno = dict(os.environ, AUDIT_LOG_PATH=os.path.join(directorio, f"auditoria-{puerto}.jsonl"))
+    codigo = f"from backend import app; app.run(port={puerto}, threaded=True, use_reloader=False)"
+    proceso = subprocess.Popen([sys.executable, '-c', codigo], cwd=RAIZ, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    esperar(proceso, puerto, '/', f"backend.py :{puerto}")
+    return proceso
+
+
+def arrancar_enrutador(puerto, nodos, virtuales):
+    """Lanza session_router.py en un proceso aparte."""
+    entorno = dict(os.environ, ROUTER_NODES=','.join(nodos), ROUTER_PORT=str(puerto))
+    proceso = subprocess.Popen([sys.executable, 'session_router.py'], cwd=RAIZ, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    esperar(proceso, puerto, '/router/estado', "session_router.py")
+    return proceso
+
+
+def trabajo_cliente(puerto, sesiones, hilos, segundos):
+    """
+    Proceso cliente: `hilos` hilos con una conexión persistente cada uno;
+    cada hilo conversa con su propio subconjunto de sesiones, en orden.
+
+    Returns:
+        dict: Contadores, latencias (ms) y nodos vistos por sesión
+    """
+    resultado = {'ok': 0, 'errores': 0, 'limitadas': 0, 'latencias': [], 'nodos': {}}
+    lock = threading.Lock()
+    fin = time.monotonic() + segundos
+
+    def hilo(propias):
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+        latencias, nodos, cuentas = [], {}, {'ok': 0, 'errores': 0, 'limitadas': 0}
+        turno = 0
+        while time.monotonic() < fin:
+            sesion = propias[turno % len(propias)]
+            cuerpo = json.dumps({'mensaje': MENSAJES[turno % len(MENSAJES)], 'session_id': sesion, 'compacto': True})
+            turno += 1
+            inicio = time.perf_counter()
+            try:
+                conexion.request('POST', '/chat', body=cuerpo, headers={'Content-Type': 'application/json'})
+                respuesta = conexion.getresponse()
+                respuesta.read()
+            except (OSError, http.client.HTTPException):
+                conexion.close()
+                cuentas['errores'] += 1
+                continue
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            nodo = respuesta.getheader(CABECERA_NODO)
+            if nodo:
+                nodos.setdefault(sesion, set()).add(nodo)
+            # 500 de backend.py cuenta como atendida: lo que se mide es el reparto, no la respuesta
+            if respuesta.status == 429:
+                cuentas['limitadas'] += 1
+            elif respuesta.status in (502, 503, 504):
+                cuentas['errores'] += 1
+            else:
+                cuentas['ok'] += 1
+        conexion.close()
+        with lock:
+            for clave, valor in cuentas.items():
+                resultado[clave] += valor
+            resultado['latencias'].extend(latencias)
+            for sesion, vistos in nodos.items():
+                resultado['nodos'].setdefault(sesion, set()).update(vistos)
+
+    hilos_cliente = [threading.Thread(target=hilo, args=(sesiones[i::hilos],)) for i in range(hilos)]
+    for h in hilos_cliente:
+        h.start()
+    for h in hilos_cliente:
+        h.join()
+    return resultado
+
+
+def medir(puerto, args):
+    """Carga de todos los procesos cliente contra un puerto; devuelve el resultado agregado."""
+    sesiones = [f"bench-{i}" for i in range(args.sesiones)]
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Pool(args.clientes) as pool:
+        parciales = pool.starmap(trabajo_cliente, [
+            (puerto, sesiones[c::args.clientes], args.hilos, args.segundos) for c in range(args.clientes)
+        ])
+    total = {'ok': 0, 'errores': 0, 'limitadas': 0, 'latencias': [], 'nodos': {}}
+    for parcial in parciales:
+        for clave in ('ok', 'errores', 'limitadas'):
+            total[clave] += parcial[clave]
+        total['latencias'].extend(parcial['latencias'])
+        total['nodos'].update(parcial['nodos'])
+    return total
+
+
+def asignacion(puerto, sesiones):
+    """Nodo que atiende ahora cada sesión (una petición por sesión)."""
+    nodos = {}
+    for sesion in sesiones:
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        try:
+            conexion.request('POST', '/chat', body=json.dumps({'mensaje': 'hola', 'session_id': sesion}),
+                             headers={'Content-Type': 'application/json'})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            nodos[sesion] = respuesta.getheader(CABECERA_NODO)
+        except OSError:
+            nodos[sesion] = None
+        finally:
+            conexion.close()
+    return nodos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalado del enrutador de sesiones")
+    parser.add_argument('--nodos', type=int, default=4, help="Número máximo de nodos")
+    parser.add_argument('--segundos', type=float, default=10, help="Duración de cada medida")
+    parser.add_argument('--clientes', type=int, default=2, help="Procesos cliente")
+    parser.add_argument('--hilos', type=int, default=8, help="Hilos por proceso cliente")
+    parser.add_argument('--sesiones', type=int, default=400)
+    parser.add_argument('--virtuales', type=int, default=160, help="Nodos virtuales del análisis del anillo")
+    parser.add_argument('--claves', type=int, default=100000, help="Claves del análisis del anillo")
+    parser.add_argument('--puerto-base', type=int, default=5200)
+    args = parser.parse_args()
+
+    print("=== Benchmark del Enrutador de Sesiones ===\n")
+    print(f"--- Movimiento en el anillo ({args.virtuales} nodos virtuales, {args.claves} claves) ---")
+    comparar_anillo(args.nodos, args.virtuales, args.claves)
+
+    nucleos = os.cpu_count() or 1
+    print(f"\n--- Escalado (1..{args.nodos} nodos, {args.clientes}x{args.hilos} clientes, "
+          f"{args.sesiones} sesiones, {args.segundos:g} s por medida) ---")
+    if nucleos < args.nodos + 2:
+        print(f"⚠️ Solo hay {nucleos} núcleo(s): los nodos, el enrutador y los clientes compiten por la CPU")
+
+    directorio = tempfile.mkdtemp()
+    puerto_enrutador = args.puerto_base
+    puertos = [args.puerto_base + 1 + i for i in range(args.nodos)]
+    urls = [f"http://127.0.0.1:{p}" for p in puertos]
+    procesos = {}
+    enrutador = None
+    try:
+        for puerto in puertos:
+            procesos[puerto] = arrancar_nodo(puerto, directorio)
+
+        filas = []
+        directo = medir(puertos[0], args)
+        filas.append(('1 directo', directo))
+        for n in range(1, args.nodos + 1):
+            enrutador = arrancar_enrutador(puerto_enrutador, urls[:n], args.virtuales)
+            filas.append((f"{n} nodo(s)", medir(puerto_enrutador, args)))
+            enrutador.terminate()
+            enrutador.wait()
+            enrutador = None
+
+        base = None
+        print(f"\n{'':<11} {'pet/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'escalado':>9} {'errores':>8} {'429':>6} {'cambios':>8}")
+        for nombre, r in filas:
+            rendimiento = (r['ok'] + r['limitadas']) / args.segundos
+            latencias = sorted(r['latencias']) or [0.0]
+            p95 = latencias[int(len(latencias) * 0.95) - 1] if len(latencias) > 1 else latencias[0]
+            if nombre.startswith('1 nodo'):
+                base = rendimiento
+            escalado = f"{rendimiento / base:.2f}x" if base else '-'
+            # Sesiones que vieron más de un nodo (debe ser 0 sin caídas)
+            cambios = sum(len(v) > 1 for v in r['nodos'].values())
+            print(f"{nombre:<11} {rendimiento:>8.1f} {statistics.median(latencias):>8.1f} {p95:>8.1f} "
+                  f"{escalado:>9} {r['errores']:>8} {r['limitadas']:>6} {cambios:>8}")
+
+        if args.nodos > 1:
+            print(f"\n--- Caída de un nodo ({args.nodos} nodos) ---")
+            enrutador = arrancar_enrutador(puerto_enrutador, urls, args.virtuales)
+            sesiones = [f"caida-{i}" for i in range(args.sesiones)]
+            antes = asignacion(puerto_enrutador, sesiones)
+            caido = urls[-1]
+            procesos[puertos[-1]].terminate()
+            procesos[puertos[-1]].wait()
+            despues = asignacion(puerto_enrutador, sesiones)
+            afectadas = [s for s in sesiones if antes[s] == caido]
+            movidas = [s for s in sesiones if antes[s] != despues[s]]
+            sin_nodo = sum(despues[s] is None for s in sesiones)
+            solo_afectadas = set(movidas) <= set(afectadas)
+            print(f"Sesiones en el nodo caído: {len(afectadas)} | cambiaron de nodo: {len(movidas)} | "
+                  f"sin respuesta: {sin_nodo}")
+            print(f"{'✅' if solo_afectadas and not sin_nodo else '❌'} Solo se movieron las sesiones del nodo caído")
+    finally:
+        if enrutador is not None:
+            enrutador.terminate()
+            enrutador.wait()
+        for proceso in procesos.values():
+            if proceso.poll() is None:
+                proceso.terminate()
+                proceso.wait()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark de la caché semántica del LLM
+Con un conjunto etiquetado de paráfrasis (misma pregunta) y de preguntas
+parecidas pero distintas, siembra la caché con una pregunta por grupo y mide,
+para varios umbrales, la tasa de aciertos sobre las paráfrasis y la tasa de
+falsos aciertos (respuesta de otra pregunta), con y sin exigir las mismas
+palabras con contenido. Mide además la latencia de
+búsqueda con la caché llena y el tiempo de guardar/cargar en disco.
+
+Uso:
+    python benchmarks/bench_semantic_cache.py [--umbrales 0.6,0.7,0.8,0.9] [--capacidad 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from semantic_cache import SemanticCache  # noqa: E402
+
+# (tema, pregunta sembrada, paráfrasis que deben acertar)
+GRUPOS = [
+    ("Medicina", "¿Qué es CRISPR?", ["explícame CRISPR", "háblame de crispr", "¿qué significa CRISPR?"]),
+    ("Medicina", "¿Cómo funcionan las vacunas de ARNm?",
+     ["explícame cómo funcionan las vacunas de ARNm", "cómo funciona una vacuna de ARN mensajero"]),
+    ("Energía", "¿Qué es la fusión nuclear?", ["explícame la fusión nuclear", "cuéntame sobre la fusion nuclear"]),
+    ("Energía", "¿Qué son las baterías de estado sólido?",
+     ["háblame de las baterías de estado sólido", "explica las baterias de estado solido"]),
+    ("Espacio", "¿Qué ha descubierto el James Webb?",
+     ["dime qué ha descubierto el telescopio James Webb", "descubrimientos del James Webb"]),
+    ("Espacio", "¿Qué es un agujero negro?", ["explícame qué es un agujero negro", "define agujero negro"]),
+    ("IA", "¿Qué es el aprendizaje por refuerzo?",
+     ["explícame el aprendizaje por refuerzo", "háblame del aprendizaje por refuerzo"]),
+    ("IA", "¿Cómo funciona ChatGPT?", ["explícame cómo funciona ChatGPT", "¿cómo funciona chatgpt exactamente?"]),
+    ("Computación", "¿Qué es un qubit?", ["explícame qué es un qubit", "define qubit"]),
+    ("Blockchain", "¿Qué es un contrato inteligente?", ["explícame los contratos inteligentes"]),
+    ("Energía", "ventajas de la energía solar",
+     ["¿cuáles son las ventajas de la energía solar?", "háblame de las ventajas de la energia solar"]),
+]
+
+# (tema, pregunta) parecidas a alguna sembrada pero con otra respuesta: no deben acertar
+DISTINTAS = [
+    ("Energía", "¿Qué es la fisión nuclear?"),
+    ("Energía", "¿Qué son las baterías de litio?"),
+    ("Espacio", "¿Qué es una estrella de neutrones?"),
+    ("Espacio", "¿Qué ha descubierto el Hubble?"),
+    ("Medicina", "¿Cómo funcionan las vacunas de virus atenuado?"),
+    ("Medicina", "¿Qué es la terapia génica?"),
+    ("IA", "¿Qué es el aprendizaje supervisado?"),
+    ("IA", "¿Cómo funciona Midjourney?"),
+    ("Computación", "¿Qué es un bit?"),
+    ("Blockchain", "¿Qué es un NFT?"),
+    # Mismo sujeto, otro aspecto
+    ("Energía", "desventajas de la energía solar"),
+    ("Energía", "riesgos de la fusión nuclear"),
+    ("Energía", "historia de la fusión nuclear"),
+    ("Medicina", "¿Qué riesgos tiene CRISPR?"),
+    ("Medicina", "efectos secundarios de las vacunas de ARNm"),
+    ("Espacio", "¿Cuánto costó el James Webb?"),
+    ("IA", "¿Qué limitaciones tiene ChatGPT?"),
+    ("Computación", "¿Cuántos qubits tiene el ordenador más grande?"),
+    # Misma pregunta, otro tema
+    ("Espacio", "¿Qué es CRISPR?"),
+]
+
+
+def evaluar(umbral, mismas_palabras=True):
+    """Tasa de aciertos en paráfrasis y de falsos aciertos con un umbral."""
+    cache = SemanticCache(umbral=umbral, mismas_palabras=mismas_palabras)
+    for tema, pregunta, _ in GRUPOS:
+        cache.guardar_respuesta(tema, pregunta, f"respuesta: {pregunta}")
+
+    aciertos = falsos = total = 0
+    for tema, pregunta, parafrasis in GRUPOS:
+        for variante in parafrasis:
+            total += 1
+            respuesta, _, _ = cache.buscar(tema, variante)
+            if respuesta == f"respuesta: {pregunta}":
+                aciertos += 1
+            elif respuesta is not None:
+                falsos += 1
+    for tema, pregunta in DISTINTAS:
+        respuesta, _, _ = cache.buscar(tema, pregunta)
+        if respuesta is not None:
+            falsos += 1
+    return aciertos / total, falsos / (total + len(DISTINTAS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la caché semántica del LLM")
+    parser.add_argument('--umbrales', default='0.6,0.7,0.75,0.8,0.85,0.9', help="Umbrales separados por comas")
+    parser.add_argument('--capacidad', type=int, default=2000, help="Entradas para medir la latencia")
+    args = parser.parse_args()
+
+    print("=== Benchmark de la Caché Semántica ===\n")
+    n_parafrasis = sum(len(g[2]) for g in GRUPOS)
+    print(f"{len(GRUPOS)} preguntas sembradas, {n_parafrasis} paráfrasis, {len(DISTINTAS)} preguntas distintas\n")
+
+    print(f"{'':>7} {'mismas palabras':>18} {'solo similitud':>18}")
+    print(f"{'umbral':>7} {'aciertos':>9} {'falsos':>8} {'aciertos':>9} {'falsos':>8}")
+    for umbral in [float(u) for u in args.umbrales.split(',')]:
+        aciertos, falsos = evaluar(umbral)
+        aciertos_sin, falsos_sin = evaluar(umbral, mismas_palabras=False)
+        print(f"{umbral:>7.2f} {aciertos:>9.0%} {falsos:>8.0%} {aciertos_sin:>9.0%} {falsos_sin:>8.0%}")
+
+    # Latencia con la caché llena
+    aleatorio = random.Random(0)
+    palabra = lambda: ''.join(aleatorio.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(7))
+    cache = SemanticCache(capacidad=args.capacidad)
+    for i in range(args.capacidad):
+        cache.guardar_respuesta(GRUPOS[i % len(GRUPOS)][0], f"¿qué es {palabra()} {palabra()}?", "respuesta")
+    repeticiones = 500
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        cache.buscar("Medicina", GRUPOS[0][2][i % 3])
+    busqueda = (time.perf_counter() - inicio) / repeticiones * 1e6
+    print(f"\nBúsqueda con {len(cache)} entradas: {busqueda:.0f} µs")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache.ruta = os.path.join(directorio, 'cache.npz')
+        inicio = time.perf_counter()
+        cache.guardar()
+        guardado = (time.perf_counter() - inicio) * 1000
+        inicio = time.perf_counter()
+        copia = SemanticCache(capacidad=args.capacidad, ruta=cache.ruta)
+        carga = (time.perf_counter() - inicio) * 1000
+        tamano = os.path.getsize(cache.ruta) / 1024
+    print(f"Guardar: {guardado:.1f} ms | cargar: {carga:.1f} ms ({len(copia)} entradas, {tamano:.0f} KiB)")
+
+    limite_us = 2000
+    print(f"\n{'✅' if busqueda < limite_us else '❌'} Búsqueda < {limite_us / 1000:.0f} ms "
+          f"(frente a segundos de generación del LLM)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark del análisis de sentimiento por ventanas
+Mide la latencia de SentimentAnalyzer frente a la longitud del mensaje
+(hasta LIMITS['max_message_length']) comparando la predicción directa, que el
+modelo trunca a su longitud máxima, con el análisis por ventanas solapadas en
+una sola pasada. Los mensajes empiezan en tono positivo y terminan en tono
+negativo, así que la columna de etiquetas muestra lo que la truncación pierde.
+Requiere pysentimiento.
+
+Uso:
+    python benchmarks/bench_sentiment_windows.py [--longitudes 50,100,250,500,750,1000] [--repeticiones 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config import LIMITS  # noqa: E402
+
+POSITIVO = "Me encanta este chatbot, las explicaciones sobre el espacio son geniales y muy claras. "
+NEGATIVO = "Pero hoy todo va fatal, las respuestas son horribles, lentas y me tienen muy enfadado. "
+
+
+def mensaje(longitud):
+    """Mensaje de `longitud` caracteres: la primera mitad positiva y la segunda negativa."""
+    mitad = longitud // 2
+    texto = (POSITIVO * (mitad // len(POSITIVO) + 1))[:mitad]
+    texto += (NEGATIVO * ((longitud - mitad) // len(NEGATIVO) + 1))[:longitud - mitad]
+    return texto.strip()
+
+
+def medir(funcion, texto, repeticiones):
+    """Mediana (ms) de `repeticiones` llamadas y el último resultado."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(texto)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del análisis de sentimiento por ventanas")
+    parser.add_argument('--longitudes', default=f"50,100,250,500,750,{LIMITS['max_message_length']}",
+                        help="Longitudes de mensaje en caracteres, separadas por comas")
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    print("=== Benchmark de Sentimiento por Ventanas ===\n")
+
+    from sentiment_analyzer import SentimentAnalyzer
+    analizador = SentimentAnalyzer()
+    if not analizador.enabled:
+        print("❌ pysentimiento no está disponible")
+        return
+
+    tokenizer = analizador.analyzer.tokenizer
+    analizador.analyze("calentamiento")
+    print(f"{'caracteres':>10} {'tokens':>7} {'ventanas':>9} {'truncado ms':>12} {'ventanas ms':>12}  etiqueta (truncado → ventanas)")
+    for longitud in (int(n) for n in args.longitudes.split(',')):
+        texto = mensaje(longitud)
+        tokens = len(tokenizer(texto, add_special_tokens=False)['input_ids'])
+        ms_truncado, truncado = medir(analizador.analyzer.predict, texto, args.repeticiones)
+        # _analizar evita la coalescencia: cada repetición ejecuta el modelo
+        ms_ventanas, resultado = medir(analizador._analizar, texto, args.repeticiones)
+        print(f"{longitud:>10} {tokens:>7} {resultado.get('ventanas', 1):>9} {ms_truncado:>12.1f} {ms_ventanas:>12.1f}  "
+              f"{truncado.output} → {resultado['sentimiento']} ({resultado['confianza']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de serialización de respuestas
+Compara, para textos de distinta longitud, el tamaño de la respuesta de
+/analisis por token frente a columnas (sin comprimir, gzip y brotli) y el
+tiempo de serialización con json estándar frente a orjson. Incluye /chat
+completo frente a compacto.
+
+Uso:
+    python benchmarks/bench_serialization.py [--repeticiones 2000]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from response_encoding import (  # noqa: E402
+    BROTLI_AVAILABLE, ORJSON_AVAILABLE, analisis_en_columnas, dumps
+)
+
+FRASE = "El telescopio espacial James Webb observa galaxias lejanas con gran detalle"
+ETIQUETAS = ['DET', 'NOUN', 'ADJ', 'PROPN', 'PROPN', 'VERB', 'NOUN', 'ADJ', 'ADP', 'ADJ', 'NOUN']
+
+
+def analisis_sintetico(palabras):
+    """Análisis con la forma de analizar_texto para `palabras` tokens."""
+    base = FRASE.split()
+    return [{
+        'texto': base[i % len(base)], 'lema': base[i % len(base)].lower(),
+        'pos': ETIQUETAS[i % len(ETIQUETAS)], 'tag': ETIQUETAS[i % len(ETIQUETAS)],
+        'dependencia': 'nsubj' if i % 3 == 0 else 'obj'
+    } for i in range(palabras)]
+
+
+def tamanos(cuerpo):
+    fila = [len(cuerpo), len(gzip.compress(cuerpo, 5))]
+    if BROTLI_AVAILABLE:
+        import brotli
+        fila.append(len(brotli.compress(cuerpo, quality=4)))
+    return fila
+
+
+def tiempo(funcion, datos, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(datos)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=2000)
+    args = parser.parse_args()
+
+    print("=== Benchmark de Serialización de Respuestas ===\n")
+    print(f"orjson: {'✅' if ORJSON_AVAILABLE else '❌'} | brotli: {'✅' if BROTLI_AVAILABLE else '❌'}\n")
+
+    estandar = lambda d: json.dumps(d, ensure_ascii=False).encode('utf-8')  # noqa: E731
+    columnas_br = ' / br' if BROTLI_AVAILABLE else ''
+    print(f"/analisis: bytes (crudo / gzip{columnas_br}) y µs de serialización\n")
+    for palabras in (10, 100, 1000):
+        analisis = analisis_sintetico(palabras)
+        por_token = {'analisis': analisis}
+        columnas = {'formato': 'columnas', 'analisis': analisis_en_columnas(analisis)}
+        print(f"{palabras:>5} tokens | por token: {' / '.join(map(str, tamanos(estandar(por_token))))} "
+              f"| columnas: {' / '.join(map(str, tamanos(dumps(columnas))))}")
+        print(f"{'':>5}        | json: {tiempo(estandar, por_token, args.repeticiones):8.1f} µs "
+              f"| dumps: {tiempo(dumps, por_token, args.repeticiones):8.1f} µs "
+              f"| dumps columnas: {tiempo(dumps, columnas, args.repeticiones):8.1f} µs")
+
+    completo = {
+        'session_id': 'e1f3c5d2-7a9b-4c1e-8f2d-3b6a9c0d1e2f',
+        'respuesta': "**Telescopio Espacial James Webb** 🔭\n\nEl James Webb es el telescopio más potente...",
+        'tema_actual': 'Exploración Espacial', 'estado_conversacion': 'activo',
+        'temas_discutidos': ['Inteligencia Artificial', 'Exploración Espacial', 'Medicina y Biotecnología'],
+        'num_mensajes': 42, 'intencion': 'espacio.webb',
+        'resumen_temas': {'espacio': 20, 'ia': 15, 'medicina': 7},
+        'sentimiento': {'tipo': 'positivo', 'confianza': 91.3},
+    }
+    compacto = {k: completo[k] for k in ('respuesta', 'intencion', 'tema_actual', 'sentimiento')}
+    print(f"\n/chat: completo {len(estandar(completo))} bytes | compacto {len(dumps(compacto))} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark del almacén de sesiones
+Mide el tamaño serializado de un estado y la latencia de carga/guardado
+en memoria y en Redis (servidor real con --redis-url o fakeredis si está instalado)
+
+Uso:
+    python benchmarks/bench_sessions.py [--redis-url redis://localhost:6379/0]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from conversation_history import HistorialConversacion  # noqa: E402
+from session_store import (  # noqa: E402
+    MemorySessionStore, RedisSessionStore, nuevo_estado, serializar_estado
+)
+
+SESIONES = 200
+REPETICIONES = 5
+
+
+def estado_lleno(turnos=50):
+    """Estado con el historial completo, el peor caso de tamaño."""
+    estado = nuevo_estado()
+    estado['saludo'] = True
+    estado['ultimo_tema'] = 'Exploración Espacial'
+    estado['temas_discutidos'] = ['ia', 'espacio', 'medicina']
+    estado['contador_mensajes'] = turnos
+    estado['historial'] = HistorialConversacion(turnos)
+    for i in range(turnos):
+        estado['historial'].agregar(f"háblame del telescopio james webb, pregunta {i}",
+                                    'espacio.webb', 'POS')
+    return estado
+
+
+def medir_store(nombre, store, estado):
+    ids = [f"bench-{i}" for i in range(SESIONES)]
+
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        for sid in ids:
+            store.guardar(sid, estado)
+            store.cargar(sid)
+    individual = (time.perf_counter() - inicio) / (REPETICIONES * SESIONES) * 1e6
+
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        store.guardar_varias({sid: estado for sid in ids})
+        store.cargar_varias(ids)
+    agrupado = (time.perf_counter() - inicio) / (REPETICIONES * SESIONES) * 1e6
+
+    print(f"{nombre:<10} guardar+cargar: {individual:8.1f} µs/sesión | "
+          f"con pipeline: {agrupado:8.1f} µs/sesión")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--redis-url', help="Servidor Redis real (por defecto fakeredis)")
+    args = parser.parse_args()
+
+    print("=== Benchmark del Almacén de Sesiones ===\n")
+    estado = estado_lleno()
+
+    compacto = serializar_estado(estado)
+    historial = estado['historial']
+    ingenuo = json.dumps(
+        dict(estado, historial=[t.to_dict() for t in historial]), ensure_ascii=False, indent=2
+    ).encode('utf-8')
+    print(f"Estado con 50 turnos: {len(compacto)} bytes (JSON con dicts por turno: {len(ingenuo)} bytes)\n")
+
+    medir_store("memoria", MemorySessionStore(), estado)
+
+    if args.redis_url:
+        medir_store("redis", RedisSessionStore(url=args.redis_url), estado)
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            print("⚠️ fakeredis no instalado y sin --redis-url: se omite Redis")
+            return
+        medir_store("fakeredis", RedisSessionStore(client=fakeredis.FakeRedis()), estado)
+
+
+if __name__ == "__main__":
+    main()
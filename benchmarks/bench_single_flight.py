@@ -0,0 +1,113 @@
+"""
+Benchmark de la coalescencia single-flight
+Simula ráfagas en las que muchas sesiones envían el mismo mensaje a la vez
+(p. ej. el mismo tema sugerido) contra un modelo de latencia fija, con y sin
+coalescencia, y mide inferencias ejecutadas, throughput y p95. Con
+pysentimiento instalado usa además SentimentAnalyzer real.
+
+Uso:
+    python benchmarks/bench_single_flight.py [--hilos 32] [--rafagas 20] [--distintos 3] [--latencia-ms 50]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from single_flight import SingleFlight, normalizar_clave  # noqa: E402
+
+MENSAJES = [
+    "háblame de inteligencia artificial",
+    "¿qué hay de nuevo en el James Webb?",
+    "explícame la fusión nuclear",
+    "quiero saber sobre CRISPR",
+    "noticias de computación cuántica",
+]
+
+
+class ModeloSimulado:
+    """Inferencia con latencia fija; el lock imita un modelo que no admite llamadas paralelas."""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.inferencias = 0
+        self._lock = threading.Lock()
+
+    def analyze(self, texto):
+        with self._lock:
+            self.inferencias += 1
+            time.sleep(self.latencia)
+            return {'sentimiento': 'NEU', 'confianza': 0.9}
+
+
+def rafagas(funcion, hilos, n_rafagas, distintos):
+    """Lanza n_rafagas ráfagas de `hilos` llamadas simultáneas con `distintos` mensajes."""
+    latencias = []
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        for _ in range(n_rafagas):
+            barrera = threading.Barrier(hilos)
+
+            def llamada(i):
+                barrera.wait()
+                t = time.perf_counter()
+                funcion(MENSAJES[i % distintos])
+                return time.perf_counter() - t
+
+            latencias.extend(ejecutor.map(llamada, range(hilos)))
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        'llamadas_por_s': len(latencias) / duracion,
+        'p95_ms': latencias[int(len(latencias) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la coalescencia single-flight")
+    parser.add_argument('--hilos', type=int, default=32, help="Llamadas simultáneas por ráfaga")
+    parser.add_argument('--rafagas', type=int, default=20)
+    parser.add_argument('--distintos', type=int, default=3, help="Mensajes distintos por ráfaga")
+    parser.add_argument('--latencia-ms', type=float, default=50, help="Latencia del modelo simulado")
+    args = parser.parse_args()
+    args.distintos = max(1, min(args.distintos, len(MENSAJES)))
+
+    print("=== Benchmark de Coalescencia Single-Flight ===\n")
+    print(f"{args.rafagas} ráfagas × {args.hilos} llamadas, {args.distintos} mensajes distintos, "
+          f"modelo de {args.latencia_ms:.0f} ms\n")
+
+    resultados = {}
+    for nombre, habilitado in [("sin coalescencia", False), ("con coalescencia", True)]:
+        modelo = ModeloSimulado(args.latencia_ms / 1000)
+        vuelos = SingleFlight('bench', timeout=60, habilitado=habilitado)
+        medida = rafagas(
+            lambda texto: vuelos.ejecutar(normalizar_clave(texto), modelo.analyze, texto),
+            args.hilos, args.rafagas, args.distintos
+        )
+        resultados[nombre] = medida
+        print(f"{nombre:<18} inferencias: {modelo.inferencias:5d} | "
+              f"{medida['llamadas_por_s']:8.1f} llamadas/s | p95 {medida['p95_ms']:8.1f} ms")
+        if habilitado:
+            print(f"{'':<18} {vuelos.estadisticas()}")
+
+    try:
+        from sentiment_analyzer import SentimentAnalyzer, _vuelos_sentimiento
+        analizador = SentimentAnalyzer()
+        if analizador.enabled:
+            analizador.analyze("calentamiento")
+            medida = rafagas(analizador.analyze, args.hilos, max(1, args.rafagas // 4), args.distintos)
+            print(f"\npysentimiento: {medida['llamadas_por_s']:.1f} llamadas/s | p95 {medida['p95_ms']:.1f} ms | "
+                  f"{_vuelos_sentimiento.estadisticas()}")
+    except ImportError:
+        pass
+
+    mejora = resultados["con coalescencia"]['llamadas_por_s'] / resultados["sin coalescencia"]['llamadas_por_s']
+    print(f"\n{'✅' if mejora > 1 else '❌'} Throughput con coalescencia: ×{mejora:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark de hilos: peticiones concurrentes × hilos intra-op de torch
+Para cada combinación lanza un proceso nuevo (los hilos de torch se fijan
+antes de importarlo) con N hilos de petición que analizan sentimiento, y
+mide throughput y p95. Sin pysentimiento usa una carga sintética de torch
+del tamaño de una capa de un encoder base. Al final recomienda TORCH_THREADS
+para cada nivel de concurrencia en esta máquina.
+
+Uso:
+    python benchmarks/bench_threads.py [--peticiones 1,2,4,8] [--hilos 1,2,4] [--mensajes 40]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Se ejecuta en un proceso nuevo con TORCH_THREADS ya fijado en el entorno
+CARGA = """
+import json, sys, threading, time
+import config
+peticiones, mensajes = int(sys.argv[1]), int(sys.argv[2])
+try:
+    from sentiment_analyzer import SentimentAnalyzer
+    analizador = SentimentAnalyzer()
+    assert analizador.enabled
+    tarea = lambda: analizador.analyze("Me encanta aprender sobre inteligencia artificial y el espacio")
+    carga = 'pysentimiento'
+except Exception:
+    import torch
+    config.apply_concurrency_settings()
+    x, w = torch.randn(64, 768), torch.randn(768, 3072)
+    tarea = lambda: torch.relu(x @ w) @ w.T
+    carga = 'sintetica'
+tarea()
+latencias = []
+def worker():
+    for _ in range(mensajes):
+        t0 = time.perf_counter()
+        tarea()
+        latencias.append(time.perf_counter() - t0)
+hilos = [threading.Thread(target=worker) for _ in range(peticiones)]
+inicio = time.perf_counter()
+for h in hilos: h.start()
+for h in hilos: h.join()
+total = time.perf_counter() - inicio
+latencias.sort()
+print(json.dumps({'carga': carga, 'throughput': len(latencias) / total,
+                  'p95_ms': latencias[int(len(latencias) * 0.95) - 1] * 1000}))
+"""
+
+
+def medir(peticiones, hilos, mensajes):
+    entorno = dict(os.environ, TORCH_THREADS=str(hilos), OMP_NUM_THREADS=str(hilos),
+                   MKL_NUM_THREADS=str(hilos), TOKENIZERS_PARALLELISM='false')
+    salida = subprocess.run([sys.executable, '-c', CARGA, str(peticiones), str(mensajes)],
+                            cwd=RAIZ, env=entorno, capture_output=True, text=True)
+    lineas = salida.stdout.strip().splitlines()
+    try:
+        return json.loads(lineas[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def main():
+    nucleos = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--peticiones', default='1,2,4,8', help="Hilos de petición a probar")
+    parser.add_argument('--hilos', default=','.join(str(h) for h in sorted({1, 2, max(1, nucleos // 2), nucleos})),
+                        help="Hilos intra-op de torch a probar")
+    parser.add_argument('--mensajes', type=int, default=40, help="Mensajes por hilo de petición")
+    args = parser.parse_args()
+
+    print("=== Benchmark de Hilos (peticiones × torch) ===\n")
+    print(f"Núcleos: {nucleos}\n")
+
+    recomendaciones = {}
+    for peticiones in [int(p) for p in args.peticiones.split(',')]:
+        for hilos in [int(h) for h in args.hilos.split(',')]:
+            resultado = medir(peticiones, hilos, args.mensajes)
+            if resultado is None:
+                print("❌ No se pudo ejecutar la carga (¿torch instalado?)")
+                return
+            print(f"peticiones {peticiones:>2} × torch {hilos:>2} [{resultado['carga']}]: "
+                  f"{resultado['throughput']:8.1f} análisis/s | p95 {resultado['p95_ms']:8.1f} ms")
+            mejor = recomendaciones.get(peticiones)
+            if mejor is None or resultado['throughput'] > mejor[1]['throughput']:
+                recomendaciones[peticiones] = (hilos, resultado)
+        print()
+
+    print("Recomendación (máximo throughput por nivel de concurrencia):")
+    for peticiones, (hilos, resultado) in recomendaciones.items():
+        print(f"  {peticiones:>2} peticiones simultáneas → TORCH_THREADS={hilos} "
+              f"({resultado['throughput']:.1f} análisis/s, p95 {resultado['p95_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Prueba de resistencia (soak) de memoria de backend.py
+Arranca un backend local (o usa uno ya arrancado con --url), le envía
+tráfico de /chat durante el tiempo indicado repartido entre muchas sesiones
+y muestrea su RSS. Tras el calentamiento (modelos cargados, cachés llenas)
+el RSS no debería seguir creciendo: la prueba falla (código de salida 1) si
+crece más de --umbral-mb. Con --trazar el backend se arranca con DEBUG_MODE
+y tracemalloc, y al fallar se muestran los sitios de asignación de
+/debug/memory que más han crecido.
+
+Uso:
+    python benchmarks/soak_memory.py [--minutos 180] [--calentamiento 5] [--umbral-mb 50] [--hilos 8]
+    python benchmarks/soak_memory.py --mensajes conversaciones.jsonl --campo texto --trazar
+    python benchmarks/soak_memory.py --url http://localhost:5000 --minutos 60   (requiere DEBUG_MODE)
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from replay_cli import leer_mensajes  # noqa: E402
+
+MENSAJES = [
+    "hola", "háblame de inteligencia artificial", "¿qué es el James Webb?", "explícame la fusión nuclear",
+    "quiero saber sobre CRISPR", "noticias de computación cuántica", "¿qué es bitcoin?", "gracias",
+    "me siento muy frustrado con esto", "¡me encanta la astronomía!", "¿quién eres?", "ayuda",
+    "cuéntame sobre los robots", "¿cómo funcionan las baterías?", "adiós",
+]
+
+
+def rss_mb(pid):
+    """RSS de un proceso en MiB (Linux /proc o psutil)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 2**20
+    except Exception:
+        return 0.0
+
+
+def pedir(url, datos=None, timeout=30):
+    """GET (o POST JSON si hay datos); devuelve (código, JSON o None si no lo es)."""
+    cuerpo = json.dumps(datos).encode('utf-8') if datos is not None else None
+    peticion = urllib.request.Request(url, data=cuerpo, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(peticion, timeout=timeout) as respuesta:
+            codigo, cuerpo = respuesta.status, respuesta.read()
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except (urllib.error.URLError, OSError):
+        return None, None
+    try:
+        return codigo, json.loads(cuerpo)
+    except ValueError:
+        return codigo, None
+
+
+def arrancar_backend(puerto, trazar, directorio):
+    """Lanza backend.py en un proceso aparte y espera a que responda."""
+    entorno = dict(os.environ, AUDIT_LOG_PATH=os.path.join(directorio, 'conversaciones.jsonl'))
+    if trazar:
+        entorno.update(DEBUG_MODE='true', MEMORY_TRACING='true')
+    codigo = f"from backend import app; app.run(port={puerto}, threaded=True, use_reloader=False)"
+    proceso = subprocess.Popen([sys.executable, '-c', codigo], cwd=RAIZ, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 120
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"backend.py terminó al arrancar (código {proceso.returncode})")
+        if pedir(url + '/', timeout=2)[0] == 200:
+            return proceso, url
+        time.sleep(0.5)
+    proceso.kill()
+    raise RuntimeError("backend.py no respondió en 120 s")
+
+
+def pendiente_mb_hora(muestras):
+    """Pendiente por mínimos cuadrados (MiB/hora) de [(segundos, MiB)]."""
+    if len(muestras) < 2:
+        return 0.0
+    media_t = statistics.fmean(t for t, _ in muestras)
+    media_m = statistics.fmean(m for _, m in muestras)
+    varianza = sum((t - media_t) ** 2 for t, _ in muestras)
+    if not varianza:
+        return 0.0
+    return sum((t - media_t) * (m - media_m) for t, m in muestras) / varianza * 3600
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de resistencia de memoria de backend.py")
+    parser.add_argument('--minutos', type=float, default=180, help="Duración total (incluido el calentamiento)")
+    parser.add_argument('--calentamiento', type=float, default=5, help="Minutos antes de fijar la referencia")
+    parser.add_argument('--umbral-mb', type=float, default=50, help="Crecimiento máximo del RSS tras el calentamiento")
+    parser.add_argument('--hilos', type=int, default=8, help="Clientes simultáneos")
+    parser.add_argument('--sesiones', type=int, default=2000, help="Sesiones distintas entre las que se reparte el tráfico")
+    parser.add_argument('--muestreo', type=float, default=30, help="Segundos entre muestras de RSS")
+    parser.add_argument('--mensajes', help="Archivo JSONL o CSV con los mensajes a reproducir")
+    parser.add_argument('--campo', default='mensaje', help="Campo del mensaje en el archivo")
+    parser.add_argument('--url', help="Backend ya arrancado (el RSS se lee de /debug/memory)")
+    parser.add_argument('--puerto', type=int, default=5077)
+    parser.add_argument('--trazar', action='store_true', help="Arrancar el backend con DEBUG_MODE y tracemalloc")
+    args = parser.parse_args()
+
+    print("=== Soak de Memoria del Backend ===\n")
+
+    mensajes = [m for _, m in leer_mensajes(args.mensajes, args.campo) if m] if args.mensajes else MENSAJES
+    if not mensajes:
+        print("❌ No hay mensajes que reproducir")
+        return 1
+
+    directorio = tempfile.mkdtemp()
+    proceso = None
+    if args.url:
+        url = args.url.rstrip('/')
+        def medir_rss():
+            return (pedir(url + '/debug/memory')[1] or {}).get('rss_mb', 0.0)
+        if not medir_rss():
+            print("❌ /debug/memory no responde: arranca el backend con DEBUG_MODE=true")
+            return 1
+    else:
+        proceso, url = arrancar_backend(args.puerto, args.trazar, directorio)
+        def medir_rss():
+            return rss_mb(proceso.pid)
+
+    print(f"{len(mensajes)} mensajes distintos | {args.sesiones} sesiones | {args.hilos} clientes | "
+          f"{args.minutos:g} min ({args.calentamiento:g} de calentamiento) | umbral {args.umbral_mb:g} MiB\n")
+
+    detener = threading.Event()
+    contadores = {'peticiones': 0, 'errores': 0, 'limitadas': 0}
+    lock = threading.Lock()
+    secuencia = itertools.count()
+
+    def cliente(_):
+        while not detener.is_set():
+            n = next(secuencia)
+            codigo, _ = pedir(url + '/chat', {
+                'mensaje': mensajes[n % len(mensajes)],
+                'session_id': f"soak-{n % args.sesiones}",
+                'compacto': True,
+            })
+            with lock:
+                contadores['peticiones'] += 1
+                if codigo == 429:
+                    contadores['limitadas'] += 1
+                elif codigo != 200:
+                    contadores['errores'] += 1
+
+    inicio = time.monotonic()
+    fin = inicio + args.minutos * 60
+    fin_calentamiento = inicio + args.calentamiento * 60
+    muestras = []  # (segundos desde el final del calentamiento, MiB)
+    referencia = None
+    try:
+        with ThreadPoolExecutor(args.hilos) as ejecutor:
+            for i in range(args.hilos):
+                ejecutor.submit(cliente, i)
+            while time.monotonic() < fin:
+                time.sleep(min(args.muestreo, max(0.0, fin - time.monotonic())))
+                ahora = time.monotonic()
+                rss = medir_rss()
+                if ahora >= fin_calentamiento:
+                    if referencia is None:
+                        referencia = rss
+                    muestras.append((ahora - fin_calentamiento, rss))
+                fase = "calentamiento" if ahora < fin_calentamiento else f"+{rss - referencia:6.1f} MiB"
+                print(f"[{(ahora - inicio) / 60:7.1f} min] RSS {rss:8.1f} MiB ({fase}) | "
+                      f"{contadores['peticiones']} peticiones, {contadores['errores']} errores, "
+                      f"{contadores['limitadas']} limitadas", flush=True)
+            detener.set()
+
+        if len(muestras) < 2:
+            print("\n❌ Sin muestras tras el calentamiento: aumenta --minutos o reduce --calentamiento/--muestreo")
+            return 1
+
+        # El final se toma como la mediana de las últimas muestras para no fallar por un pico puntual
+        final = statistics.median(m for _, m in muestras[-3:])
+        crecimiento = final - referencia
+        duracion = args.minutos - args.calentamiento
+        print(f"\nRSS tras el calentamiento: {referencia:.1f} MiB | final: {final:.1f} MiB | "
+              f"crecimiento: {crecimiento:+.1f} MiB | pendiente: {pendiente_mb_hora(muestras):+.1f} MiB/h "
+              f"en {duracion:g} min")
+        print(f"Peticiones: {contadores['peticiones']} "
+              f"({contadores['peticiones'] / (time.monotonic() - inicio):.1f}/s), "
+              f"errores: {contadores['errores']}, limitadas: {contadores['limitadas']}")
+
+        if crecimiento <= args.umbral_mb:
+            print(f"\n✅ El RSS creció {crecimiento:+.1f} MiB (umbral {args.umbral_mb:g} MiB)")
+            return 0
+
+        print(f"\n❌ El RSS creció {crecimiento:+.1f} MiB (umbral {args.umbral_mb:g} MiB)")
+        _, informe = pedir(url + '/debug/memory?referencia=inicial&top=10')
+        if informe:
+            print(f"Modelos: {informe.get('modelos')}\nSesiones: {informe.get('sesiones')}")
+            for sitio in informe.get('sitios', []):
+                print(f"  {sitio['diferencia_kib']:>10.1f} KiB  {sitio['sitio']}")
+        return 1
+    finally:
+        detener.set()
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import nltk
-import spacy
+
+from routing_keywords import (
+    PALABRAS_SALUDO, PALABRAS_DESPEDIDA, PALABRAS_ANIMO_POSITIVO, PALABRAS_ANIMO_NEGATIVO,
+    PALABRAS_AGRADECIMIENTO, PALABRAS_IDENTIDAD, PALABRAS_AYUDA,
+    PALABRAS_IA, PALABRAS_ESPACIO, PALABRAS_COMPUTACION, PALABRAS_MEDICINA,
+    PALABRAS_ENERGIA, PALABRAS_BLOCKCHAIN, PALABRAS_NOTICIAS, PALABRAS_FUERA_TEMA,
+    CATEGORIAS_TEMA, VOCABULARIO_ENRUTAMIENTO, PALABRAS_NO_CORREGIBLES, PALABRAS_CONVERSACIONALES
+)
+from fuzzy_matcher import IndiceDifuso, crear_verificador_palabras
+from lemma_matcher import LematizadorEnrutamiento
+from conversation_history import HistorialConversacion
+from rate_limiter import ConcurrencyLimiter
+from model_lifecycle import get_lifecycle_manager, uso_modelo
+from intent_metrics import crear_metricas, es_fallback
+from sentiment_analyzer import SentimientoDiferido
+from mode_controller import etapas_de_modo
+from log_pipeline import obtener_logger
+from memory_diagnostics import get_memory_diagnostics
+
+logger = obtener_logger(__name__)
 
 # Importar módulos personalizados
 try:
@@ -7,22 +29,24 @@ try:
     SENTIMENT_AVAILABLE = True
 except ImportError:
     SENTIMENT_AVAILABLE = False
-    print("⚠️ Módulo de sentimientos no disponible")
-
-try:
-    from llm_module import get_gemma_llm
-    LLM_AVAILABLE = True
-except ImportError:
-    LLM_AVAILABLE = False
-    print("⚠️ Módulo LLM no disponible")
+    logger.warning("⚠️ Módulo de sentimientos no disponible")
 
 try:
-    from config import SENTIMENT_CONFIG, LLM_CONFIG, CHATBOT_CONFIG
+    from config import (
+        SENTIMENT_CONFIG, LLM_CONFIG, CHATBOT_CONFIG, FUZZY_CONFIG, LEMMA_CONFIG, LIMITS, CONCURRENCY_CONFIG,
+        LOG_CONFIG
+    )
 except ImportError:
     # Configuración por defecto si no existe config.py
-    SENTIMENT_CONFIG = {'enabled': True, 'min_confidence': 0.6, 'adapt_tone': True}
+    SENTIMENT_CONFIG = {'enabled': True, 'min_confidence': 0.6, 'adapt_tone': True, 'lazy': True, 'speculative': False}
     LLM_CONFIG = {'enabled': False, 'use_for_enhancement': False}
     CHATBOT_CONFIG = {'nombre': 'SciTech Bot', 'version': '3.0'}
+    FUZZY_CONFIG = {'enabled': True, 'max_edit_distance': 2, 'min_token_length': 5, 'long_token_length': 8,
+                    'short_token_length': 6, 'dictionary_min_zipf': 3.0}
+    LEMMA_CONFIG = {'enabled': True, 'mode': 'tabla', 'spacy_model': 'es_core_news_sm', 'cache_size': 50000}
+    LIMITS = {'max_concurrent_llm': 2}
+    CONCURRENCY_CONFIG = {'spacy_n_process': 1, 'spacy_batch_size': 64}
+    LOG_CONFIG = {'log_sentiments': False}
 
 # Descargar recursos de NLTK si es necesario
 try:
@@ -35,30 +59,141 @@ try:
 except LookupError:
     nltk.download('wordnet')
 
-nlp = spacy.load("es_core_news_sm")
+# Pipeline de spaCy: se carga con el primer análisis (ver obtener_nlp)
+nlp = None
+
+try:
+    from model_server import servidor_habilitado, obtener_cliente
+except ImportError:
+    servidor_habilitado = lambda: False
 
 # Inicializar analizador de sentimientos si está disponible
 sentiment_analyzer = None
 if SENTIMENT_AVAILABLE and SENTIMENT_CONFIG.get('enabled', False):
     sentiment_analyzer = get_sentiment_analyzer()
-    print("✅ Análisis de sentimientos activado")
+    logger.info("✅ Análisis de sentimientos activado")
+
+# Hilos para el análisis de sentimiento especulativo (se lanza en paralelo al enrutado)
+ejecutor_sentimiento = None
+if sentiment_analyzer and SENTIMENT_CONFIG.get('speculative', False):
+    ejecutor_sentimiento = ThreadPoolExecutor(
+        max_workers=SENTIMENT_CONFIG.get('speculative_workers', 2), thread_name_prefix='sentimiento'
+    )
 
-# Inicializar LLM si está disponible (sin cargar el modelo aún)
+# Inicializar LLM si está disponible (sin cargar el modelo aún).
+# llm_module solo se importa en modo LLM; torch y transformers, al cargar el modelo
 llm_model = None
-if LLM_AVAILABLE and LLM_CONFIG.get('enabled', False):
-    llm_model = get_gemma_llm(auto_load=LLM_CONFIG.get('auto_load', False))
-    print("✅ Módulo LLM disponible")
+if LLM_CONFIG.get('enabled', False):
+    try:
+        from llm_module import get_gemma_llm
+        llm_model = get_gemma_llm(auto_load=LLM_CONFIG.get('auto_load', False))
+        logger.info("✅ Módulo LLM disponible")
+    except ImportError:
+        logger.warning("⚠️ Módulo LLM no disponible")
+
+# Cobertura de intenciones: conteos, latencia y palabras de los mensajes sin coincidencia
+metricas_intenciones = crear_metricas(VOCABULARIO_ENRUTAMIENTO)
+
+# Tope global de generaciones LLM simultáneas (el exceso recibe la respuesta base)
+limitador_llm = ConcurrencyLimiter(LIMITS.get('max_concurrent_llm', 2))
+
+# Variantes de las palabras clave (plural, género, tildes) -> palabra clave
+lematizador = None
+if LEMMA_CONFIG.get('enabled', False):
+    lematizador = LematizadorEnrutamiento(
+        VOCABULARIO_ENRUTAMIENTO,
+        usar_spacy=LEMMA_CONFIG.get('mode') == 'spacy',
+        modelo_spacy=LEMMA_CONFIG.get('spacy_model', 'es_core_news_sm'),
+        cache_size=LEMMA_CONFIG.get('cache_size', 50000)
+    )
+
+# Índice de corrección tipográfica sobre las palabras clave (se construye una vez)
+indice_difuso = None
+if FUZZY_CONFIG.get('enabled', False):
+    indice_difuso = IndiceDifuso(
+        VOCABULARIO_ENRUTAMIENTO,
+        max_edit_distance=FUZZY_CONFIG.get('max_edit_distance', 2),
+        min_token_length=FUZZY_CONFIG.get('min_token_length', 5),
+        long_token_length=FUZZY_CONFIG.get('long_token_length', 8),
+        short_token_length=FUZZY_CONFIG.get('short_token_length', 6),
+        excluidas=PALABRAS_NO_CORREGIBLES,
+        protegidas=PALABRAS_CONVERSACIONALES,
+        es_palabra=crear_verificador_palabras(
+            FUZZY_CONFIG.get('dictionary_min_zipf', 3.0), adicionales=PALABRAS_NO_CORREGIBLES
+        )
+    )
 
 def obtener_tokens(texto):
     """Tokeniza el texto usando NLTK."""
     return nltk.word_tokenize(texto.lower())
 
+def lematizar_tokens(tokens):
+    """
+    Sustituye plurales, femeninos y formas sin tilde por su palabra clave
+    (planetas -> planeta). Si la lematización está desactivada devuelve los tokens sin cambios.
+    """
+    if lematizador is None:
+        return tokens
+    return lematizador.lematizar_tokens(tokens)
+
+def corregir_tokens(tokens):
+    """
+    Corrige errores tipográficos en los tokens que no coinciden con ninguna palabra clave.
+    Si el índice difuso está desactivado devuelve los tokens sin cambios.
+    """
+    if indice_difuso is None:
+        return tokens
+    return indice_difuso.corregir_tokens(tokens)
+
+def obtener_nlp():
+    """Carga el modelo de spaCy la primera vez que se necesita."""
+    global nlp
+    if nlp is None:
+        import spacy
+        nlp = spacy.load("es_core_news_sm")
+    return nlp
+
+def descargar_nlp():
+    """Libera el modelo de spaCy; obtener_nlp lo recarga en el siguiente análisis."""
+    global nlp
+    nlp = None
+
+# Los modelos pesados se descargan tras un periodo sin uso (ver model_lifecycle)
+gestor_modelos = get_lifecycle_manager()
+gestor_modelos.registrar('spacy', obtener_nlp, descargar_nlp, lambda: nlp is not None)
+if lematizador is not None and lematizador.usar_spacy:
+    gestor_modelos.registrar('spacy_lemas', lematizador._cargar_spacy, lematizador.descargar_spacy,
+                             lematizador.spacy_cargado, bajo_demanda=False)
+
+def _modelos_sentimiento():
+    """Módulos de torch del analizador de sentimientos cargado en este proceso (o None)."""
+    multitarea = getattr(sentiment_analyzer, 'multitarea', None)
+    if multitarea is not None:
+        return [analizador.model for analizador in multitarea.analizadores.values()]
+    return getattr(getattr(sentiment_analyzer, 'analyzer', None), 'model', None)
+
+# Bytes de cada modelo cargado para /debug/memory
+diagnostico_memoria = get_memory_diagnostics()
+diagnostico_memoria.registrar_modelo('spacy', lambda: nlp)
+if lematizador is not None and lematizador.usar_spacy:
+    diagnostico_memoria.registrar_modelo('spacy_lemas', lambda: lematizador._nlp)
+diagnostico_memoria.registrar_modelo('sentimiento', _modelos_sentimiento)
+diagnostico_memoria.registrar_modelo(
+    'llm', lambda: [llm_model.model, llm_model.draft_model] if llm_model is not None and llm_model.model is not None else None
+)
+
 def analizar_texto(texto):
     """
     Devuelve una lista de diccionarios con análisis lingüístico:
     palabra, lema, POS, etiqueta y dependencia.
+    Con el servidor de modelos activado el análisis se ejecuta allí.
     """
-    doc = nlp(texto)
+    if servidor_habilitado():
+        return obtener_cliente().llamar('analisis', texto=texto)
+    return analizar_texto_local(texto)
+
+def _analisis_doc(doc):
+    """Convierte un Doc de spaCy en la lista de diccionarios por token."""
     resultado = []
     for token in doc:
         info_token = {
@@ -71,6 +206,25 @@ def analizar_texto(texto):
         resultado.append(info_token)
     return resultado
 
+def analizar_texto_local(texto):
+    """Análisis lingüístico con el modelo de spaCy de este proceso."""
+    with uso_modelo('spacy'):
+        doc = obtener_nlp()(texto)
+    return _analisis_doc(doc)
+
+def analizar_textos_local(textos):
+    """
+    Análisis lingüístico de varios textos con nlp.pipe, usando los procesos
+    y el tamaño de lote de CONCURRENCY_CONFIG.
+    """
+    with uso_modelo('spacy'):
+        docs = obtener_nlp().pipe(
+            textos,
+            n_process=CONCURRENCY_CONFIG.get('spacy_n_process', 1),
+            batch_size=CONCURRENCY_CONFIG.get('spacy_batch_size', 64)
+        )
+        return [_analisis_doc(doc) for doc in docs]
+
 def validar_mensaje(mensaje):
     """
     Valida que el mensaje sea apropiado y no vacío.
@@ -97,22 +251,13 @@ def obtener_categoria_tema(tokens):
     Identifica la categoría del tema basado en los tokens.
     Retorna: categoria (str) o None
     """
-    categorias = {
-        "ia": ["inteligencia", "artificial", "ia", "ai", "machine", "learning", "chatgpt", "gpt", "robot", "automatización", "algoritmo"],
-        "espacio": ["espacio", "nasa", "astronomía", "planeta", "marte", "luna", "telescopio", "james webb", "webb", "estrella", "galaxia", "spacex"],
-        "computacion": ["cuántica", "quantum", "computación", "ordenador", "procesador", "chip", "semiconductor", "hardware"],
-        "medicina": ["medicina", "salud", "cáncer", "enfermedad", "vacuna", "crispr", "genética", "adn", "gen", "terapia"],
-        "energia": ["energía", "renovable", "solar", "eólica", "fusión", "nuclear", "batería", "clima", "carbono"],
-        "blockchain": ["blockchain", "bitcoin", "criptomoneda", "crypto", "ethereum", "nft", "web3", "metaverso", "realidad", "virtual", "vr", "ar"]
-    }
-    
-    for categoria, palabras_clave in categorias.items():
+    for categoria, palabras_clave in CATEGORIAS_TEMA.items():
         if any(palabra in tokens for palabra in palabras_clave):
             return categoria
     
     return None
 
-def procesar_respuesta(respuesta_base, sentimiento_data=None, usar_llm=False):
+def procesar_respuesta(respuesta_base, sentimiento_data=None, usar_llm=False, contexto=None):
     """
     Procesa y mejora una respuesta base agregando empatía y usando LLM si está disponible.
     
@@ -120,6 +265,7 @@ def procesar_respuesta(respuesta_base, sentimiento_data=None, usar_llm=False):
         respuesta_base (str): Respuesta original
         sentimiento_data (dict): Datos del análisis de sentimiento
         usar_llm (bool): Si usar LLM para mejorar la respuesta
+        contexto (str): Turnos recientes de la conversación para el prompt del LLM
         
     Returns:
         str: Respuesta procesada
@@ -133,28 +279,108 @@ def procesar_respuesta(respuesta_base, sentimiento_data=None, usar_llm=False):
             respuesta_final = mensaje_emp + respuesta_final
     
     # Mejorar con LLM si está disponible y habilitado
-    if usar_llm and llm_model and llm_model.enabled and LLM_CONFIG.get('use_for_enhancement', False):
+    # Un modelo descargado por inactividad cuenta como disponible: se recarga al usarlo
+    llm_disponible = llm_model and (llm_model.enabled or gestor_modelos.disponible('llm'))
+    if usar_llm and llm_disponible and LLM_CONFIG.get('use_for_enhancement', False):
+        # Bajo carga se descarta la mejora en lugar de encolar: la respuesta base es válida
+        if not limitador_llm.intentar():
+            return respuesta_final
         try:
             sentimiento_usuario = sentimiento_data['sentimiento'] if sentimiento_data else 'NEU'
-            respuesta_mejorada = llm_model.mejorar_respuesta(respuesta_final, sentimiento_usuario)
+            respuesta_mejorada = llm_model.mejorar_respuesta(
+                respuesta_final, sentimiento_usuario, contexto=contexto
+            )
             if respuesta_mejorada:
                 respuesta_final = respuesta_mejorada
         except Exception as e:
-            print(f"Error al mejorar con LLM: {e}")
+            logger.error(f"Error al mejorar con LLM: {e}")
+        finally:
+            limitador_llm.liberar()
     
     return respuesta_final
 
-def responder(mensaje, estado):
+def obtener_historial(estado):
+    """Devuelve el historial de la sesión, creándolo si no existe."""
+    historial = estado.get('historial')
+    if historial is None:
+        historial = HistorialConversacion(
+            CHATBOT_CONFIG.get('max_historial', 50),
+            max_caracteres=CHATBOT_CONFIG.get('max_caracteres_historial', 500)
+        )
+        estado['historial'] = historial
+    return historial
+
+def crear_sentimiento(mensaje, sentimiento=None, habilitado=True):
+    """
+    Crea el sentimiento diferido del turno.
+    Con SENTIMENT_CONFIG['lazy'] desactivado se calcula en el acto, como antes.
+
+    Args:
+        mensaje (str): Mensaje del usuario
+        sentimiento (dict): Sentimiento ya calculado o None
+        habilitado (bool): False si el modo efectivo de la petición no incluye sentimiento
+
+    Returns:
+        SentimientoDiferido: Valor que las ramas materializan con valor()
+    """
+    analizador = sentiment_analyzer if habilitado and SENTIMENT_CONFIG.get('enabled', False) else None
+    diferido = SentimientoDiferido(analizador, mensaje, precalculado=sentimiento, ejecutor=ejecutor_sentimiento)
+    if not SENTIMENT_CONFIG.get('lazy', True):
+        diferido.valor()
+    return diferido
+
+def responder(mensaje, estado, sentimiento=None, modo=None):
     """
     Lógica conversacional del chatbot sobre ciencia y tecnología.
     Incluye validación, contexto, análisis de sentimientos y guía inteligente.
+    Cada turno queda registrado en el historial acotado de la sesión.
+    
+    Args:
+        mensaje (str): Mensaje del usuario
+        estado (dict): Estado de la conversación
+        sentimiento (dict): Sentimiento ya calculado (p. ej. en lote); None = analizarlo aquí
+        modo (str): Modo efectivo de esta petición (ver mode_controller); None = el configurado
+    """
+    etapas = etapas_de_modo(modo) if modo else {'sentimiento': True, 'llm': True}
+    historial = obtener_historial(estado)
+    inicio = time.perf_counter()
+    diferido = crear_sentimiento(mensaje, sentimiento, habilitado=etapas['sentimiento'])
+    intencion, respuesta = _generar_respuesta(mensaje, estado, historial, diferido, permitir_llm=etapas['llm'])
+    origen_sentimiento = diferido.cerrar()
+    sentimiento_data = diferido.resultado
+    if metricas_intenciones is not None:
+        metricas_intenciones.registrar(
+            intencion,
+            time.perf_counter() - inicio,
+            obtener_tokens(mensaje) if es_fallback(intencion) else None,
+            sentimiento=origen_sentimiento
+        )
+    if sentimiento_data and LOG_CONFIG.get('log_sentiments', False):
+        logger.info(f"Sentimiento ({origen_sentimiento}): {sentimiento_data['sentimiento']} "
+                    f"{sentimiento_data['confianza']:.2f} | intención {intencion}")
+    estado['ultima_intencion'] = intencion
+    # Solo se expone el sentimiento de este turno, y solo si alguna rama lo calculó
+    estado['analisis_sentimiento'] = sentimiento_data
+    historial.agregar(
+        mensaje,
+        intencion,
+        sentimiento_data['sentimiento'] if sentimiento_data else None
+    )
+    return respuesta
+
+def _generar_respuesta(mensaje, estado, historial, sentimiento, permitir_llm=True):
+    """
+    Enruta el mensaje a la rama correspondiente.
+    El sentimiento (SentimientoDiferido) solo se calcula en las ramas que lo usan;
+    permitir_llm=False (modo efectivo sin LLM) omite la mejora con el LLM.
+    Retorna (intencion, respuesta)
     """
     # Validar mensaje
     es_valido, mensaje_error = validar_mensaje(mensaje)
     if not es_valido:
-        return mensaje_error
+        return 'invalido', mensaje_error
     
-    tokens = obtener_tokens(mensaje)
+    tokens = corregir_tokens(lematizar_tokens(obtener_tokens(mensaje)))
     respuesta = ""
     
     # Inicializar contexto si no existe
@@ -162,36 +388,21 @@ def responder(mensaje, estado):
         estado['ultimo_tema'] = None
     if 'temas_discutidos' not in estado:
         estado['temas_discutidos'] = []
-    if 'analisis_sentimiento' not in estado:
-        estado['analisis_sentimiento'] = None
-    
-    # === ANÁLISIS DE SENTIMIENTOS ===
-    sentimiento_data = None
-    mensaje_empatico = ""
-    
-    if sentiment_analyzer and SENTIMENT_CONFIG.get('enabled', False):
-        try:
-            sentimiento_data = sentiment_analyzer.analyze(mensaje)
-            estado['analisis_sentimiento'] = sentimiento_data
-            
-            # Generar mensaje empático si es necesario
-            if SENTIMENT_CONFIG.get('adapt_tone', True):
-                mensaje_emp = sentiment_analyzer.generar_mensaje_empatico(sentimiento_data)
-                if mensaje_emp:
-                    mensaje_empatico = mensaje_emp
-        except Exception as e:
-            print(f"Error en análisis de sentimientos: {e}")
 
     # Saludo inicial obligatorio
     if not estado['saludo']:
-        if any(palabra in tokens for palabra in ["hola", "buenas", "saludos", "hey", "holi", "buenos", "dias", "tardes", "noches"]):
+        if any(palabra in tokens for palabra in PALABRAS_SALUDO):
+            intencion = 'saludo'
             estado['saludo'] = True
             
             # Adaptar saludo según sentimiento
             saludo_base = "¡Hola! 👋 Bienvenido al chatbot de ciencia y tecnología.\n\n"
             
-            if mensaje_empatico and sentimiento_data:
-                saludo_base = mensaje_empatico + saludo_base
+            if SENTIMENT_CONFIG.get('adapt_tone', True):
+                sentimiento_data = sentimiento.valor()
+                mensaje_empatico = sentimiento_data and sentiment_analyzer.generar_mensaje_empatico(sentimiento_data)
+                if mensaje_empatico:
+                    saludo_base = mensaje_empatico + saludo_base
             
             respuesta = (
                 saludo_base +
@@ -205,11 +416,13 @@ def responder(mensaje, estado):
                 "¿Sobre qué tema te gustaría saber más?"
             )
         else:
+            intencion = 'saludo.pendiente'
             respuesta = "¡Hola! 👋 Para comenzar, salúdame y te mostraré cómo puedo ayudarte a explorar el mundo de la ciencia y tecnología."
-        return respuesta
+        return intencion, respuesta
 
     # Despedida
-    if any(palabra in tokens for palabra in ["adios", "chao", "hasta luego", "nos vemos", "bye", "adió"]):
+    if any(palabra in tokens for palabra in PALABRAS_DESPEDIDA):
+        intencion = 'despedida'
         if estado['temas_discutidos']:
             temas = ", ".join(set(estado['temas_discutidos']))
             respuesta = f"¡Adiós! 👋 Me alegró conversar contigo sobre {temas}. Espero que hayas aprendido algo nuevo. ¡Hasta pronto!"
@@ -218,14 +431,16 @@ def responder(mensaje, estado):
         estado['saludo'] = False
         estado['ultimo_tema'] = None
         estado['temas_discutidos'] = []
-        return respuesta
+        return intencion, respuesta
 
     # Estado de ánimo con sugerencias contextuales
-    if any(palabra in tokens for palabra in ["bien", "feliz", "excelente", "contento", "alegre", "genial", "perfecto"]):
+    if any(palabra in tokens for palabra in PALABRAS_ANIMO_POSITIVO):
+        intencion = 'animo.positivo'
         respuesta = "¡Me alegra que estés bien! 😊 ¿Te gustaría conocer alguna noticia científica fascinante o explorar algún avance tecnológico reciente?"
-        return respuesta
+        return intencion, respuesta
     
-    if any(palabra in tokens for palabra in ["mal", "triste", "regular", "cansado", "aburrido"]):
+    if any(palabra in tokens for palabra in PALABRAS_ANIMO_NEGATIVO):
+        intencion = 'animo.negativo'
         respuesta = (
             "Lamento que no estés en tu mejor momento. 💙 Quizás un descubrimiento fascinante te anime.\n"
             "¿Te interesaría saber sobre:\n"
@@ -233,27 +448,30 @@ def responder(mensaje, estado):
             "• Avances en inteligencia artificial 🤖\n"
             "• Nuevas terapias médicas revolucionarias 💊"
         )
-        return respuesta
+        return intencion, respuesta
     
     # Agradecimiento
-    if any(palabra in tokens for palabra in ["gracias", "gracia", "thank", "agradezco"]):
+    if any(palabra in tokens for palabra in PALABRAS_AGRADECIMIENTO):
+        intencion = 'agradecimiento'
         if estado['ultimo_tema']:
             respuesta = f"¡De nada! 😊 Me alegra ayudarte con {estado['ultimo_tema']}. ¿Hay otro tema que te gustaría explorar?"
         else:
             respuesta = "¡De nada! 😊 Estoy aquí para ayudarte. ¿Qué tema de ciencia o tecnología te interesa?"
-        return respuesta
+        return intencion, respuesta
     
     # Preguntas sobre el bot
-    if any(palabra in tokens for palabra in ["quién", "quien", "eres", "qué eres", "que eres", "tu nombre"]):
+    if any(palabra in tokens for palabra in PALABRAS_IDENTIDAD):
+        intencion = 'identidad'
         respuesta = (
             "Soy un chatbot especializado en ciencia y tecnología 🤖. Mi propósito es compartir información "
             "sobre los últimos avances científicos, innovaciones tecnológicas y descubrimientos fascinantes. "
             "¿Sobre qué tema te gustaría aprender hoy?"
         )
-        return respuesta
+        return intencion, respuesta
     
     # Ayuda
-    if any(palabra in tokens for palabra in ["ayuda", "help", "como funciona", "qué puedes", "que puedes"]):
+    if any(palabra in tokens for palabra in PALABRAS_AYUDA):
+        intencion = 'ayuda'
         respuesta = (
             "¡Claro! Puedo ayudarte con estos temas:\n\n"
             "🤖 **IA**: Pregunta sobre ChatGPT, robots, machine learning\n"
@@ -264,7 +482,7 @@ def responder(mensaje, estado):
             "🔗 **Blockchain**: Criptomonedas, NFT, Web3\n\n"
             "Simplemente pregúntame sobre cualquiera de estos temas o pide 'recomendaciones' de noticias."
         )
-        return respuesta
+        return intencion, respuesta
 
     # Identificar categoría del tema
     categoria_actual = obtener_categoria_tema(tokens)
@@ -274,12 +492,10 @@ def responder(mensaje, estado):
             estado['temas_discutidos'].append(categoria_actual)
 
     # Temas de ciencia y tecnología
-    if any(palabra in tokens for palabra in [
-        "inteligencia", "artificial", "ia", "ai", "machine", "learning", "aprendizaje", "automático", "chatgpt", "gpt", 
-        "neural", "robot", "automatización", "deep", "modelo", "algoritmo", "datos", "big data"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_IA):
         estado['ultimo_tema'] = "Inteligencia Artificial"
         if "chatgpt" in tokens or "gpt" in tokens:
+            intencion = 'ia.chatgpt'
             respuesta = (
                 "**ChatGPT y GPT** 🤖\n\n"
                 "Son modelos de lenguaje desarrollados por OpenAI que revolucionaron la IA conversacional. "
@@ -288,6 +504,7 @@ def responder(mensaje, estado):
                 "¿Te gustaría saber sobre otros modelos de IA, aplicaciones prácticas o el futuro de la IA?"
             )
         elif "robot" in tokens or "automatización" in tokens:
+            intencion = 'ia.robotica'
             respuesta = (
                 "**Robótica y Automatización** 🦾\n\n"
                 "La robótica avanza rápidamente: robots humanoides como Optimus de Tesla, robots quirúrgicos de precisión, "
@@ -296,6 +513,7 @@ def responder(mensaje, estado):
                 "¿Quieres profundizar en robots humanoides, médicos o industriales?"
             )
         else:
+            intencion = 'ia.general'
             respuesta = (
                 "**Inteligencia Artificial** 🧠\n\n"
                 "La IA está revolucionando el mundo. Destacan: modelos de lenguaje como GPT-4 y Claude, "
@@ -303,14 +521,12 @@ def responder(mensaje, estado):
                 "vehículos autónomos, y asistentes virtuales avanzados.\n\n"
                 "¿Qué aspecto específico te interesa? (modelos de lenguaje, robótica, IA en medicina, etc.)"
             )
-        return respuesta
+        return intencion, respuesta
 
-    if any(palabra in tokens for palabra in [
-        "espacio", "nasa", "astronomía", "planeta", "marte", "luna", "telescopio", "james webb", "webb", 
-        "estrella", "galaxia", "universo", "spacex", "cohete", "satélite", "agujero negro", "exoplaneta"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_ESPACIO):
         estado['ultimo_tema'] = "Exploración Espacial"
         if "james webb" in tokens or "webb" in tokens:
+            intencion = 'espacio.webb'
             respuesta = (
                 "**Telescopio Espacial James Webb** 🔭\n\n"
                 "El James Webb ha revolucionado la astronomía con imágenes sin precedentes del universo. "
@@ -319,6 +535,7 @@ def responder(mensaje, estado):
                 "¿Te gustaría saber sobre sus últimos descubrimientos o compararlo con el Hubble?"
             )
         elif "marte" in tokens:
+            intencion = 'espacio.marte'
             respuesta = (
                 "**Exploración de Marte** 🔴\n\n"
                 "La exploración de Marte avanza: los rovers Perseverance y Curiosity continúan investigando el planeta rojo, "
@@ -327,6 +544,7 @@ def responder(mensaje, estado):
                 "¿Quieres saber más sobre los rovers, las misiones tripuladas o la búsqueda de vida?"
             )
         elif "spacex" in tokens or "cohete" in tokens:
+            intencion = 'espacio.spacex'
             respuesta = (
                 "**SpaceX y Cohetes Reutilizables** 🚀\n\n"
                 "SpaceX lidera la innovación espacial con sus cohetes reutilizables Falcon 9 y el revolucionario Starship. "
@@ -335,6 +553,7 @@ def responder(mensaje, estado):
                 "¿Te interesa el Starship, Starlink o las misiones lunares Artemis?"
             )
         else:
+            intencion = 'espacio.general'
             respuesta = (
                 "**Astronomía y Exploración Espacial** 🌌\n\n"
                 "La astronomía y exploración espacial viven una era dorada: el James Webb revela el universo primitivo, "
@@ -342,14 +561,12 @@ def responder(mensaje, estado):
                 "y lunas heladas buscan vida.\n\n"
                 "¿Qué tema espacial te fascina más? (telescopios, planetas, misiones, exoplanetas)"
             )
-        return respuesta
+        return intencion, respuesta
 
-    if any(palabra in tokens for palabra in [
-        "cuántica", "quantum", "computación", "ordenador", "supercomputadora", "procesador", "chip", 
-        "semiconductor", "transistor", "informática", "hardware"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_COMPUTACION):
         estado['ultimo_tema'] = "Computación"
         if "cuántica" in tokens or "quantum" in tokens:
+            intencion = 'computacion.cuantica'
             respuesta = (
                 "**Computación Cuántica** ⚛️\n\n"
                 "La computación cuántica promete revolucionar el procesamiento: empresas como IBM, Google, Microsoft y startups "
@@ -358,6 +575,7 @@ def responder(mensaje, estado):
                 "¿Te gustaría entender cómo funcionan los qubits o conocer aplicaciones prácticas?"
             )
         else:
+            intencion = 'computacion.hardware'
             respuesta = (
                 "**Avances en Hardware** 💻\n\n"
                 "Los avances en hardware son impresionantes: chips con arquitectura de 3nm, procesadores con IA integrada, "
@@ -365,14 +583,12 @@ def responder(mensaje, estado):
                 "La Ley de Moore continúa desafiándose con nuevas tecnologías.\n\n"
                 "¿Quieres profundizar en procesadores de IA, chips cuánticos o tecnologías emergentes?"
             )
-        return respuesta
+        return intencion, respuesta
 
-    if any(palabra in tokens for palabra in [
-        "medicina", "salud", "cáncer", "enfermedad", "vacuna", "crispr", "genética", "adn", "gen", 
-        "terapia", "farmaco", "tratamiento", "diagnóstico", "biomedicina", "célula"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_MEDICINA):
         estado['ultimo_tema'] = "Medicina y Biotecnología"
         if "crispr" in tokens or "genética" in tokens or "adn" in tokens or "gen" in tokens:
+            intencion = 'medicina.genetica'
             respuesta = (
                 "**CRISPR y Edición Genética** 🧬\n\n"
                 "CRISPR-Cas9 revoluciona la edición genética: permite corregir mutaciones causantes de enfermedades, "
@@ -381,6 +597,7 @@ def responder(mensaje, estado):
                 "¿Te interesa conocer tratamientos específicos, la ética de CRISPR o aplicaciones en agricultura?"
             )
         elif "cáncer" in tokens:
+            intencion = 'medicina.cancer'
             respuesta = (
                 "**Avances contra el Cáncer** 💊\n\n"
                 "La lucha contra el cáncer avanza: inmunoterapias como CAR-T cells, vacunas personalizadas contra tumores, "
@@ -389,6 +606,7 @@ def responder(mensaje, estado):
                 "¿Quieres saber más sobre inmunoterapias, vacunas personalizadas o métodos de detección temprana?"
             )
         else:
+            intencion = 'medicina.general'
             respuesta = (
                 "**Biomedicina y Avances Médicos** 🏥\n\n"
                 "La biomedicina progresa aceleradamente: terapias génicas, medicina regenerativa con células madre, "
@@ -396,14 +614,12 @@ def responder(mensaje, estado):
                 "y vacunas de ARNm adaptables.\n\n"
                 "¿Qué avance médico te interesa explorar? (terapias génicas, células madre, IA médica)"
             )
-        return respuesta
+        return intencion, respuesta
 
-    if any(palabra in tokens for palabra in [
-        "energía", "renovable", "solar", "eólica", "fusión", "nuclear", "batería", "electricidad", 
-        "sostenible", "clima", "carbono", "emisiones", "calentamiento", "ambiental"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_ENERGIA):
         estado['ultimo_tema'] = "Energía y Clima"
         if "fusión" in tokens or "nuclear" in tokens:
+            intencion = 'energia.fusion'
             respuesta = (
                 "**Fusión Nuclear** ⚡\n\n"
                 "La fusión nuclear es el santo grial energético: en 2022, el NIF logró ganancia neta de energía por primera vez. "
@@ -412,6 +628,7 @@ def responder(mensaje, estado):
                 "¿Quieres entender cómo funciona la fusión o conocer proyectos actuales como ITER?"
             )
         elif "batería" in tokens:
+            intencion = 'energia.baterias'
             respuesta = (
                 "**Tecnología de Baterías** 🔋\n\n"
                 "Las baterías evolucionan: baterías de estado sólido con mayor densidad energética, baterías de sodio más baratas, "
@@ -420,6 +637,7 @@ def responder(mensaje, estado):
                 "¿Te interesa las baterías de estado sólido, almacenamiento en red o vehículos eléctricos?"
             )
         else:
+            intencion = 'energia.renovables'
             respuesta = (
                 "**Energías Renovables y Clima** 🌱\n\n"
                 "Las energías renovables crecen exponencialmente: paneles solares perovskita más eficientes, turbinas eólicas "
@@ -427,14 +645,12 @@ def responder(mensaje, estado):
                 "es imparable para combatir el cambio climático.\n\n"
                 "¿Qué tecnología verde te interesa? (solar, eólica, hidrógeno verde, cambio climático)"
             )
-        return respuesta
+        return intencion, respuesta
 
-    if any(palabra in tokens for palabra in [
-        "blockchain", "bitcoin", "criptomoneda", "crypto", "ethereum", "nft", "web3", "metaverso", 
-        "realidad", "virtual", "aumentada", "vr", "ar", "gafas"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_BLOCKCHAIN):
         estado['ultimo_tema'] = "Blockchain y Web3"
         if "blockchain" in tokens or "bitcoin" in tokens or "criptomoneda" in tokens or "crypto" in tokens:
+            intencion = 'blockchain.cripto'
             respuesta = (
                 "**Blockchain y Criptomonedas** 🔗\n\n"
                 "Blockchain y criptomonedas transforman las finanzas: Bitcoin como oro digital, Ethereum con contratos inteligentes, "
@@ -443,6 +659,7 @@ def responder(mensaje, estado):
                 "¿Te interesa Bitcoin, DeFi, contratos inteligentes o aplicaciones empresariales?"
             )
         elif "realidad" in tokens or "virtual" in tokens or "aumentada" in tokens or "vr" in tokens or "ar" in tokens:
+            intencion = 'blockchain.xr'
             respuesta = (
                 "**Realidad Extendida (XR)** 🥽\n\n"
                 "XR (Realidad Extendida) avanza: Apple Vision Pro y Meta Quest ofrecen experiencias inmersivas, AR para navegación "
@@ -450,18 +667,17 @@ def responder(mensaje, estado):
                 "¿Quieres saber sobre VR gaming, aplicaciones industriales o el futuro del metaverso?"
             )
         else:
+            intencion = 'blockchain.web3'
             respuesta = (
                 "**Web3 y Tecnologías Emergentes** 🌐\n\n"
                 "Web3 y tecnologías emergentes remodelan internet: blockchain descentralizado, metaversos inmersivos, "
                 "NFTs para propiedad digital, identidad descentralizada y nuevos modelos económicos digitales.\n\n"
                 "¿Qué aspecto de Web3 te interesa? (blockchain, NFTs, metaverso, identidad digital)"
             )
-        return respuesta
+        return intencion, respuesta
 
-    if any(palabra in tokens for palabra in [
-        "recomienda", "noticia", "novedad", "descubrimiento", "avance", "innovación", "investigación", 
-        "estudio", "científico", "tecnológico", "reciente", "actual", "último", "últimas"
-    ]):
+    if any(palabra in tokens for palabra in PALABRAS_NOTICIAS):
+        intencion = 'noticias'
         respuesta = (
             "**📰 Noticias destacadas de ciencia y tecnología (2024-2025)**\n\n"
             "🧬 Terapias génicas aprobadas para enfermedades raras\n"
@@ -474,11 +690,11 @@ def responder(mensaje, estado):
             "🧠 Interfaces cerebro-computadora para comunicación\n\n"
             "¿Sobre cuál te gustaría profundizar? Escribe el nombre del tema."
         )
-        return respuesta
+        return intencion, respuesta
     
     # Manejo de preguntas fuera de tema con redirección inteligente
-    palabras_fuera_tema = ["futbol", "fútbol", "deporte", "comida", "musica", "música", "película", "juego", "videojuego"]
-    if any(palabra in tokens for palabra in palabras_fuera_tema):
+    if any(palabra in tokens for palabra in PALABRAS_FUERA_TEMA):
+        intencion = 'fuera_tema'
         respuesta = (
             "Entiendo tu interés, pero me especializo en ciencia y tecnología. 🔬\n\n"
             "Sin embargo, puedo relacionarlo:\n"
@@ -487,28 +703,32 @@ def responder(mensaje, estado):
             "• Si te interesan los videojuegos, puedo contarte sobre **motores gráficos y IA en gaming**\n\n"
             "¿Alguno de estos temas te interesa?"
         )
-        return respuesta
+        return intencion, respuesta
 
     # Conversación genérica con contexto
     if len(tokens) <= 3:
         if estado['ultimo_tema']:
+            intencion = 'fallback.corto.contexto'
             respuesta = (
                 f"Hmm, ¿podrías ser más específico? 🤔\n\n"
                 f"Estábamos hablando de **{estado['ultimo_tema']}**. ¿Quieres continuar con este tema "
                 f"o explorar algo diferente como IA, espacio, medicina o energía?"
             )
         else:
+            intencion = 'fallback.corto'
             respuesta = (
                 "Tu mensaje es muy corto. ¿Podrías ser más específico? 😊\n\n"
                 "Puedo ayudarte con: IA, espacio, medicina, energía, computación o blockchain."
             )
     elif len(tokens) <= 10:
         if estado['ultimo_tema']:
+            intencion = 'fallback.medio.contexto'
             respuesta = (
                 f"¡Interesante! Veo que te interesa **{estado['ultimo_tema']}**.\n\n"
                 f"¿Quieres profundizar más en este tema o explorar otro como IA, espacio, medicina, energía o computación?"
             )
         else:
+            intencion = 'fallback.medio'
             respuesta = (
                 "¡Interesante! 💡 Puedo hablarte sobre:\n"
                 "🤖 Inteligencia Artificial\n"
@@ -521,6 +741,7 @@ def responder(mensaje, estado):
             )
     else:
         if estado['ultimo_tema']:
+            intencion = 'fallback.largo.contexto'
             respuesta = (
                 f"Entiendo tu interés. Basándome en nuestra conversación sobre **{estado['ultimo_tema']}**, "
                 f"puedo darte información más específica.\n\n"
@@ -528,6 +749,7 @@ def responder(mensaje, estado):
                 f"CRISPR, energía, fusión, blockchain, etc.?"
             )
         else:
+            intencion = 'fallback.largo'
             respuesta = (
                 "Puedo ayudarte mejor si usas palabras clave relacionadas con ciencia y tecnología. 🔍\n\n"
                 "Ejemplos: 'ChatGPT', 'James Webb', 'CRISPR', 'fusión nuclear', 'blockchain', 'robótica'\n\n"
@@ -536,10 +758,12 @@ def responder(mensaje, estado):
 
     # === PROCESAMIENTO FINAL DE LA RESPUESTA ===
     # Aplicar análisis de sentimientos y mejora con LLM si están disponibles
+    usar_llm = permitir_llm and LLM_CONFIG.get('use_for_enhancement', False)
     respuesta = procesar_respuesta(
         respuesta,
-        sentimiento_data=sentimiento_data,
-        usar_llm=LLM_CONFIG.get('use_for_enhancement', False)
+        sentimiento_data=sentimiento.valor() if SENTIMENT_CONFIG.get('adapt_tone', True) or usar_llm else None,
+        usar_llm=usar_llm,
+        contexto=historial.como_contexto()
     )
 
-    return respuesta
\ No newline at end of file
+    return intencion, respuesta
\ No newline at end of file
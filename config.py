@@ -4,6 +4,7 @@ Contiene configuraciones para análisis de sentimientos y modelo LLM
 """
 
 import os
+import sys
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -18,6 +19,16 @@ SENTIMENT_CONFIG = {
     'enabled': True,  # Activar/desactivar análisis de sentimientos
     'min_confidence': 0.6,  # Confianza mínima para aplicar respuestas empáticas
     'adapt_tone': True,  # Adaptar tono de respuesta según sentimiento
+    'lazy': True,  # Analizar solo si la rama elegida usa el sentimiento (saludo y respuestas genéricas)
+    'speculative': os.getenv('SENTIMENT_SPECULATIVE', 'False').lower() == 'true',  # Analizar en paralelo al enrutado
+    'speculative_workers': 2,  # Hilos para el análisis especulativo
+    # Mensajes más largos que el modelo (128 tokens): ventanas solapadas en una sola pasada
+    'window_tokens': 120,  # Tokens por ventana (margen para el preprocesado de pysentimiento)
+    'window_overlap': 32,  # Tokens compartidos entre ventanas consecutivas
+    'max_windows': 8,  # Ventanas máximas por mensaje (repartidas por todo el texto)
+    # Tareas adicionales de pysentimiento ('emotion', 'hate_speech') devueltas junto al sentimiento
+    'extra_tasks': [t.strip() for t in os.getenv('SENTIMENT_EXTRA_TASKS', '').split(',') if t.strip()],
+    'task_models': {},  # {tarea: modelo}; cabezas sobre el mismo encoder comparten memoria y pasada
 }
 
 # ========== MODELO LLM (GEMMA) ==========
@@ -26,12 +37,27 @@ LLM_CONFIG = {
     'auto_load': False,  # Cargar modelo al iniciar (consume memoria)
     'model_name': 'google/gemma-2b-it',
     'hf_token': os.getenv('HUGGINGFACE_TOKEN'),  # Token desde variable de entorno
+    # Copia local en safetensors creada con `python start.py --snapshot` (carga sin red ni login)
+    'snapshot_dir': os.getenv('LLM_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'gemma-2b-it')),
+    'snapshot_dtype': os.getenv('LLM_SNAPSHOT_DTYPE', 'auto'),  # 'auto', 'float16', 'bfloat16' o 'float32'
     'generation_params': {
-        'max_length': 250,
+        'max_new_tokens': 250,  # Tokens nuevos (el prompt no cuenta); tope: LIMITS['max_tokens_llm']
         'temperature': 0.7,
         'top_p': 0.9,
+        'stop_strings': ['\nUsuario:', '<end_of_turn>'],  # Cadenas que terminan la respuesta
+        'max_sentences': None,  # Máximo de frases por respuesta (None = sin límite)
+        'stop_on_paragraph': False,  # Parar al terminar el primer párrafo
     },
     'use_for_enhancement': False,  # Usar LLM para mejorar respuestas base
+    'load_on_demand': False,  # Cargar el modelo en el primer uso aunque auto_load sea False
+    'assisted_generation': {
+        # None, 'prompt_lookup' (n-gramas del prompt) o 'draft_model' (modelo borrador pequeño)
+        'mode': os.getenv('LLM_ASSISTED_MODE') or None,
+        'prompt_lookup_num_tokens': 10,  # Tokens candidatos por paso en prompt lookup
+        'draft_model_name': os.getenv('LLM_DRAFT_MODEL'),  # Debe compartir tokenizer con model_name
+        'greedy': True,  # Decodificación voraz en modo asistido (más aceptación)
+        'tasks': ('mejorar_respuesta',),  # Tareas que usan generación asistida
+    },
 }
 
 # ========== MODOS DE OPERACIÓN ==========
@@ -66,15 +92,109 @@ current_mode = MODE_SETTINGS.get(OPERATION_MODE, MODE_SETTINGS['hybrid'])
 SENTIMENT_CONFIG['enabled'] = current_mode['sentiment']
 LLM_CONFIG['enabled'] = current_mode['llm']
 
+# ========== CONTROL ADAPTATIVO DEL MODO ==========
+# OPERATION_MODE es el techo; bajo carga /chat baja a modos con menos etapas (hybrid → basic)
+MODE_CONTROLLER_CONFIG = {
+    'enabled': os.getenv('ADAPTIVE_MODE', 'True').lower() == 'true',
+    'slo_p95_ms': float(os.getenv('CHAT_SLO_P95_MS', '2000')),  # Objetivo de p95 de /chat
+    'max_in_flight': 16,  # Peticiones simultáneas a partir de las que se baja de modo
+    'samples': 200,  # Latencias recientes que se conservan
+    'window_seconds': 30,  # Antigüedad máxima de las latencias que cuentan
+    'min_samples': 20,  # Latencias necesarias para decidir por p95
+    'cooldown_down': 5,  # Segundos mínimos entre dos bajadas
+    'cooldown_up': 30,  # Segundos desde el último cambio antes de volver a subir
+    'recovery_ratio': 0.5,  # Solo se sube si p95 < SLO × este factor (histéresis)
+}
+
 # ========== CONFIGURACIÓN DEL CHATBOT ==========
 CHATBOT_CONFIG = {
     'nombre': 'SciTech Bot',
     'version': '3.0',
     'idioma': 'es',
     'max_historial': 50,  # Máximo de mensajes en historial
+    'max_caracteres_historial': 500,  # Caracteres guardados por mensaje
     'timeout_sesion': 1800,  # 30 minutos en segundos
 }
 
+# ========== ALMACENAMIENTO DE SESIONES ==========
+SESSION_CONFIG = {
+    'backend': os.getenv('SESSION_BACKEND', 'memory'),  # 'memory' o 'redis'
+    'redis_url': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+    'key_prefix': 'scitech:sesion:',
+    'max_connections': 20,  # Tamaño del pool de conexiones a Redis
+    'ttl': CHATBOT_CONFIG['timeout_sesion'],  # Expiración por inactividad
+    'max_caracteres_historial': CHATBOT_CONFIG['max_caracteres_historial'],
+}
+
+# ========== SERVIDOR DE MODELOS ==========
+MODEL_SERVER_CONFIG = {
+    'enabled': os.getenv('MODEL_SERVER', 'False').lower() == 'true',  # Delegar la inferencia
+    # Ruta del socket Unix o 'host:puerto' (TCP local, necesario en Windows)
+    'address': os.getenv('MODEL_SERVER_ADDRESS', '/tmp/scitech_models.sock' if os.name != 'nt' else '127.0.0.1:8765'),
+    'batch_max_size': 16,  # Textos por lote de sentimiento
+    'batch_wait_ms': 5,  # Espera máxima para completar un lote
+    'timeout': 60,  # Segundos de espera por respuesta del servidor
+}
+
+# ========== ENRUTADOR DE SESIONES ==========
+# session_router.py reparte las sesiones entre varios backend.py con hashing consistente
+ROUTER_CONFIG = {
+    # URLs de los nodos separadas por comas
+    'nodes': [n.strip() for n in os.getenv('ROUTER_NODES', 'http://127.0.0.1:5001').split(',') if n.strip()],
+    'host': os.getenv('ROUTER_HOST', '127.0.0.1'),
+    'port': int(os.getenv('ROUTER_PORT', '5000')),
+    'virtual_nodes': 160,  # Puntos de cada nodo en el anillo (más = reparto más uniforme)
+    'health_interval': 2.0,  # Segundos entre comprobaciones de salud de cada nodo
+    'health_timeout': 1.0,  # Segundos de espera de la comprobación
+    'max_failures': 2,  # Fallos seguidos para dar un nodo por caído
+    'timeout': 60,  # Segundos de espera por la respuesta de un nodo
+}
+
+# ========== CICLO DE VIDA DE LOS MODELOS ==========
+LIFECYCLE_CONFIG = {
+    'enabled': os.getenv('MODEL_LIFECYCLE', 'True').lower() == 'true',  # Descargar modelos inactivos
+    'idle_timeout': int(os.getenv('MODEL_IDLE_TIMEOUT', '1800')),  # Segundos sin uso antes de descargar
+    'rss_budget_mb': int(os.getenv('MODEL_RSS_BUDGET_MB', '0')) or None,  # RSS máximo del proceso (None = sin límite)
+    'check_interval': 30,  # Segundos entre revisiones
+    'retry_after': 60,  # Segundos antes de reintentar una carga fallida
+}
+
+# ========== TOLERANCIA A ERRORES TIPOGRÁFICOS ==========
+FUZZY_CONFIG = {
+    'enabled': True,  # Corregir tokens mal escritos antes de enrutar
+    'max_edit_distance': 2,  # Distancia de edición máxima (tokens largos)
+    'min_token_length': 5,  # Tokens más cortos solo coinciden de forma exacta
+    'long_token_length': 8,  # Desde esta longitud se admite la distancia máxima
+    'short_token_length': 6,  # Hasta esta longitud se exige una única candidata a distancia 1
+    'dictionary_min_zipf': 3.0,  # Frecuencia Zipf (wordfreq) desde la que un token es palabra real y no se corrige
+}
+
+# ========== CACHÉ SEMÁNTICA DEL LLM ==========
+SEMANTIC_CACHE_CONFIG = {
+    'enabled': os.getenv('SEMANTIC_CACHE', 'True').lower() == 'true',  # Reutilizar respuestas a preguntas parecidas
+    'threshold': 0.8,  # Similitud mínima (ver benchmarks/bench_semantic_cache.py)
+    'same_words': True,  # Exigir las mismas palabras con contenido ("desventajas" no reutiliza "ventajas")
+    'capacity': 2000,  # Preguntas guardadas (LRU)
+    'dim': 1024,  # Dimensión de los vectores de n-gramas
+    'path': os.getenv('SEMANTIC_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'semantic_cache.npz')),
+    'save_every': 20,  # Inserciones entre guardados en disco
+}
+
+# ========== COALESCENCIA DE PETICIONES ==========
+COALESCING_CONFIG = {
+    'enabled': os.getenv('COALESCING', 'True').lower() == 'true',  # Compartir inferencias idénticas simultáneas
+    'sentiment_timeout': 10,  # Segundos máximos esperando un análisis de sentimiento ajeno
+    'llm_timeout': 120,  # Segundos máximos esperando una generación ajena
+}
+
+# ========== LEMATIZACIÓN DEL ENRUTAMIENTO ==========
+LEMMA_CONFIG = {
+    'enabled': True,  # Reducir plurales, femeninos y tildes a la palabra clave antes de enrutar
+    'mode': os.getenv('LEMMA_MODE', 'tabla'),  # 'tabla' (sin modelo) o 'spacy' (tabla + lemas de spaCy)
+    'spacy_model': 'es_core_news_sm',  # Se carga sin parser ni NER
+    'cache_size': 50000,  # Formas distintas cacheadas
+}
+
 # ========== TEMAS CIENTÍFICOS ==========
 TEMAS_DISPONIBLES = {
     'ia': {
@@ -125,6 +245,51 @@ LOG_CONFIG = {
     'log_sentiments': DEBUG_MODE,
     'log_llm_calls': DEBUG_MODE,
     'log_errors': True,
+    'queue_size': 10000,  # Registros en cola antes de descartar (el hilo que registra nunca espera)
+}
+
+# ========== DIAGNÓSTICO DE MEMORIA ==========
+# /debug/memory (solo con DEBUG_MODE): RSS, bytes por modelo, sesiones y sitios de asignación
+MEMORY_DIAGNOSTICS_CONFIG = {
+    'tracing': os.getenv('MEMORY_TRACING', 'False').lower() == 'true',  # tracemalloc desde el arranque (lento)
+    'frames': 1,  # Marcos de pila por asignación (más marcos = más memoria y más lento)
+    'interval': 300,  # Segundos entre muestras de RSS / instantáneas de tracemalloc
+    'top': 20,  # Sitios de asignación en el informe
+    'session_sample': 200,  # Sesiones medidas para estimar el tamaño del almacén
+}
+
+# ========== AUDITORÍA DE CONVERSACIONES ==========
+# Un registro JSONL por turno de /chat (sesión, intención, sentimiento, latencia; sin el texto).
+# Las sesiones sin session_id (identificadas por la IP) se guardan con un seudónimo
+AUDIT_CONFIG = {
+    'enabled': os.getenv('AUDIT_LOG', 'False').lower() == 'true',
+    # Relativa al directorio del proyecto, no al directorio desde el que se arranca
+    'path': os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         os.getenv('AUDIT_LOG_PATH', os.path.join('logs', 'conversaciones.jsonl'))),
+    # Clave HMAC de los seudónimos de las sesiones identificadas por IP (vacía = aleatoria en cada arranque)
+    'pseudonym_key': os.getenv('AUDIT_LOG_KEY', ''),
+    'max_bytes': 10 * 2**20,  # Tamaño a partir del cual se rota
+    'backups': 5,  # Archivos rotados que se conservan
+    'compress': True,  # gzip de los archivos rotados
+    'batch_size': 200,  # Registros pendientes que fuerzan una escritura
+    'flush_interval': 1.0,  # Segundos máximos entre escrituras
+    'max_pending': 100000,  # Cola máxima en memoria (los registros de más se descartan)
+}
+
+# ========== COMPRESIÓN DE RESPUESTAS ==========
+COMPRESSION_CONFIG = {
+    'enabled': True,  # gzip/brotli según Accept-Encoding
+    'min_bytes': 512,  # No se comprimen respuestas más pequeñas
+    'gzip_level': 5,  # 1 (rápido) - 9 (máxima compresión)
+    'brotli_quality': 4,  # 0 - 11; requiere el paquete brotli
+}
+
+# ========== MÉTRICAS DE INTENCIÓN ==========
+METRICS_CONFIG = {
+    'enabled': True,  # Contar respuestas por intención (coste: unos µs por mensaje)
+    'top_tokens': 20,  # Palabras sin coincidencia que muestra el informe
+    'max_tokens_rastreados': 5000,  # Palabras distintas por hilo antes de podar
+    'intervalo_fusion': 5,  # Segundos que se reutiliza el informe fusionado
 }
 
 # ========== LÍMITES Y RESTRICCIONES ==========
@@ -133,9 +298,60 @@ LIMITS = {
     'min_message_length': 2,
     'max_tokens_llm': 300,
     'rate_limit_messages': 100,  # Mensajes por sesión
+    'rate_limit_window': 60,  # Segundos en los que se recargan rate_limit_messages
+    'rate_limit_ip_messages': 300,  # Mensajes por IP (acota a quien cambia de session_id)
+    'rate_limit_analysis': 600,  # Peticiones de /analisis por IP
+    'rate_limit_max_keys': 10000,  # Sesiones/IPs rastreadas por cada limitador
+    # Proxies cuya X-Forwarded-For se acepta para obtener la IP real (p. ej. session_router.py)
+    'trusted_proxies': [p.strip() for p in os.getenv('TRUSTED_PROXIES', '').split(',') if p.strip()],
+    'max_body_bytes': 8192,  # Cuerpo máximo aceptado (se rechaza antes de parsear JSON)
+    'max_concurrent_llm': 2,  # Generaciones LLM simultáneas; el resto usa la respuesta base
 }
 
 
+# ========== CONCURRENCIA ==========
+# Flask atiende cada petición en su hilo; si además torch usa todos los núcleos
+# por operación, los hilos compiten entre sí. Ver benchmarks/bench_threads.py
+CONCURRENCY_CONFIG = {
+    'torch_threads': int(os.getenv('TORCH_THREADS', '0')) or max(1, (os.cpu_count() or 1) // 2),  # Hilos intra-op
+    'torch_interop_threads': int(os.getenv('TORCH_INTEROP_THREADS', '1')),  # Hilos inter-op
+    'tokenizers_parallelism': os.getenv('TOKENIZERS_PARALLELISM', 'false').lower() == 'true',
+    'spacy_n_process': int(os.getenv('SPACY_N_PROCESS', '1')),  # Procesos de nlp.pipe en lotes
+    'spacy_batch_size': 64,  # Textos por lote en nlp.pipe
+}
+
+_hilos_interop_aplicados = False
+
+
+def apply_concurrency_settings():
+    """
+    Aplica CONCURRENCY_CONFIG. Las variables de entorno se fijan antes de que se
+    importe torch (sin pisar las que ya defina el usuario); si torch ya está
+    importado se ajustan también sus hilos. Es idempotente: llm_module y
+    sentiment_analyzer la vuelven a llamar tras importar torch.
+    """
+    global _hilos_interop_aplicados
+    hilos = str(CONCURRENCY_CONFIG['torch_threads'])
+    os.environ.setdefault('OMP_NUM_THREADS', hilos)
+    os.environ.setdefault('MKL_NUM_THREADS', hilos)
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'true' if CONCURRENCY_CONFIG['tokenizers_parallelism'] else 'false')
+
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return
+    torch.set_num_threads(CONCURRENCY_CONFIG['torch_threads'])
+    if not _hilos_interop_aplicados:
+        _hilos_interop_aplicados = True
+        try:
+            # Solo se puede fijar antes del primer trabajo paralelo inter-op
+            torch.set_num_interop_threads(CONCURRENCY_CONFIG['torch_interop_threads'])
+        except RuntimeError:
+            pass
+
+
+apply_concurrency_settings()
+
+
 def get_config_summary():
     """Retorna un resumen de la configuración actual."""
     return {
@@ -156,6 +372,7 @@ def print_config():
     print(f"Descripción: {current_mode['description']}")
     print(f"Análisis de sentimientos: {'✅ Activado' if SENTIMENT_CONFIG['enabled'] else '❌ Desactivado'}")
     print(f"Modelo LLM: {'✅ Activado' if LLM_CONFIG['enabled'] else '❌ Desactivado'}")
+    print(f"Hilos de torch: {CONCURRENCY_CONFIG['torch_threads']} (inter-op {CONCURRENCY_CONFIG['torch_interop_threads']})")
     print(f"Debug: {'✅' if DEBUG_MODE else '❌'}")
     print("=" * 60)
 
@@ -0,0 +1,240 @@
+"""
+Módulo de historial de conversación por sesión
+Guarda los últimos turnos en un buffer circular de columnas compactas
+(arrays de tipo fijo) para acotar la memoria por sesión
+"""
+
+import time
+from array import array
+from collections import Counter
+
+# Tabla global de intenciones: cada sesión guarda solo el código (2 bytes)
+_INTENCIONES = []
+_CODIGOS_INTENCION = {}
+
+# Códigos de sentimiento (1 byte por turno)
+_SENTIMIENTOS = (None, 'POS', 'NEG', 'NEU')
+_CODIGOS_SENTIMIENTO = {valor: i for i, valor in enumerate(_SENTIMIENTOS)}
+
+# Prefijos de intención que corresponden a temas científicos
+TEMAS_INTENCION = ('ia', 'espacio', 'computacion', 'medicina', 'energia', 'blockchain')
+
+
+def codigo_intencion(intencion):
+    """Devuelve el código numérico de una intención, registrándola si es nueva."""
+    codigo = _CODIGOS_INTENCION.get(intencion)
+    if codigo is None:
+        codigo = len(_INTENCIONES)
+        _INTENCIONES.append(intencion)
+        _CODIGOS_INTENCION[intencion] = codigo
+    return codigo
+
+
+def tema_de_intencion(intencion):
+    """
+    Extrae el tema de una intención ('ia.chatgpt' -> 'ia').
+
+    Returns:
+        str: Clave del tema o None si la intención no es temática
+    """
+    if not intencion:
+        return None
+    tema = intencion.split('.', 1)[0]
+    return tema if tema in TEMAS_INTENCION else None
+
+
+class Turno:
+    """
+    Un turno de la conversación (vista de solo lectura sobre el historial).
+    """
+
+    __slots__ = ('texto', 'intencion', 'sentimiento', 'timestamp')
+
+    def __init__(self, texto, intencion, sentimiento, timestamp):
+        self.texto = texto
+        self.intencion = intencion
+        self.sentimiento = sentimiento
+        self.timestamp = timestamp
+
+    def to_dict(self):
+        """Convierte el turno en diccionario."""
+        return {
+            'texto': self.texto,
+            'intencion': self.intencion,
+            'sentimiento': self.sentimiento,
+            'timestamp': self.timestamp,
+        }
+
+
+class HistorialConversacion:
+    """
+    Buffer circular de turnos con capacidad fija.
+    Cada campo vive en su propia columna; al llenarse se sobrescriben los más antiguos.
+    """
+
+    __slots__ = ('capacidad', 'max_caracteres', '_textos', '_intenciones',
+                 '_sentimientos', '_tiempos', '_inicio')
+
+    def __init__(self, capacidad=50, max_caracteres=500):
+        """
+        Inicializa el historial.
+
+        Args:
+            capacidad (int): Máximo de turnos conservados (max_historial)
+            max_caracteres (int): Longitud máxima guardada de cada mensaje
+        """
+        self.capacidad = max(1, int(capacidad))
+        self.max_caracteres = max_caracteres
+        self._textos = []
+        self._intenciones = array('H')
+        self._sentimientos = array('b')
+        self._tiempos = array('d')
+        self._inicio = 0  # Posición del turno más antiguo cuando el buffer está lleno
+
+    def __len__(self):
+        return len(self._textos)
+
+    def agregar(self, texto, intencion, sentimiento=None, timestamp=None):
+        """
+        Registra un turno, descartando el más antiguo si se alcanzó la capacidad.
+
+        Args:
+            texto (str): Mensaje del usuario
+            intencion (str): Intención o rama que produjo la respuesta
+            sentimiento (str): 'POS'|'NEG'|'NEU' o None si no se analizó
+            timestamp (float): Momento del turno (por defecto, ahora)
+        """
+        if self.max_caracteres and len(texto) > self.max_caracteres:
+            texto = texto[:self.max_caracteres]
+        codigo = codigo_intencion(intencion)
+        sentimiento_codigo = _CODIGOS_SENTIMIENTO.get(sentimiento, 0)
+        momento = timestamp if timestamp is not None else time.time()
+
+        if len(self._textos) < self.capacidad:
+            self._textos.append(texto)
+            self._intenciones.append(codigo)
+            self._sentimientos.append(sentimiento_codigo)
+            self._tiempos.append(momento)
+        else:
+            i = self._inicio
+            self._textos[i] = texto
+            self._intenciones[i] = codigo
+            self._sentimientos[i] = sentimiento_codigo
+            self._tiempos[i] = momento
+            self._inicio = (i + 1) % self.capacidad
+
+    def _indices(self):
+        """Índices de las columnas en orden cronológico."""
+        n = len(self._textos)
+        return [(self._inicio + k) % n for k in range(n)] if n else []
+
+    def _turno(self, i):
+        return Turno(
+            self._textos[i],
+            _INTENCIONES[self._intenciones[i]],
+            _SENTIMIENTOS[self._sentimientos[i]],
+            self._tiempos[i]
+        )
+
+    def __iter__(self):
+        for i in self._indices():
+            yield self._turno(i)
+
+    def recientes(self, n=5):
+        """
+        Devuelve los últimos n turnos en orden cronológico.
+
+        Args:
+            n (int): Número de turnos
+
+        Returns:
+            list: Lista de Turno
+        """
+        indices = self._indices()
+        return [self._turno(i) for i in indices[-n:]] if n > 0 else []
+
+    def resumen_temas(self):
+        """
+        Cuenta los turnos de cada tema científico presentes en el historial.
+
+        Returns:
+            dict: {tema: número de turnos}, del más al menos frecuente
+        """
+        conteo = Counter()
+        for codigo in self._intenciones:
+            tema = tema_de_intencion(_INTENCIONES[codigo])
+            if tema:
+                conteo[tema] += 1
+        return dict(conteo.most_common())
+
+    def to_columnas(self):
+        """
+        Exporta el historial en columnas (orden cronológico) para serializarlo.
+        Las intenciones se guardan por nombre: los códigos son locales a cada proceso.
+
+        Returns:
+            dict: {'c': capacidad, 'x': textos, 'i': intenciones, 's': sentimientos, 't': tiempos}
+        """
+        indices = self._indices()
+        return {
+            'c': self.capacidad,
+            'x': [self._textos[i] for i in indices],
+            'i': [_INTENCIONES[self._intenciones[i]] for i in indices],
+            's': [self._sentimientos[i] for i in indices],
+            't': [round(self._tiempos[i], 3) for i in indices],
+        }
+
+    @classmethod
+    def from_columnas(cls, columnas, max_caracteres=500):
+        """
+        Reconstruye un historial exportado con to_columnas.
+
+        Args:
+            columnas (dict): Resultado de to_columnas
+            max_caracteres (int): Longitud máxima guardada de cada mensaje
+
+        Returns:
+            HistorialConversacion: Historial reconstruido
+        """
+        historial = cls(columnas.get('c', 50), max_caracteres=max_caracteres)
+        for texto, intencion, sentimiento, momento in zip(
+                columnas.get('x', []), columnas.get('i', []),
+                columnas.get('s', []), columnas.get('t', [])):
+            historial.agregar(texto, intencion, _SENTIMIENTOS[sentimiento], momento)
+        return historial
+
+    def como_contexto(self, n=3):
+        """
+        Resume los últimos turnos como texto para incluirlo en un prompt.
+
+        Args:
+            n (int): Número de turnos a incluir
+
+        Returns:
+            str: Contexto o None si el historial está vacío
+        """
+        turnos = self.recientes(n)
+        if not turnos:
+            return None
+        return "\n".join(
+            f"- Usuario: {turno.texto} (intención: {turno.intencion})" for turno in turnos
+        )
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Historial de Conversación ===\n")
+
+    historial = HistorialConversacion(capacidad=3)
+    for texto, intencion, sentimiento in [
+        ("hola", "saludo", "POS"),
+        ("¿qué es chatgpt?", "ia.chatgpt", "NEU"),
+        ("háblame de marte", "espacio.marte", None),
+        ("y del james webb", "espacio.webb", "POS"),
+    ]:
+        historial.agregar(texto, intencion, sentimiento)
+
+    for turno in historial:
+        print(turno.to_dict())
+    print(f"\nResumen de temas: {historial.resumen_temas()}")
+    print(f"Contexto para el LLM:\n{historial.como_contexto()}")
@@ -1,20 +1,181 @@
+// URL del backend: ?backend=... en la página (se recuerda), la recordada, <meta name="backend-url"> o localhost:5000
+const BACKEND_POR_DEFECTO = 'http://localhost:5000';
+const BACKEND_PARAMETRO = new URLSearchParams(location.search).get('backend');
+if (BACKEND_PARAMETRO) {
+    localStorage.setItem('backend_url', BACKEND_PARAMETRO.replace(/\/+$/, ''));
+} else if (localStorage.getItem('backend_url') === BACKEND_POR_DEFECTO) {
+    // Versiones anteriores guardaban también el valor por defecto, que taparía el <meta>
+    localStorage.removeItem('backend_url');
+}
+const BACKEND_URL = (
+    BACKEND_PARAMETRO ||
+    localStorage.getItem('backend_url') ||
+    (document.querySelector('meta[name="backend-url"]') || {}).content ||
+    BACKEND_POR_DEFECTO
+).replace(/\/+$/, '');
+
+// Identificador de sesión: permite que cualquier instancia del backend recupere la conversación
+const SESSION_ID = sessionStorage.getItem('session_id') ||
+    (window.crypto && crypto.randomUUID ? crypto.randomUUID() : Date.now().toString(36) + Math.random().toString(36).slice(2));
+sessionStorage.setItem('session_id', SESSION_ID);
+
+const input = document.getElementById('userInput');
+const chatlog = document.getElementById('chatlog');
+
+// ---------- Canal de chat ----------
+// Una conexión WebSocket por sesión; si el backend no la ofrece (sin flask-sock) se usa POST /chat
+
+let socket = null;
+let websocketDisponible = 'WebSocket' in window;
+let reintentos = 0;
+let siguienteId = 0;
+const pendientes = new Map();  // id -> instante de envío
+const colaEnvio = [];          // mensajes escritos mientras el socket conecta
+
+function conectar() {
+    if (!websocketDisponible) return;
+    const url = BACKEND_URL.replace(/^http/, 'ws') + '/ws?session_id=' + encodeURIComponent(SESSION_ID);
+    let abierto = false;
+    socket = new WebSocket(url);
+
+    socket.onopen = () => {
+        abierto = true;
+        reintentos = 0;
+        while (colaEnvio.length) socket.send(colaEnvio.shift());
+    };
+    socket.onmessage = (evento) => {
+        const data = JSON.parse(evento.data);
+        mostrarRespuesta(data, data.id);
+    };
+    socket.onclose = () => {
+        socket = null;
+        if (!abierto && reintentos === 0) {
+            // Nunca llegó a abrirse: el backend no tiene WebSocket, se pasa a HTTP
+            websocketDisponible = false;
+            reenviarPorHttp();
+            return;
+        }
+        // Reconexión con espera creciente (máximo 10 s)
+        reintentos += 1;
+        setTimeout(conectar, Math.min(10000, 500 * 2 ** reintentos));
+    };
+}
+
+function reenviarPorHttp() {
+    while (colaEnvio.length) {
+        const { mensaje, id } = JSON.parse(colaEnvio.shift());
+        enviarPorHttp(mensaje, id);
+    }
+}
+
+function enviarPorHttp(mensaje, id) {
+    fetch(BACKEND_URL + '/chat', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ mensaje: mensaje, session_id: SESSION_ID, compacto: true })
+    })
+    .then(res => res.json())
+    .then(data => mostrarRespuesta(data, id))
+    .catch(() => mostrarRespuesta({ respuesta: 'No se pudo contactar con el servidor.' }, id));
+}
+
 function sendMessage() {
-    const input = document.getElementById('userInput');
     const message = input.value.trim();
     if (!message) return;
     addMessage('Tú', message, 'user');
     input.value = '';
-    fetch('http://localhost:5000/chat', {
+    updateAnalysis();
+
+    const id = ++siguienteId;
+    pendientes.set(id, performance.now());
+    if (websocketDisponible) {
+        const carga = JSON.stringify({ mensaje: message, id: id, compacto: true });
+        if (socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(carga);
+        } else {
+            colaEnvio.push(carga);
+            if (!socket) conectar();
+        }
+    } else {
+        enviarPorHttp(message, id);
+    }
+}
+
+// ---------- Renderizado incremental ----------
+
+function addMessage(sender, text, cls) {
+    // Se crea un nodo por mensaje: no se vuelve a parsear el historial y el texto no se interpreta como HTML
+    const div = document.createElement('div');
+    div.className = cls;
+    const autor = document.createElement('b');
+    autor.textContent = sender + ': ';
+    div.appendChild(autor);
+    div.appendChild(document.createTextNode(text));
+    chatlog.appendChild(div);
+    chatlog.scrollTop = chatlog.scrollHeight;
+}
+
+// ---------- Latencia ----------
+
+const latencias = [];
+
+function mostrarRespuesta(data, id) {
+    addMessage('ChatBot', data.respuesta, 'bot');
+    const inicio = pendientes.get(id);
+    if (inicio === undefined) return;
+    pendientes.delete(id);
+    latencias.push(performance.now() - inicio);
+    if (latencias.length > 50) latencias.shift();
+    const media = latencias.reduce((a, b) => a + b, 0) / latencias.length;
+    document.getElementById('latencia').textContent =
+        `${latencias[latencias.length - 1].toFixed(0)} ms (media ${media.toFixed(0)} ms) · ` +
+        (websocketDisponible ? 'WebSocket' : 'HTTP') + (data.modo ? ` · modo ${data.modo}` : '');
+}
+
+// ---------- Análisis lingüístico en vivo ----------
+
+let temporizadorAnalisis = null;
+
+function updateAnalysis() {
+    // Se espera a que el usuario deje de escribir para no lanzar una petición por tecla
+    clearTimeout(temporizadorAnalisis);
+    temporizadorAnalisis = setTimeout(pedirAnalisis, 150);
+}
+
+function pedirAnalisis() {
+    const message = input.value.trim();
+    const panel = document.getElementById('analysis');
+    if (!message) {
+        panel.textContent = "Escribe para ver el análisis...";
+        return;
+    }
+    fetch(BACKEND_URL + '/analisis', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ mensaje: message })
+        body: JSON.stringify({ mensaje: message, formato: 'columnas' })
     })
     .then(res => res.json())
-    .then(data => addMessage('ChatBot', data.respuesta, 'bot'));
+    .then(data => {
+        if (!data.analisis || !data.analisis.texto) {
+            // 400/429 devuelven 'analisis' vacío: se conserva la última tabla
+            return;
+        }
+        const { texto, lema, pos } = data.analisis;
+        let tabla = "Palabra\tLema\tPOS\n";
+        tabla += "-".repeat(32) + "\n";
+        texto.forEach((palabra, i) => {
+            tabla += `${palabra}\t${lema[i]}\t${pos[i]}\n`;
+        });
+        panel.textContent = tabla;
+    })
+    .catch(() => {
+        panel.textContent = "Análisis no disponible: no se pudo contactar con el servidor.";
+    });
 }
 
-function addMessage(sender, text, cls) {
-    const chatlog = document.getElementById('chatlog');
-    chatlog.innerHTML += `<div class="${cls}"><b>${sender}:</b> ${text}</div>`;
-    chatlog.scrollTop = chatlog.scrollHeight;
-}
\ No newline at end of file
+input.addEventListener('keydown', function(e) {
+    if (e.key === 'Enter') sendMessage();
+});
+input.addEventListener('input', updateAnalysis);
+
+conectar();
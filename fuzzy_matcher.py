@@ -0,0 +1,286 @@
+"""
+Módulo de corrección tipográfica para el enrutamiento por palabras clave
+Usa un índice de borrado simétrico (estilo SymSpell) construido una sola vez,
+de modo que corregir un token cuesta un número acotado de consultas a un dict.
+Solo se corrigen tokens que no son palabras reales del español: se consultan
+las frecuencias de wordfreq si está instalado
+"""
+
+import importlib.util
+import unicodedata
+
+from log_pipeline import obtener_logger
+
+logger = obtener_logger(__name__)
+
+WORDFREQ_AVAILABLE = importlib.util.find_spec('wordfreq') is not None
+
+
+def distancia_edicion(a, b, maximo=None):
+    """
+    Calcula la distancia de Damerau-Levenshtein restringida (OSA) entre dos cadenas.
+
+    Args:
+        a (str): Primera cadena
+        b (str): Segunda cadena
+        maximo (int): Si se indica, corta el cálculo al superar este valor
+
+    Returns:
+        int: Distancia de edición (o maximo + 1 si se supera el máximo)
+    """
+    if a == b:
+        return 0
+    if maximo is not None and abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+
+    # Los prefijos y sufijos comunes no cambian la distancia: se descartan
+    # (dejando un carácter de margen para no romper transposiciones)
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    inicio = max(inicio - 1, 0)
+    fin = 0
+    while (fin < len(a) - inicio and fin < len(b) - inicio
+           and a[-1 - fin] == b[-1 - fin]):
+        fin += 1
+    fin = max(fin - 1, 0)
+    a = a[inicio:len(a) - fin]
+    b = b[inicio:len(b) - fin]
+
+    anterior_previa = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = i
+        for j in range(1, len(b) + 1):
+            coste = 0 if a[i - 1] == b[j - 1] else 1
+            valor = min(
+                anterior[j] + 1,        # borrado
+                actual[j - 1] + 1,      # inserción
+                anterior[j - 1] + coste  # sustitución
+            )
+            # Transposición de caracteres adyacentes
+            if (anterior_previa is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                valor = min(valor, anterior_previa[j - 2] + 1)
+            actual[j] = valor
+            if valor < minimo_fila:
+                minimo_fila = valor
+        if maximo is not None and minimo_fila > maximo:
+            return maximo + 1
+        anterior_previa, anterior = anterior, actual
+
+    return anterior[len(b)]
+
+
+def generar_borrados(palabra, distancia):
+    """
+    Genera todas las variantes de una palabra con hasta `distancia` caracteres borrados.
+
+    Args:
+        palabra (str): Palabra original
+        distancia (int): Número máximo de borrados
+
+    Returns:
+        set: Variantes (incluye la palabra original)
+    """
+    variantes = {palabra}
+    frontera = {palabra}
+    for _ in range(distancia):
+        siguiente = set()
+        for variante in frontera:
+            for i in range(len(variante)):
+                siguiente.add(variante[:i] + variante[i + 1:])
+        siguiente -= variantes
+        variantes |= siguiente
+        frontera = siguiente
+    return variantes
+
+
+def _letra_base(caracter):
+    """Devuelve un carácter sin tilde ni diéresis."""
+    return unicodedata.normalize('NFKD', caracter)[0]
+
+
+def crear_verificador_palabras(zipf_minimo=3.0, adicionales=()):
+    """
+    Crea una función que indica si un token es una palabra real del español.
+
+    Con wordfreq instalado se considera real toda palabra con frecuencia Zipf
+    igual o superior a `zipf_minimo` (las erratas tienen frecuencia 0). Sin él
+    solo se reconocen las palabras vacías de spaCy y las `adicionales`.
+
+    Args:
+        zipf_minimo (float): Frecuencia Zipf mínima (3 ≈ una vez por millón de palabras)
+        adicionales (iterable): Palabras que siempre se consideran reales
+
+    Returns:
+        callable: es_palabra(token) -> bool
+    """
+    conocidas = set(adicionales)
+    try:
+        from spacy.lang.es.stop_words import STOP_WORDS
+        conocidas |= STOP_WORDS
+    except ImportError:
+        pass
+
+    if not WORDFREQ_AVAILABLE:
+        logger.warning("⚠️ wordfreq no disponible: la corrección tipográfica solo reconoce palabras vacías")
+        return conocidas.__contains__
+
+    from wordfreq import zipf_frequency
+
+    def es_palabra(token):
+        return token in conocidas or zipf_frequency(token, 'es') >= zipf_minimo
+
+    return es_palabra
+
+
+class IndiceDifuso:
+    """
+    Índice de borrado simétrico sobre el vocabulario de palabras clave.
+    Solo se consulta para tokens que no aparecen de forma exacta.
+    """
+
+    def __init__(self, vocabulario, max_edit_distance=2, min_token_length=5,
+                 long_token_length=8, short_token_length=6, require_first_letter=True,
+                 cache_size=10000, excluidas=(), protegidas=(), es_palabra=None):
+        """
+        Construye el índice a partir del vocabulario de enrutamiento.
+
+        Args:
+            vocabulario (list): Palabras clave en orden de prioridad
+            max_edit_distance (int): Distancia máxima para tokens largos
+            min_token_length (int): Tokens más cortos no se corrigen
+            long_token_length (int): Longitud desde la que se permite la distancia máxima
+                (los tokens más cortos se corrigen con distancia 1)
+            short_token_length (int): Los tokens de hasta esta longitud solo se corrigen
+                si hay una única candidata a distancia 1
+            require_first_letter (bool): Exigir que la primera letra coincida
+                (ignorando tildes), lo que evita correcciones como "parte" -> "marte"
+            cache_size (int): Máximo de correcciones memorizadas
+            excluidas (iterable): Palabras comunes que nunca se corrigen aunque estén
+                cerca de una palabra clave (p. ej. "planta" -> "planeta")
+            protegidas (iterable): Palabras clave que nunca son destino de una corrección
+                (intenciones conversacionales: "contexto" no es "contento")
+            es_palabra (callable): Indica si un token es una palabra real; las palabras
+                reales no se corrigen ("actuar" no es "actual")
+        """
+        self.max_edit_distance = max_edit_distance
+        self.min_token_length = min_token_length
+        self.long_token_length = long_token_length
+        self.short_token_length = short_token_length
+        self.require_first_letter = require_first_letter
+        self.cache_size = cache_size
+        self.excluidas = frozenset(excluidas)
+        self.protegidas = frozenset(protegidas)
+        self.es_palabra = es_palabra
+
+        # Solo palabras sueltas: los tokens nunca contienen espacios
+        self.vocabulario = [p for p in vocabulario if ' ' not in p]
+        self.exactas = set(self.vocabulario)
+        self.prioridad = {palabra: i for i, palabra in enumerate(self.vocabulario)}
+
+        self.borrados = {}
+        for palabra in self.vocabulario:
+            if palabra in self.protegidas:
+                continue
+            for variante in generar_borrados(palabra, max_edit_distance):
+                self.borrados.setdefault(variante, []).append(palabra)
+
+        self._cache = {}
+
+    def _distancia_permitida(self, token):
+        """Distancia máxima admitida según la longitud del token."""
+        if len(token) < self.min_token_length:
+            return 0
+        if len(token) < self.long_token_length or len(token) <= self.short_token_length:
+            return min(1, self.max_edit_distance)
+        return self.max_edit_distance
+
+    def corregir(self, token):
+        """
+        Busca la palabra clave más cercana a un token.
+
+        Args:
+            token (str): Token en minúsculas
+
+        Returns:
+            str: Palabra clave corregida o None si no hay candidata
+        """
+        if token in self.exactas:
+            return token
+        if token in self._cache:
+            return self._cache[token]
+
+        permitida = self._distancia_permitida(token)
+        if permitida and (token in self.excluidas
+                          or (self.es_palabra is not None and self.es_palabra(token))):
+            permitida = 0
+        mejor = None
+        if permitida > 0:
+            candidatas = set()
+            for variante in generar_borrados(token, permitida):
+                candidatas.update(self.borrados.get(variante, ()))
+
+            if self.require_first_letter:
+                inicial = _letra_base(token[0])
+                candidatas = {c for c in candidatas if _letra_base(c[0]) == inicial}
+
+            mejor_distancia = permitida + 1
+            empatadas = 0
+            for candidata in candidatas:
+                distancia = distancia_edicion(token, candidata, permitida)
+                if distancia < mejor_distancia:
+                    mejor, mejor_distancia, empatadas = candidata, distancia, 1
+                elif distancia == mejor_distancia and mejor is not None:
+                    empatadas += 1
+                    if self.prioridad[candidata] < self.prioridad[mejor]:
+                        mejor = candidata
+            # En tokens cortos un empate entre palabras clave indica una palabra distinta, no una errata
+            corto = len(token) < self.long_token_length or len(token) <= self.short_token_length
+            if mejor_distancia > permitida or (empatadas > 1 and corto):
+                mejor = None
+
+        if self.cache_size:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[token] = mejor
+        return mejor
+
+    def corregir_tokens(self, tokens):
+        """
+        Sustituye los tokens mal escritos por su palabra clave más cercana.
+
+        Args:
+            tokens (list): Tokens del mensaje
+
+        Returns:
+            list: Tokens con las correcciones aplicadas
+        """
+        corregidos = []
+        for token in tokens:
+            if token in self.exactas:
+                corregidos.append(token)
+                continue
+            correccion = self.corregir(token)
+            corregidos.append(correccion if correccion else token)
+        return corregidos
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    from routing_keywords import VOCABULARIO_ENRUTAMIENTO, PALABRAS_NO_CORREGIBLES, PALABRAS_CONVERSACIONALES
+
+    print("=== Prueba del Índice Difuso ===\n")
+    indice = IndiceDifuso(
+        VOCABULARIO_ENRUTAMIENTO, excluidas=PALABRAS_NO_CORREGIBLES,
+        protegidas=PALABRAS_CONVERSACIONALES,
+        es_palabra=crear_verificador_palabras(adicionales=PALABRAS_NO_CORREGIBLES)
+    )
+    print(f"Palabras indexadas: {len(indice.vocabulario)}")
+    print(f"Variantes de borrado: {len(indice.borrados)}\n")
+
+    for token in ["inteligensia", "criptomonedas", "telescpio", "bitcoim", "galxia", "casa", "parte", "planta", "bueno",
+                  "contexto", "graciosa", "actuar", "estudiar"]:
+        print(f"{token!r:>18} -> {indice.corregir(token)!r}")
@@ -0,0 +1,279 @@
+"""
+Módulo de métricas de intención
+Cuenta cuántas respuestas produce cada rama del enrutador, su latencia y
+qué palabras aparecen en los mensajes que acaban en una rama de fallback.
+También cuenta, por rama, cuántas veces se ejecutó el modelo de sentimiento
+y cuántas se evitó porque la rama no lo usaba.
+Cada hilo escribe en sus propios contadores (sin locks en el camino de la
+petición); el informe los fusiona y se cachea unos segundos.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+try:
+    from config import METRICS_CONFIG
+except ImportError:
+    METRICS_CONFIG = {'enabled': True, 'top_tokens': 20, 'max_tokens_rastreados': 5000, 'intervalo_fusion': 5}
+
+# Límites superiores (ms) de los cubos del histograma de latencia
+CUBOS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+# Palabras frecuentes que no aportan al buscar palabras clave que faltan
+PALABRAS_VACIAS = frozenset((
+    'que', 'qué', 'los', 'las', 'del', 'por', 'para', 'una', 'uno', 'unos', 'unas', 'con', 'como', 'cómo',
+    'mas', 'más', 'sobre', 'este', 'esta', 'esto', 'eso', 'ese', 'esa', 'hay', 'muy', 'pero', 'sus',
+    'les', 'nos', 'mis', 'tus', 'está', 'son', 'ser', 'fue', 'cual', 'cuál', 'cuando', 'cuándo',
+    'donde', 'dónde', 'quiero', 'saber', 'puedes', 'dime', 'algo', 'todo', 'también', 'tiene',
+))
+
+_PALABRA = re.compile(r'^[^\W\d_]{3,}$')
+
+
+def es_fallback(intencion):
+    return bool(intencion) and intencion.startswith('fallback')
+
+
+class _ContadoresHilo:
+    """Contadores de un hilo: solo ese hilo los modifica."""
+
+    __slots__ = ('hilo', 'intenciones', 'tokens', 'sentimiento')
+
+    def __init__(self, hilo):
+        self.hilo = hilo
+        self.intenciones = {}  # intención -> [n, suma_segundos, cubos...]
+        self.tokens = Counter()
+        self.sentimiento = Counter()  # (intención, origen) -> n
+
+
+class IntentMetrics:
+    """
+    Métricas de cobertura de intenciones.
+    registrar() solo toca estructuras del hilo actual; informe() fusiona
+    las de todos los hilos y pliega las de hilos terminados.
+    """
+
+    def __init__(self, vocabulario=(), top_tokens=20, max_tokens_rastreados=5000, intervalo_fusion=5.0):
+        """
+        Args:
+            vocabulario (iterable): Palabras clave del enrutador (no cuentan como "sin coincidencia")
+            top_tokens (int): Tokens sin coincidencia que muestra el informe
+            max_tokens_rastreados (int): Tokens distintos por hilo antes de podar los menos frecuentes
+            intervalo_fusion (float): Segundos durante los que se reutiliza el último informe
+        """
+        self.vocabulario = frozenset(vocabulario)
+        self.top_tokens = top_tokens
+        self.max_tokens_rastreados = max_tokens_rastreados
+        self.intervalo_fusion = intervalo_fusion
+        self._local = threading.local()
+        self._hilos = []
+        self._lock = threading.Lock()
+        # Contadores plegados de hilos que ya terminaron
+        self._retirados = _ContadoresHilo(None)
+        self._informe = None
+        self._instante_informe = 0.0
+        self.desde = time.time()
+
+    def _contadores(self):
+        contadores = getattr(self._local, 'contadores', None)
+        if contadores is None:
+            contadores = _ContadoresHilo(threading.current_thread())
+            self._local.contadores = contadores
+            with self._lock:
+                self._hilos.append(contadores)
+                # Flask crea un hilo por petición: se pliegan los muertos para acotar la lista
+                if len(self._hilos) > 256:
+                    self._plegar_terminados()
+        return contadores
+
+    def registrar(self, intencion, segundos, tokens=None, sentimiento=None):
+        """
+        Registra una respuesta del enrutador.
+
+        Args:
+            intencion (str): Id de la intención/rama que produjo la respuesta
+            segundos (float): Latencia del enrutado
+            tokens (list): Tokens del mensaje (solo se usan en ramas de fallback)
+            sentimiento (str): Origen del sentimiento (ver SentimientoDiferido.cerrar)
+        """
+        contadores = self._contadores()
+        fila = contadores.intenciones.get(intencion)
+        if fila is None:
+            fila = [0, 0.0] + [0] * len(CUBOS_MS)
+            contadores.intenciones[intencion] = fila
+        fila[0] += 1
+        fila[1] += segundos
+        fila[2 + bisect_left(CUBOS_MS, segundos * 1000)] += 1
+        if sentimiento is not None:
+            contadores.sentimiento[(intencion, sentimiento)] += 1
+
+        if tokens and es_fallback(intencion):
+            for token in tokens:
+                if token not in self.vocabulario and token not in PALABRAS_VACIAS and _PALABRA.match(token):
+                    contadores.tokens[token] += 1
+            if len(contadores.tokens) > self.max_tokens_rastreados:
+                contadores.tokens = Counter(dict(contadores.tokens.most_common(self.max_tokens_rastreados // 2)))
+
+    @staticmethod
+    def _copia(diccionario):
+        """Copia un dict que otro hilo puede estar ampliando (reintenta si cambia de tamaño)."""
+        for _ in range(5):
+            try:
+                return dict(diccionario)
+            except RuntimeError:
+                continue
+        return {}
+
+    @classmethod
+    def _sumar(cls, destino, origen):
+        for intencion, fila in cls._copia(origen.intenciones).items():
+            acumulada = destino.intenciones.get(intencion)
+            if acumulada is None:
+                destino.intenciones[intencion] = list(fila)
+            else:
+                for i, valor in enumerate(fila):
+                    acumulada[i] += valor
+        destino.tokens.update(cls._copia(origen.tokens))
+        destino.sentimiento.update(cls._copia(origen.sentimiento))
+
+    def _plegar_terminados(self):
+        """Suma a _retirados los contadores de hilos terminados (con _lock tomado)."""
+        vivos = []
+        for contadores in self._hilos:
+            if contadores.hilo.is_alive():
+                vivos.append(contadores)
+            else:
+                self._sumar(self._retirados, contadores)
+        self._hilos = vivos
+
+    @staticmethod
+    def _percentil(fila, p):
+        """Límite superior del cubo que contiene el percentil p (None si supera el último)."""
+        objetivo = fila[0] * p
+        acumulado = 0
+        for limite, n in zip(CUBOS_MS[:-1], fila[2:]):
+            acumulado += n
+            if acumulado >= objetivo:
+                return limite
+        return None
+
+    @staticmethod
+    def _informe_sentimiento(contador):
+        """Llamadas al modelo de sentimiento hechas y evitadas, en total y por rama."""
+        por_intencion = {}
+        for (intencion, origen), n in contador.items():
+            por_intencion.setdefault(intencion, {})[origen] = n
+        return {
+            # 'descartado': análisis especulativo que se ejecutó sin que la rama lo usara
+            'llamadas': sum(n for (_, origen), n in contador.items()
+                            if origen in ('bajo_demanda', 'especulativo', 'descartado')),
+            'evitadas': sum(n for (_, origen), n in contador.items() if origen == 'evitado'),
+            'por_intencion': por_intencion,
+        }
+
+    def informe(self, forzar=False):
+        """
+        Fusiona los contadores y calcula el informe.
+
+        Args:
+            forzar (bool): Recalcular aunque el último informe sea reciente
+
+        Returns:
+            dict: total, tasa de fallback, métricas por intención y tokens sin coincidencia
+        """
+        ahora = time.monotonic()
+        if not forzar and self._informe is not None and ahora - self._instante_informe < self.intervalo_fusion:
+            return self._informe
+
+        total = _ContadoresHilo(None)
+        with self._lock:
+            self._plegar_terminados()
+            self._sumar(total, self._retirados)
+            for contadores in self._hilos:
+                self._sumar(total, contadores)
+
+        n_total = sum(fila[0] for fila in total.intenciones.values())
+        n_fallback = sum(fila[0] for intencion, fila in total.intenciones.items() if es_fallback(intencion))
+        por_intencion = {}
+        for intencion, fila in sorted(total.intenciones.items(), key=lambda x: -x[1][0]):
+            por_intencion[intencion] = {
+                'n': fila[0],
+                'porcentaje': round(100.0 * fila[0] / n_total, 2),
+                'latencia_media_ms': round(fila[1] / fila[0] * 1000, 3),
+                'p95_ms': self._percentil(fila, 0.95),
+            }
+
+        self._informe = {
+            'desde': self.desde,
+            'total': n_total,
+            'fallback': n_fallback,
+            'tasa_fallback': round(n_fallback / n_total, 4) if n_total else 0.0,
+            'por_intencion': por_intencion,
+            'tokens_sin_coincidencia': total.tokens.most_common(self.top_tokens),
+            'sentimiento': self._informe_sentimiento(total.sentimiento),
+        }
+        self._instante_informe = ahora
+        return self._informe
+
+
+def crear_metricas(vocabulario=()):
+    """
+    Crea las métricas según METRICS_CONFIG.
+
+    Returns:
+        IntentMetrics: Instancia o None si están desactivadas
+    """
+    if not METRICS_CONFIG.get('enabled', True):
+        return None
+    return IntentMetrics(
+        vocabulario,
+        top_tokens=METRICS_CONFIG.get('top_tokens', 20),
+        max_tokens_rastreados=METRICS_CONFIG.get('max_tokens_rastreados', 5000),
+        intervalo_fusion=METRICS_CONFIG.get('intervalo_fusion', 5)
+    )
+
+
+def imprimir_informe(informe):
+    """Muestra un informe en forma de tabla."""
+    print(f"Respuestas: {informe['total']} | fallback: {informe['fallback']} "
+          f"({informe['tasa_fallback']:.1%})\n")
+    print(f"{'intención':<28} {'n':>8} {'%':>7} {'media ms':>10} {'p95 ms':>8}")
+    for intencion, datos in informe['por_intencion'].items():
+        print(f"{intencion:<28} {datos['n']:>8} {datos['porcentaje']:>7.2f} "
+              f"{datos['latencia_media_ms']:>10.3f} {datos['p95_ms']:>8}")
+    sentimiento = informe.get('sentimiento')
+    if sentimiento and (sentimiento['llamadas'] or sentimiento['evitadas']):
+        print(f"\nModelo de sentimiento: {sentimiento['llamadas']} llamadas, "
+              f"{sentimiento['evitadas']} evitadas")
+        for intencion, origenes in sentimiento['por_intencion'].items():
+            detalle = ", ".join(f"{origen} {n}" for origen, n in sorted(origenes.items()))
+            print(f"  {intencion:<28} {detalle}")
+    if informe['tokens_sin_coincidencia']:
+        print("\nPalabras más frecuentes en mensajes sin coincidencia:")
+        for token, n in informe['tokens_sin_coincidencia']:
+            print(f"  {token:<24} {n}")
+
+
+def main():
+    import argparse
+    import json
+    import urllib.request
+
+    parser = argparse.ArgumentParser(description="Informe de cobertura de intenciones del chatbot")
+    parser.add_argument('--url', default='http://localhost:5000', help="URL del backend")
+    parser.add_argument('--json', action='store_true', help="Mostrar el informe en JSON")
+    args = parser.parse_args()
+
+    with urllib.request.urlopen(args.url.rstrip('/') + '/metricas/intenciones', timeout=10) as respuesta:
+        informe = json.load(respuesta)
+    if args.json:
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    else:
+        imprimir_informe(informe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Módulo de lematización para el enrutamiento de intenciones
+Reduce cada token a la palabra clave de la que es una variante (plural,
+género, con o sin tilde) para que las listas de routing_keywords no tengan
+que enumerar inflexiones. La tabla de variantes se genera a partir del
+vocabulario sin cargar ningún modelo; opcionalmente se usan los lemas de
+un pipeline de spaCy sin parser ni NER para las formas que la tabla no cubre.
+El resultado de cada forma se cachea, así que el camino habitual es una
+búsqueda en un dict.
+"""
+
+import threading
+
+from log_pipeline import obtener_logger
+
+try:
+    from config import LEMMA_CONFIG
+except ImportError:
+    LEMMA_CONFIG = {'enabled': True, 'mode': 'tabla', 'spacy_model': 'es_core_news_sm', 'cache_size': 50000}
+
+logger = obtener_logger(__name__)
+
+VOCALES = 'aeiouáéíóú'
+_TILDES = str.maketrans('áéíóú', 'aeiou')
+
+
+def sin_acentos(palabra):
+    """Quita las tildes (conserva la ñ y la ü)."""
+    return palabra.translate(_TILDES)
+
+
+def _plurales(palabra):
+    """Plurales regulares del español: casa→casas, batería→baterías, fusión→fusiones, luz→luces."""
+    if palabra[-1] in VOCALES:
+        return [palabra + 's']
+    if palabra[-1] == 'z':
+        return [palabra[:-1] + 'ces']
+    if palabra[-1] in 'sx':
+        return []
+    # Las agudas en -ón/-án/-és pierden la tilde al añadir sílaba (fusión→fusiones, cáncer→cánceres);
+    # los préstamos terminados en consonante suelen llevar solo -s (robots, chips)
+    return [palabra + 'es', sin_acentos(palabra) + 'es', palabra + 's']
+
+
+def generar_variantes(palabra):
+    """
+    Genera las formas flexionadas de una palabra clave.
+
+    Args:
+        palabra (str): Palabra clave (una sola palabra, en minúsculas)
+
+    Returns:
+        set: Variantes, incluida la propia palabra y sus formas sin tilde
+    """
+    formas = {palabra}
+    if len(palabra) >= 3:
+        formas.update(_plurales(palabra))
+    # Femenino de adjetivos y participios: contento/contenta, cansado/cansadas, último/últimas
+    if len(palabra) >= 4 and palabra[-1] == 'o':
+        formas.update((palabra[:-1] + 'a', palabra[:-1] + 'as'))
+    formas.update([sin_acentos(f) for f in formas])
+    return formas
+
+
+def construir_tabla_lemas(vocabulario):
+    """
+    Tabla forma → palabra clave a partir del vocabulario de enrutamiento.
+    Una palabra clave siempre se representa a sí misma; si dos claves generan
+    la misma variante gana la que aparece antes en el vocabulario (prioridad).
+
+    Args:
+        vocabulario (list): Palabras clave en orden de prioridad
+
+    Returns:
+        dict: {forma: palabra_clave}
+    """
+    claves = [p for p in vocabulario if ' ' not in p]
+    tabla = {}
+    for clave in claves:
+        for variante in generar_variantes(clave):
+            tabla.setdefault(variante, clave)
+    # Las claves exactas (y su forma sin tilde) no se reasignan a otra clave
+    for clave in claves:
+        tabla[clave] = clave
+    for clave in claves:
+        tabla.setdefault(sin_acentos(clave), clave)
+    return tabla
+
+
+class LematizadorEnrutamiento:
+    """
+    Lematizador de tokens para el enrutador.
+    Modo 'tabla': solo la tabla de variantes (sin modelo).
+    Modo 'spacy': además, para las formas que la tabla no cubre, el lema de
+    spaCy (tagger sin parser ni NER) si ese lema es una palabra clave o una
+    de sus variantes. El lema se cachea por forma, sin contexto.
+    """
+
+    def __init__(self, vocabulario, usar_spacy=False, modelo_spacy='es_core_news_sm', cache_size=50000):
+        """
+        Args:
+            vocabulario (list): Palabras clave en orden de prioridad
+            usar_spacy (bool): Consultar spaCy para las formas desconocidas
+            modelo_spacy (str): Modelo de spaCy a cargar
+            cache_size (int): Formas distintas cacheadas antes de vaciar la caché
+        """
+        self.tabla = construir_tabla_lemas(vocabulario)
+        self.usar_spacy = usar_spacy
+        self.modelo_spacy = modelo_spacy
+        self.cache_size = cache_size
+        self._cache = {}
+        self._nlp = None
+        self._lock = threading.Lock()
+
+    def _cargar_spacy(self):
+        with self._lock:
+            if self._nlp is None:
+                import spacy
+                self._nlp = spacy.load(self.modelo_spacy, exclude=['parser', 'ner'])
+        return self._nlp
+
+    def descargar_spacy(self):
+        """Libera el pipeline de spaCy; se recarga en la siguiente forma desconocida."""
+        self._nlp = None
+
+    def spacy_cargado(self):
+        return self._nlp is not None
+
+    def _buscar(self, token):
+        lema = self.tabla.get(token)
+        if lema is None:
+            lema = self.tabla.get(sin_acentos(token))
+        return lema
+
+    def lema(self, token):
+        """
+        Devuelve la palabra clave de la que `token` es variante, o el propio token.
+
+        Args:
+            token (str): Token en minúsculas
+
+        Returns:
+            str: Palabra clave o el token sin cambios
+        """
+        lema = self._cache.get(token)
+        if lema is not None:
+            return lema
+
+        lema = self._buscar(token)
+        if lema is None and self.usar_spacy and token.isalpha():
+            try:
+                lema_spacy = self._cargar_spacy()(token)[0].lemma_.lower()
+                lema = self._buscar(lema_spacy)
+            except (OSError, IndexError) as e:
+                logger.warning(f"⚠️ Lematización con spaCy desactivada: {e}")
+                self.usar_spacy = False
+        if lema is None:
+            lema = token
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[token] = lema
+        return lema
+
+    def lematizar_tokens(self, tokens):
+        """
+        Aplica lema() a una lista de tokens.
+
+        Args:
+            tokens (list): Tokens del mensaje
+
+        Returns:
+            list: Tokens con las variantes sustituidas por su palabra clave
+        """
+        cache = self._cache
+        return [cache.get(token) or self.lema(token) for token in tokens]
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    from routing_keywords import VOCABULARIO_ENRUTAMIENTO
+
+    print("=== Prueba del Lematizador de Enrutamiento ===\n")
+    lematizador = LematizadorEnrutamiento(VOCABULARIO_ENRUTAMIENTO)
+    print(f"Formas en la tabla: {len(lematizador.tabla)}\n")
+
+    for token in ["planetas", "baterías", "robots", "adiós", "últimas", "contenta", "fusiones",
+                  "cuantica", "vacunas", "galaxias", "enfermedades", "casa"]:
+        print(f"{token!r:>16} -> {lematizador.lema(token)!r}")
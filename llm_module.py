@@ -3,17 +3,208 @@ Módulo de integración con modelo LLM Gemma de Google
 Genera respuestas más naturales y contextuales usando el modelo Gemma-2b-it
 """
 
+import importlib.util
+import json
 import os
+import re
+import time
+
+from model_lifecycle import get_lifecycle_manager, uso_modelo
+from single_flight import SingleFlight, normalizar_clave, COALESCING_CONFIG
+from semantic_cache import get_semantic_cache
+from log_pipeline import obtener_logger
+
+logger = obtener_logger(__name__)
+
+# torch, transformers y huggingface_hub tardan segundos en importarse: aquí solo se
+# comprueba que estén instalados y se importan al cargar el modelo (_importar_dependencias)
+LLM_AVAILABLE = all(
+    importlib.util.find_spec(modulo) is not None for modulo in ('torch', 'transformers', 'huggingface_hub')
+)
+if not LLM_AVAILABLE:
+    logger.warning("⚠️ transformers o huggingface_hub no están instalados.")
+    logger.warning("Ejecuta: pip install transformers huggingface_hub torch")
+
+torch = None
+login = AutoTokenizer = AutoModelForCausalLM = StoppingCriteriaList = None
 
 try:
-    from huggingface_hub import login
-    from transformers import AutoTokenizer, AutoModelForCausalLM
-    import torch
-    LLM_AVAILABLE = True
+    from config import LLM_CONFIG, LIMITS, LOG_CONFIG, apply_concurrency_settings
 except ImportError:
-    LLM_AVAILABLE = False
-    print("⚠️ transformers o huggingface_hub no están instalados.")
-    print("Ejecuta: pip install transformers huggingface_hub torch")
+    LLM_CONFIG = {}
+    LIMITS = {'max_tokens_llm': 300}
+    LOG_CONFIG = {'log_llm_calls': False}
+    apply_concurrency_settings = lambda: None
+
+# Metadatos que identifican un directorio como snapshot local del modelo
+ARCHIVO_SNAPSHOT = 'snapshot.json'
+
+# Prompts idénticos con los mismos parámetros comparten una sola generación
+_vuelos_llm = SingleFlight(
+    'llm',
+    timeout=COALESCING_CONFIG.get('llm_timeout', 120),
+    habilitado=COALESCING_CONFIG.get('enabled', True)
+)
+
+
+def _importar_dependencias():
+    """Importa torch, transformers y huggingface_hub la primera vez que se necesitan."""
+    global torch, login, AutoTokenizer, AutoModelForCausalLM, StoppingCriteriaList
+    if torch is not None:
+        return
+    from huggingface_hub import login
+    from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteriaList
+    import torch as _torch
+    # Hilos de torch según CONCURRENCY_CONFIG, antes del primer uso
+    apply_concurrency_settings()
+    # torch se asigna el último: si no es None, todo lo demás ya está importado
+    torch = _torch
+
+
+def _dispositivo():
+    """'cuda' si hay GPU, si no 'cpu' (importa torch)."""
+    _importar_dependencias()
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _resolver_dtype(nombre, device):
+    """Convierte 'auto'/'float16'/'bfloat16'/'float32' en un dtype de torch."""
+    if not nombre or nombre == 'auto':
+        return torch.float16 if device == "cuda" else torch.float32
+    return getattr(torch, nombre)
+
+
+def leer_snapshot(directorio):
+    """
+    Lee los metadatos de un snapshot local.
+    
+    Args:
+        directorio (str): Directorio del snapshot
+        
+    Returns:
+        dict: Metadatos (model_name, dtype, creado) o None si no hay snapshot válido
+    """
+    if not directorio:
+        return None
+    try:
+        with open(os.path.join(directorio, ARCHIVO_SNAPSHOT), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def crear_snapshot(model_name=None, directorio=None, dtype=None, hf_token=None):
+    """
+    Descarga el modelo una vez y guarda tokenizer y pesos en safetensors
+    con el dtype elegido, para cargarlos después sin red ni autenticación.
+    
+    Args:
+        model_name (str): Modelo de HuggingFace (por defecto LLM_CONFIG['model_name'])
+        directorio (str): Destino (por defecto LLM_CONFIG['snapshot_dir'])
+        dtype (str): 'auto', 'float16', 'bfloat16' o 'float32'
+        hf_token (str): Token de HuggingFace
+        
+    Returns:
+        str: Directorio del snapshot o None si hay error
+    """
+    if not LLM_AVAILABLE:
+        logger.warning("⚠️ No se pueden cargar las dependencias de LLM")
+        return None
+    
+    model_name = model_name or LLM_CONFIG.get('model_name', 'google/gemma-2b-it')
+    directorio = directorio or LLM_CONFIG.get('snapshot_dir')
+    dtype = dtype or LLM_CONFIG.get('snapshot_dtype', 'auto')
+    hf_token = hf_token or os.getenv('HUGGINGFACE_TOKEN')
+    if not directorio:
+        logger.warning("⚠️ No hay directorio de snapshot configurado (LLM_SNAPSHOT_DIR)")
+        return None
+    
+    try:
+        logger.info(f"🔄 Creando snapshot de {model_name} en {directorio}...")
+        dispositivo = _dispositivo()
+        if hf_token:
+            login(hf_token)
+        dtype_torch = _resolver_dtype(dtype, dispositivo)
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_auth_token=hf_token)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name, use_auth_token=hf_token, torch_dtype=dtype_torch, low_cpu_mem_usage=True
+        )
+        
+        os.makedirs(directorio, exist_ok=True)
+        tokenizer.save_pretrained(directorio)
+        model.save_pretrained(directorio, safe_serialization=True)
+        # Los metadatos se escriben al final: un snapshot a medias no se usa
+        with open(os.path.join(directorio, ARCHIVO_SNAPSHOT), 'w', encoding='utf-8') as f:
+            json.dump({'model_name': model_name, 'dtype': str(dtype_torch).replace('torch.', ''),
+                       'creado': time.time()}, f)
+        logger.info(f"✅ Snapshot guardado en {directorio}")
+        return directorio
+    
+    except Exception as e:
+        logger.error(f"❌ Error al crear el snapshot: {e}")
+        return None
+
+
+# Fin de frase: signo de cierre seguido de espacio (evita cortar en "3.5")
+_FIN_FRASE = re.compile(r'[.!?…](?=\s)')
+
+
+class CriterioParada:
+    """
+    Criterio de parada para model.generate (misma interfaz que StoppingCriteria).
+    Solo examina los tokens generados, nunca el prompt, y detiene la generación
+    al aparecer una cadena de parada, al terminar un párrafo o al completar
+    un número de frases.
+    """
+    
+    def __init__(self, tokenizer, longitud_prompt, stop_strings=(), max_frases=None, fin_parrafo=False):
+        """
+        Args:
+            tokenizer: Tokenizer del modelo
+            longitud_prompt (int): Número de tokens del prompt
+            stop_strings (list): Cadenas que terminan la respuesta
+            max_frases (int): Número máximo de frases (None = sin límite)
+            fin_parrafo (bool): Parar al terminar el primer párrafo
+        """
+        self.tokenizer = tokenizer
+        self.longitud_prompt = longitud_prompt
+        self.stop_strings = [s for s in (stop_strings or ()) if s]
+        self.max_frases = max_frases
+        self.fin_parrafo = fin_parrafo
+    
+    def recortar(self, texto):
+        """
+        Recorta un texto generado en el primer punto de parada.
+        
+        Args:
+            texto (str): Texto generado (sin el prompt)
+            
+        Returns:
+            str: Texto recortado
+        """
+        corte = len(texto)
+        for stop in self.stop_strings:
+            posicion = texto.find(stop)
+            if posicion != -1:
+                corte = min(corte, posicion)
+        if self.fin_parrafo:
+            inicio = len(texto) - len(texto.lstrip())
+            posicion = texto.find('\n\n', inicio)
+            if posicion != -1:
+                corte = min(corte, posicion)
+        if self.max_frases:
+            for i, coincidencia in enumerate(_FIN_FRASE.finditer(texto), start=1):
+                if i == self.max_frases:
+                    corte = min(corte, coincidencia.end())
+                    break
+        return texto[:corte]
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        nuevos = input_ids[0, self.longitud_prompt:]
+        texto = self.tokenizer.decode(nuevos, skip_special_tokens=True)
+        # El texto supera al recorte cuando ya se alcanzó algún punto de parada
+        parar = len(self.recortar(texto).rstrip()) < len(texto.rstrip())
+        return torch.full((input_ids.shape[0],), parar, dtype=torch.bool, device=input_ids.device)
 
 
 class GemmaLLM:
@@ -35,11 +226,20 @@ class GemmaLLM:
         self.hf_token = hf_token or os.getenv('HUGGINGFACE_TOKEN')
         self.model = None
         self.tokenizer = None
+        self.draft_model = None
         self.enabled = False
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Se decide al cargar el modelo: consultar torch.cuda obligaría a importar torch
+        self.device = None
+        # Generación asistida (decodificación especulativa), ver LLM_CONFIG['assisted_generation']
+        self.asistencia = dict(LLM_CONFIG.get('assisted_generation', {}))
+        self.parametros = dict(LLM_CONFIG.get('generation_params', {}))
+        self.estadisticas = {'llamadas': 0, 'tokens_generados': 0, 'segundos': 0.0}
+        # Snapshot local (ver crear_snapshot) y tiempos de las cargas realizadas
+        self.snapshot_dir = LLM_CONFIG.get('snapshot_dir')
+        self.tiempos_carga = []
         
         if not LLM_AVAILABLE:
-            print("⚠️ Dependencias de LLM no disponibles")
+            logger.warning("⚠️ Dependencias de LLM no disponibles")
             return
         
         if load_on_init:
@@ -48,83 +248,206 @@ class GemmaLLM:
     def load_model(self):
         """Carga el modelo y tokenizer de HuggingFace."""
         if not LLM_AVAILABLE:
-            print("⚠️ No se pueden cargar las dependencias de LLM")
+            logger.warning("⚠️ No se pueden cargar las dependencias de LLM")
             return False
         
         try:
-            print(f"🔄 Cargando modelo {self.model_name}...")
+            inicio = time.perf_counter()
+            self.device = _dispositivo()
+            snapshot = leer_snapshot(self.snapshot_dir)
+            if snapshot and snapshot.get('model_name') != self.model_name:
+                logger.warning(f"⚠️ El snapshot de {self.snapshot_dir} es de {snapshot.get('model_name')}; se ignora")
+                snapshot = None
             
-            # Login a HuggingFace si hay token
-            if self.hf_token:
-                login(self.hf_token)
-                print("✅ Autenticado en HuggingFace")
+            if snapshot:
+                # Pesos safetensors locales: se mapean en memoria y los procesos comparten la caché de páginas
+                logger.info(f"🔄 Cargando modelo {self.model_name} desde el snapshot {self.snapshot_dir}...")
+                origen = self.snapshot_dir
+                opciones = {'local_files_only': True}
+                dtype = _resolver_dtype(snapshot.get('dtype'), self.device)
+            else:
+                logger.info(f"🔄 Cargando modelo {self.model_name}...")
+                origen = self.model_name
+                opciones = {'use_auth_token': self.hf_token if self.hf_token else None}
+                dtype = torch.float16 if self.device == "cuda" else torch.float32
+                
+                # Login a HuggingFace si hay token
+                if self.hf_token:
+                    login(self.hf_token)
+                    logger.info("✅ Autenticado en HuggingFace")
             
             # Cargar tokenizer
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_name,
-                use_auth_token=self.hf_token if self.hf_token else None
-            )
+            self.tokenizer = AutoTokenizer.from_pretrained(origen, **opciones)
             
             # Cargar modelo
             self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
+                origen,
                 device_map="auto",
-                use_auth_token=self.hf_token if self.hf_token else None,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
+                torch_dtype=dtype,
+                low_cpu_mem_usage=True,
+                **opciones
             )
             
+            # Modelo borrador para generación asistida (debe compartir tokenizer)
+            if self.asistencia.get('mode') == 'draft_model' and self.asistencia.get('draft_model_name'):
+                self.draft_model = AutoModelForCausalLM.from_pretrained(
+                    self.asistencia['draft_model_name'],
+                    device_map="auto",
+                    use_auth_token=self.hf_token if self.hf_token else None,
+                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
+                )
+                logger.info(f"✅ Modelo borrador {self.asistencia['draft_model_name']} cargado")
+            
             self.enabled = True
-            print(f"✅ Modelo cargado en {self.device}")
+            self.tiempos_carga.append({
+                'origen': 'snapshot' if snapshot else 'hub',
+                'segundos': round(time.perf_counter() - inicio, 3),
+            })
+            logger.info(f"✅ Modelo cargado en {self.device} ({self.tiempos_carga[-1]['segundos']:.1f} s)")
             return True
             
         except Exception as e:
-            print(f"❌ Error al cargar el modelo: {e}")
+            logger.error(f"❌ Error al cargar el modelo: {e}")
             self.enabled = False
             return False
     
-    def generar_respuesta(self, prompt, max_length=200, temperature=0.7, top_p=0.9):
+    def _argumentos_asistencia(self):
+        """
+        Argumentos de generate() para la generación asistida configurada.
+        
+        Returns:
+            dict: Vacío si la generación asistida está desactivada
+        """
+        modo = self.asistencia.get('mode')
+        if modo == 'prompt_lookup':
+            # Los candidatos se copian de n-gramas del propio prompt
+            return {'prompt_lookup_num_tokens': self.asistencia.get('prompt_lookup_num_tokens', 10)}
+        if modo == 'draft_model' and self.draft_model is not None:
+            return {'assistant_model': self.draft_model}
+        return {}
+    
+    def usa_asistencia(self, tarea):
+        """Indica si una tarea ('mejorar_respuesta', 'generar_respuesta_cientifica') usa generación asistida."""
+        return bool(self.asistencia.get('mode')) and tarea in self.asistencia.get('tasks', ())
+    
+    def presupuesto_tokens(self, max_new_tokens=None):
+        """
+        Número de tokens nuevos a generar, acotado por LIMITS['max_tokens_llm'].
+        
+        Args:
+            max_new_tokens (int): Tokens solicitados (None = valor de generation_params)
+            
+        Returns:
+            int: Presupuesto de tokens nuevos
+        """
+        solicitado = max_new_tokens or self.parametros.get('max_new_tokens', 250)
+        return max(1, min(int(solicitado), LIMITS.get('max_tokens_llm', 300)))
+    
+    def obtener_estadisticas(self):
+        """
+        Devuelve las métricas acumuladas de generación.
+        
+        Returns:
+            dict: llamadas, tokens medios generados, latencia media en segundos y caché semántica
+        """
+        llamadas = self.estadisticas['llamadas']
+        cache = get_semantic_cache()
+        return {
+            'llamadas': llamadas,
+            'tokens_medios': self.estadisticas['tokens_generados'] / llamadas if llamadas else 0.0,
+            'latencia_media': self.estadisticas['segundos'] / llamadas if llamadas else 0.0,
+            'cache_semantica': cache.obtener_estadisticas() if cache is not None else None,
+        }
+    
+    def generar_respuesta(self, prompt, max_new_tokens=None, temperature=0.7, top_p=0.9, asistido=False,
+                          stop_strings=None, max_frases=None, fin_parrafo=None, max_length=None):
         """
         Genera una respuesta usando el modelo Gemma.
         
         Args:
             prompt (str): Prompt de entrada
-            max_length (int): Longitud máxima de la respuesta
+            max_new_tokens (int): Tokens nuevos a generar (sin contar el prompt)
             temperature (float): Control de creatividad (0.0-1.0)
             top_p (float): Muestreo nucleus (0.0-1.0)
+            asistido (bool): Usar generación asistida si está configurada
+            stop_strings (list): Cadenas que terminan la respuesta
+            max_frases (int): Número máximo de frases
+            fin_parrafo (bool): Parar al terminar el primer párrafo
+            max_length (int): Obsoleto; se interpreta como max_new_tokens
             
         Returns:
             str: Respuesta generada o None si hay error
         """
-        if not self.enabled:
-            return None
-        
+        max_new_tokens = max_new_tokens or max_length
+        clave = (normalizar_clave(prompt), max_new_tokens, temperature, top_p, asistido,
+                 tuple(stop_strings) if stop_strings is not None else None, max_frases, fin_parrafo)
         try:
-            # Tokenizar entrada
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+            return _vuelos_llm.ejecutar(
+                clave, self._generar, prompt, max_new_tokens, temperature, top_p, asistido,
+                stop_strings, max_frases, fin_parrafo
+            )
+        except TimeoutError as e:
+            logger.error(f"Error al generar respuesta: {e}")
+            return None
+    
+    def _generar(self, prompt, max_new_tokens, temperature, top_p, asistido, stop_strings, max_frases, fin_parrafo):
+        """Generación de generar_respuesta() (sin coalescencia)."""
+        # Recarga el modelo si el gestor de ciclo de vida lo descargó por inactividad
+        with uso_modelo('llm'):
+            if not self.enabled:
+                return None
+            
+            try:
+                inicio = time.perf_counter()
             
-            # Generar respuesta
-            with torch.no_grad():
-                output = self.model.generate(
-                    **inputs,
-                    max_length=max_length,
-                    temperature=temperature,
-                    top_p=top_p,
-                    do_sample=True,
-                    pad_token_id=self.tokenizer.eos_token_id
+                # Tokenizar entrada
+                inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+                longitud_prompt = inputs['input_ids'].shape[1]
+            
+                criterio = CriterioParada(
+                    self.tokenizer,
+                    longitud_prompt,
+                    stop_strings=stop_strings if stop_strings is not None else self.parametros.get('stop_strings', ()),
+                    max_frases=max_frases if max_frases is not None else self.parametros.get('max_sentences'),
+                    fin_parrafo=fin_parrafo if fin_parrafo is not None else self.parametros.get('stop_on_paragraph', False)
                 )
             
-            # Decodificar respuesta
-            respuesta = self.tokenizer.decode(output[0], skip_special_tokens=True)
+                argumentos = {'do_sample': True, 'temperature': temperature, 'top_p': top_p}
+                if asistido:
+                    asistencia = self._argumentos_asistencia()
+                    argumentos.update(asistencia)
+                    # Con decodificación voraz se aceptan más candidatos del borrador
+                    if asistencia and self.asistencia.get('greedy', True):
+                        argumentos = dict(asistencia, do_sample=False)
             
-            # Limpiar el prompt de la respuesta
-            if respuesta.startswith(prompt):
-                respuesta = respuesta[len(prompt):].strip()
+                # Generar respuesta (el presupuesto cuenta solo tokens nuevos)
+                with torch.no_grad():
+                    output = self.model.generate(
+                        **inputs,
+                        max_new_tokens=self.presupuesto_tokens(max_new_tokens),
+                        stopping_criteria=StoppingCriteriaList([criterio]),
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        **argumentos
+                    )
             
-            return respuesta
+                # Decodificar solo los tokens generados, sin volver a decodificar el prompt
+                generados = output[0][longitud_prompt:]
+                respuesta = criterio.recortar(
+                    self.tokenizer.decode(generados, skip_special_tokens=True)
+                ).strip()
             
-        except Exception as e:
-            print(f"Error al generar respuesta: {e}")
-            return None
+                self.estadisticas['llamadas'] += 1
+                self.estadisticas['tokens_generados'] += int(generados.shape[0])
+                self.estadisticas['segundos'] += time.perf_counter() - inicio
+                if LOG_CONFIG.get('log_llm_calls', False):
+                    logger.info(f"LLM: {longitud_prompt} tokens de prompt, {int(generados.shape[0])} generados "
+                                f"en {time.perf_counter() - inicio:.2f} s (asistido={asistido})")
+            
+                return respuesta
+            
+            except Exception as e:
+                logger.error(f"Error al generar respuesta: {e}")
+                return None
     
     def generar_respuesta_cientifica(self, tema, pregunta_usuario, contexto=None):
         """
@@ -138,6 +461,14 @@ class GemmaLLM:
         Returns:
             str: Respuesta generada
         """
+        # Sin contexto la respuesta solo depende de (tema, pregunta): se reutiliza
+        # la de una pregunta equivalente (ver semantic_cache)
+        cache = None if contexto else get_semantic_cache()
+        if cache is not None:
+            respuesta, _, _ = cache.buscar(tema, pregunta_usuario)
+            if respuesta:
+                return respuesta
+        
         # Construir prompt especializado
         prompt = f"""Eres un asistente experto en ciencia y tecnología. Responde de manera clara, precisa y académica.
 
@@ -150,15 +481,23 @@ Pregunta del usuario: {pregunta_usuario}
         
         prompt += "\nRespuesta:"
         
-        return self.generar_respuesta(prompt, max_length=250, temperature=0.6)
+        respuesta = self.generar_respuesta(
+            prompt, max_new_tokens=250, temperature=0.6,
+            asistido=self.usa_asistencia('generar_respuesta_cientifica'),
+            stop_strings=["\nPregunta del usuario:", "\nTema:"]
+        )
+        if cache is not None and respuesta:
+            cache.guardar_respuesta(tema, pregunta_usuario, respuesta)
+        return respuesta
     
-    def mejorar_respuesta(self, respuesta_base, sentimiento_usuario=None):
+    def mejorar_respuesta(self, respuesta_base, sentimiento_usuario=None, contexto=None):
         """
         Mejora una respuesta base usando el modelo LLM.
         
         Args:
             respuesta_base (str): Respuesta original del chatbot
             sentimiento_usuario (str): Sentimiento del usuario (POS/NEG/NEU)
+            contexto (str): Turnos recientes de la conversación (opcional)
             
         Returns:
             str: Respuesta mejorada
@@ -171,13 +510,31 @@ Pregunta del usuario: {pregunta_usuario}
         
         prompt = f"""Mejora esta respuesta de chatbot sobre ciencia y tecnología.
 Debe ser {tono}, concisa y mantener el contenido técnico.
-
+"""
+        
+        if contexto:
+            prompt += f"""
+Conversación reciente:
+{contexto}
+"""
+        
+        prompt += f"""
 Respuesta original:
 {respuesta_base}
 
 Respuesta mejorada:"""
         
-        respuesta_mejorada = self.generar_respuesta(prompt, max_length=300, temperature=0.5)
+        # La respuesta mejorada copia gran parte de la original: caso ideal para prompt lookup
+        # La reescritura no necesita ser mucho más larga que la original
+        # Dentro de uso_modelo: una descarga por inactividad no puede quitar el tokenizer a mitad
+        with uso_modelo('llm'):
+            tokenizer = self.tokenizer
+            tokens_base = len(tokenizer(respuesta_base, add_special_tokens=False)['input_ids']) if tokenizer else 200
+        respuesta_mejorada = self.generar_respuesta(
+            prompt, max_new_tokens=int(tokens_base * 1.5) + 32, temperature=0.5,
+            asistido=self.usa_asistencia('mejorar_respuesta'),
+            stop_strings=["\nRespuesta original:", "\nRespuesta mejorada:"]
+        )
         
         # Si falla o es demasiado corta, devolver la original
         if not respuesta_mejorada or len(respuesta_mejorada) < 20:
@@ -188,14 +545,65 @@ Respuesta mejorada:"""
     def unload_model(self):
         """Descarga el modelo de la memoria."""
         if self.model:
-            del self.model
-            del self.tokenizer
-            if torch.cuda.is_available():
+            # Se asigna None en lugar de usar del: un hilo concurrente ve None, no AttributeError
+            self.enabled = False
+            self.model = self.tokenizer = self.draft_model = None
+            if torch is not None and torch.cuda.is_available():
                 torch.cuda.empty_cache()
-            self.model = None
-            self.tokenizer = None
+            logger.info("✅ Modelo descargado de la memoria")
+
+
+class RemoteGemmaLLM(GemmaLLM):
+    """
+    Stub RPC de GemmaLLM: los prompts se construyen localmente
+    y la generación se ejecuta en el servidor de modelos.
+    """
+
+    def __init__(self, hf_token=None, model_name=None, load_on_init=False, cliente=None):
+        from model_server import obtener_cliente
+        self.cliente = cliente or obtener_cliente()
+        self.model_name = model_name
+        self.model = None
+        self.tokenizer = None
+        self.device = 'remoto'
+        self.draft_model = None
+        self.asistencia = dict(LLM_CONFIG.get('assisted_generation', {}))
+        self.parametros = dict(LLM_CONFIG.get('generation_params', {}))
+        self.estadisticas = {'llamadas': 0, 'tokens_generados': 0, 'segundos': 0.0}
+        try:
+            self.enabled = bool(self.cliente.llamar('llm_status'))
+        except (OSError, RuntimeError):
             self.enabled = False
-            print("✅ Modelo descargado de la memoria")
+        if load_on_init and not self.enabled:
+            self.load_model()
+
+    def load_model(self):
+        try:
+            self.enabled = bool(self.cliente.llamar('llm_load'))
+        except (OSError, RuntimeError) as e:
+            logger.error(f"❌ Error al cargar el modelo remoto: {e}")
+            self.enabled = False
+        return self.enabled
+
+    def generar_respuesta(self, prompt, max_new_tokens=None, temperature=0.7, top_p=0.9, asistido=False,
+                          stop_strings=None, max_frases=None, fin_parrafo=None, max_length=None):
+        if not self.enabled:
+            return None
+        try:
+            return self.cliente.llamar('generate', prompt=prompt, max_new_tokens=max_new_tokens or max_length,
+                                       temperature=temperature, top_p=top_p, asistido=asistido,
+                                       stop_strings=stop_strings, max_frases=max_frases,
+                                       fin_parrafo=fin_parrafo)
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Error al generar respuesta (remoto): {e}")
+            return None
+
+    def unload_model(self):
+        try:
+            self.cliente.llamar('llm_unload')
+        except (OSError, RuntimeError) as e:
+            logger.error(f"⚠️ Error al descargar el modelo remoto: {e}")
+        self.enabled = False
 
 
 # Instancia global del modelo
@@ -204,6 +612,7 @@ _gemma_llm = None
 def get_gemma_llm(auto_load=False):
     """
     Obtiene la instancia global del modelo Gemma.
+    Si el servidor de modelos está activado devuelve un stub RPC con la misma interfaz.
     
     Args:
         auto_load (bool): Si cargar el modelo automáticamente
@@ -213,18 +622,27 @@ def get_gemma_llm(auto_load=False):
     """
     global _gemma_llm
     if _gemma_llm is None:
-        _gemma_llm = GemmaLLM(load_on_init=auto_load)
+        from model_server import servidor_habilitado
+        if servidor_habilitado():
+            _gemma_llm = RemoteGemmaLLM(load_on_init=auto_load)
+        else:
+            llm = GemmaLLM(load_on_init=auto_load)
+            get_lifecycle_manager().registrar(
+                'llm', llm.load_model, llm.unload_model, lambda: llm.enabled,
+                bajo_demanda=LLM_CONFIG.get('load_on_demand', False)
+            )
+            _gemma_llm = llm
     return _gemma_llm
 
 
 # Función de utilidad para generación rápida
-def generar_respuesta_llm(prompt, max_length=200):
+def generar_respuesta_llm(prompt, max_new_tokens=200):
     """
     Función de utilidad para generar respuestas rápidas.
     
     Args:
         prompt (str): Prompt de entrada
-        max_length (int): Longitud máxima
+        max_new_tokens (int): Tokens nuevos a generar
         
     Returns:
         str: Respuesta generada o None
@@ -233,7 +651,7 @@ def generar_respuesta_llm(prompt, max_length=200):
     if not llm.enabled:
         llm.load_model()
     
-    return llm.generar_respuesta(prompt, max_length=max_length)
+    return llm.generar_respuesta(prompt, max_new_tokens=max_new_tokens)
 
 
 if __name__ == "__main__":
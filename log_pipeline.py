@@ -0,0 +1,146 @@
+"""
+Módulo de logging asíncrono
+Los módulos del chatbot registran sus mensajes con logging en lugar de print.
+El hilo que atiende la petición solo encola el registro (QueueHandler con
+cola acotada: si se llena, el registro se descarta en lugar de bloquear) y
+un hilo aparte (QueueListener) lo formatea y lo escribe en la salida, así
+los hilos de las peticiones no compiten por stdout.
+El nivel sigue a VERBOSE_LOGGING (DEBUG) y LOG_CONFIG['log_errors'] decide
+si se escriben los errores.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+try:
+    from config import LOG_CONFIG, VERBOSE_LOGGING
+except ImportError:
+    LOG_CONFIG = {'log_sentiments': False, 'log_llm_calls': False, 'log_errors': True, 'queue_size': 10000}
+    VERBOSE_LOGGING = False
+
+# Logger raíz de los módulos del chatbot (no se toca el raíz de Python ni el de Flask)
+NOMBRE_RAIZ = 'chatbot'
+
+_listener = None
+_manejador = None
+_lock = threading.Lock()
+_formateador_excepciones = logging.Formatter()
+
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (y cuenta) en lugar de bloquear con la cola llena."""
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, record):
+        # Solo se fija el texto (los argumentos podrían cambiar después); el formato lo aplica el hilo escritor
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formateador_excepciones.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _SinErrores(logging.Filter):
+    """Descarta los registros de nivel ERROR o superior (LOG_CONFIG['log_errors'] = False)."""
+
+    def filter(self, record):
+        return record.levelno < logging.ERROR
+
+
+def configurar_logging(destino=None):
+    """
+    Configura el logger 'chatbot' con la cola y arranca el hilo escritor.
+    Solo tiene efecto la primera vez.
+
+    Args:
+        destino (logging.Handler): Manejador final (None = stdout)
+
+    Returns:
+        logging.Logger: Logger raíz del chatbot
+    """
+    global _listener, _manejador
+    raiz = logging.getLogger(NOMBRE_RAIZ)
+    with _lock:
+        if _listener is not None:
+            return raiz
+        if destino is None:
+            destino = logging.StreamHandler(sys.stdout)
+            # Con VERBOSE_LOGGING se añaden hora, nivel y módulo; si no, el mensaje tal cual (como los print)
+            formato = '%(asctime)s %(levelname)s %(name)s: %(message)s' if VERBOSE_LOGGING else '%(message)s'
+            destino.setFormatter(logging.Formatter(formato))
+        if not LOG_CONFIG.get('log_errors', True):
+            destino.addFilter(_SinErrores())
+
+        _manejador = _ManejadorCola(queue.Queue(LOG_CONFIG.get('queue_size', 10000)))
+        raiz.addHandler(_manejador)
+        raiz.setLevel(logging.DEBUG if VERBOSE_LOGGING else logging.INFO)
+        raiz.propagate = False
+        _listener = logging.handlers.QueueListener(_manejador.queue, destino, respect_handler_level=True)
+        _listener.start()
+        atexit.register(detener_logging)
+    return raiz
+
+
+def detener_logging():
+    """Escribe los registros pendientes y detiene el hilo escritor."""
+    global _listener, _manejador
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger(NOMBRE_RAIZ).removeHandler(_manejador)
+        _listener = None
+        _manejador = None
+
+
+def obtener_logger(nombre):
+    """
+    Logger de un módulo, colgado del logger 'chatbot'.
+
+    Args:
+        nombre (str): Normalmente __name__
+
+    Returns:
+        logging.Logger
+    """
+    configurar_logging()
+    return logging.getLogger(f"{NOMBRE_RAIZ}.{nombre}")
+
+
+def registros_descartados():
+    """
+    Returns:
+        int: Registros perdidos porque la cola estaba llena
+    """
+    return _manejador.descartados if _manejador is not None else 0
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    logger = obtener_logger('prueba')
+    logger.info("=== Prueba del Logging Asíncrono ===\n")
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(8) as ejecutor:
+        list(ejecutor.map(lambda i: logger.info("registro %d desde %s", i, threading.current_thread().name), range(200)))
+    encolado = time.perf_counter() - inicio
+    descartados = registros_descartados()
+    detener_logging()
+    print(f"\n200 registros encolados en {encolado * 1000:.1f} ms | descartados: {descartados}")
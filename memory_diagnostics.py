@@ -0,0 +1,363 @@
+"""
+Módulo de diagnóstico de memoria
+Ayuda a atribuir el crecimiento del RSS de backend.py: bytes de parámetros y
+buffers de cada modelo cargado (spaCy, pysentimiento, Gemma), tamaño del
+almacén de sesiones y, opcionalmente, instantáneas periódicas de tracemalloc
+para comparar los sitios de asignación que más han crecido. tracemalloc
+ralentiza el proceso, así que solo se activa con MEMORY_TRACING o a petición
+desde /debug/memory (solo con DEBUG_MODE).
+"""
+
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from log_pipeline import obtener_logger
+from model_lifecycle import rss_mb
+
+try:
+    from config import MEMORY_DIAGNOSTICS_CONFIG
+except ImportError:
+    MEMORY_DIAGNOSTICS_CONFIG = {'tracing': False, 'frames': 1, 'interval': 300, 'top': 20, 'session_sample': 200}
+
+logger = obtener_logger(__name__)
+
+# Asignaciones del propio tracemalloc y del sistema de importación, que no son del chatbot
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def bytes_tensores(modulos):
+    """
+    Bytes de parámetros y buffers de uno o varios módulos de torch.
+    Los tensores compartidos (p. ej. un encoder común) cuentan una vez.
+
+    Args:
+        modulos (list): Módulos torch.nn.Module
+
+    Returns:
+        int: Bytes
+    """
+    vistos, total = set(), 0
+    for modulo in modulos:
+        for tensor in list(modulo.parameters()) + list(modulo.buffers()):
+            if tensor.data_ptr() not in vistos:
+                vistos.add(tensor.data_ptr())
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def bytes_spacy(nlp):
+    """
+    Bytes de los pesos de un pipeline de spaCy (capas de thinc y vectores).
+
+    Args:
+        nlp (spacy.Language): Pipeline cargado
+
+    Returns:
+        int: Bytes
+    """
+    vistos, total = set(), 0
+    for _, componente in nlp.pipeline:
+        modelo = getattr(componente, 'model', None)
+        if modelo is None or not hasattr(modelo, 'walk'):
+            continue
+        for nodo in modelo.walk():
+            # Los listeners de tok2vec comparten nodos entre componentes
+            if id(nodo) in vistos:
+                continue
+            vistos.add(id(nodo))
+            for nombre in nodo.param_names:
+                if nodo.has_param(nombre):
+                    total += nodo.get_param(nombre).nbytes
+    vectores = getattr(nlp.vocab.vectors, 'data', None)
+    if vectores is not None:
+        total += vectores.nbytes
+    return total
+
+
+def bytes_modelo(objeto):
+    """
+    Bytes de un modelo: módulo de torch, pipeline de spaCy o lista de ellos.
+
+    Returns:
+        int: Bytes (0 si no está cargado o no se reconoce)
+    """
+    if objeto is None:
+        return 0
+    if isinstance(objeto, (list, tuple)):
+        modulos = [o for o in objeto if hasattr(o, 'parameters')]
+        otros = [o for o in objeto if o is not None and not hasattr(o, 'parameters')]
+        return bytes_tensores(modulos) + sum(bytes_modelo(o) for o in otros)
+    if hasattr(objeto, 'parameters') and hasattr(objeto, 'buffers'):
+        return bytes_tensores([objeto])
+    if hasattr(objeto, 'pipeline') and hasattr(objeto, 'vocab'):
+        return bytes_spacy(objeto)
+    return 0
+
+
+def tamano_profundo(objeto):
+    """
+    Tamaño aproximado en bytes de un objeto y todo lo que contiene
+    (dicts, listas, tuplas, conjuntos, deques y atributos de instancias).
+
+    Args:
+        objeto: Objeto a medir (p. ej. el estado de una sesión)
+
+    Returns:
+        int: Bytes según sys.getsizeof, sin contar dos veces los objetos compartidos
+    """
+    vistos, total, pendientes = set(), 0, [objeto]
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos or isinstance(actual, type):
+            continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, (list, tuple, set, frozenset, deque)):
+            pendientes.extend(actual)
+        else:
+            if hasattr(actual, '__dict__'):
+                pendientes.append(vars(actual))
+            for ranura in getattr(type(actual), '__slots__', ()):
+                if hasattr(actual, ranura):
+                    pendientes.append(getattr(actual, ranura))
+    return total
+
+
+class MemoryDiagnostics:
+    """
+    Punto único de consulta de la memoria del proceso.
+    Los módulos registran cómo obtener sus modelos y el almacén de sesiones;
+    informe() reúne RSS, modelos, sesiones y la comparación de instantáneas.
+    """
+
+    def __init__(self, marcos=1, intervalo=300, top=20, muestra_sesiones=200):
+        """
+        Args:
+            marcos (int): Marcos de pila que guarda tracemalloc por asignación
+            intervalo (float): Segundos entre instantáneas automáticas (0 = solo a petición)
+            top (int): Sitios de asignación por defecto en el informe
+            muestra_sesiones (int): Sesiones medidas para estimar el tamaño del almacén
+        """
+        self.marcos = marcos
+        self.intervalo = intervalo
+        self.top = top
+        self.muestra_sesiones = muestra_sesiones
+        self._modelos = {}
+        self._store = None
+        self._inicial = None
+        self._anterior = None
+        self._actual = None
+        self._historial_rss = deque(maxlen=288)  # (instante, MiB); 24 h con el intervalo por defecto
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def registrar_modelo(self, nombre, obtener):
+        """
+        Args:
+            nombre (str): Nombre del modelo en el informe
+            obtener (callable): Devuelve el modelo cargado (torch/spaCy o lista) o None
+        """
+        self._modelos[nombre] = obtener
+
+    def registrar_sesiones(self, store):
+        """
+        Args:
+            store (SessionStore): Almacén de sesiones de backend.py
+        """
+        self._store = store
+
+    @property
+    def trazando(self):
+        return tracemalloc.is_tracing()
+
+    def iniciar(self):
+        """Arranca las muestras periódicas (RSS y, si se está trazando, instantánea de tracemalloc)."""
+        if self.intervalo and self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name='diagnostico-memoria', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        """Detiene las muestras periódicas."""
+        self._detener.set()
+
+    def iniciar_trazado(self):
+        """Activa tracemalloc y toma la instantánea inicial."""
+        with self._lock:
+            if tracemalloc.is_tracing() and self._inicial is not None:
+                return
+            tracemalloc.start(self.marcos)
+        self.tomar_instantanea()
+        self.iniciar()
+
+    def detener_trazado(self):
+        """Desactiva tracemalloc y descarta las instantáneas."""
+        with self._lock:
+            tracemalloc.stop()
+            self._inicial = self._anterior = self._actual = None
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.tomar_instantanea()
+            except Exception as e:
+                logger.warning(f"⚠️ Error en la instantánea de memoria: {e}")
+
+    def tomar_instantanea(self):
+        """Guarda el RSS actual y, si tracemalloc está activo, una instantánea filtrada."""
+        self._historial_rss.append((time.time(), round(rss_mb(), 1)))
+        if not tracemalloc.is_tracing():
+            return
+        instantanea = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        with self._lock:
+            if self._inicial is None:
+                self._inicial = instantanea
+            self._anterior, self._actual = self._actual, instantanea
+
+    def sitios(self, top=None, referencia='anterior', agrupar='lineno'):
+        """
+        Sitios de asignación que más han crecido.
+
+        Args:
+            top (int): Número de sitios
+            referencia (str): 'anterior' (penúltima instantánea) o 'inicial'
+            agrupar (str): 'lineno', 'filename' o 'traceback'
+
+        Returns:
+            list: [{'sitio', 'kib', 'diferencia_kib', 'bloques', 'diferencia_bloques'}]
+        """
+        with self._lock:
+            actual = self._actual
+            base = self._inicial if referencia == 'inicial' else self._anterior
+        if actual is None:
+            return []
+        if base is None or base is actual:
+            estadisticas = actual.statistics(agrupar)
+        else:
+            estadisticas = actual.compare_to(base, agrupar)
+        resultado = []
+        for estadistica in estadisticas[:top or self.top]:
+            marco = estadistica.traceback[0]
+            resultado.append({
+                'sitio': f"{marco.filename}:{marco.lineno}",
+                'kib': round(estadistica.size / 1024, 1),
+                'diferencia_kib': round(getattr(estadistica, 'size_diff', 0) / 1024, 1),
+                'bloques': estadistica.count,
+                'diferencia_bloques': getattr(estadistica, 'count_diff', 0),
+            })
+        return resultado
+
+    def modelos(self):
+        """
+        Returns:
+            dict: {nombre: {'cargado': bool, 'mib': float}} de los modelos registrados
+        """
+        resultado = {}
+        for nombre, obtener in self._modelos.items():
+            try:
+                objeto = obtener()
+                resultado[nombre] = {'cargado': objeto is not None, 'mib': round(bytes_modelo(objeto) / 2**20, 1)}
+            except Exception as e:
+                resultado[nombre] = {'cargado': None, 'error': str(e)}
+        return resultado
+
+    def sesiones(self):
+        """
+        Returns:
+            dict: Sesiones activas y, si se guardan en este proceso, bytes estimados
+                  a partir de una muestra (en Redis la memoria es del servidor)
+        """
+        if self._store is None:
+            return {}
+        total = self._store.contar()
+        muestra = self._store.muestra(self.muestra_sesiones)
+        if not muestra:
+            return {'sesiones': total, 'en_proceso': False}
+        media = sum(tamano_profundo(estado) for estado in muestra) / len(muestra)
+        return {
+            'sesiones': total,
+            'en_proceso': True,
+            'bytes_medios': round(media),
+            'mib_estimados': round(media * total / 2**20, 2),
+        }
+
+    def informe(self, top=None, referencia='anterior', instantanea=False):
+        """
+        Informe completo para /debug/memory.
+
+        Args:
+            top (int): Sitios de asignación
+            referencia (str): 'anterior' o 'inicial'
+            instantanea (bool): Tomar una instantánea nueva antes de comparar
+
+        Returns:
+            dict: RSS e historial, tracemalloc, sitios, modelos, sesiones y recolector de basura
+        """
+        if instantanea:
+            self.tomar_instantanea()
+        datos = {
+            'rss_mb': round(rss_mb(), 1),
+            'historial_rss': list(self._historial_rss),
+            'tracemalloc': self.trazando,
+            'modelos': self.modelos(),
+            'sesiones': self.sesiones(),
+            'gc': {'conteos': gc.get_count(), 'objetos': len(gc.get_objects())},
+        }
+        if self.trazando:
+            actual, pico = tracemalloc.get_traced_memory()
+            datos['trazado_mb'] = {'actual': round(actual / 2**20, 1), 'pico': round(pico / 2**20, 1)}
+            datos['referencia'] = referencia
+            datos['sitios'] = self.sitios(top, referencia)
+        return datos
+
+
+# Instancia global del diagnóstico
+_memory_diagnostics = None
+
+def get_memory_diagnostics():
+    """
+    Obtiene el diagnóstico de memoria global según MEMORY_DIAGNOSTICS_CONFIG.
+    El RSS se muestrea cada 'interval' segundos; con 'tracing' activo,
+    tracemalloc empieza a registrar desde este momento.
+    """
+    global _memory_diagnostics
+    if _memory_diagnostics is None:
+        _memory_diagnostics = MemoryDiagnostics(
+            marcos=MEMORY_DIAGNOSTICS_CONFIG.get('frames', 1),
+            intervalo=MEMORY_DIAGNOSTICS_CONFIG.get('interval', 300),
+            top=MEMORY_DIAGNOSTICS_CONFIG.get('top', 20),
+            muestra_sesiones=MEMORY_DIAGNOSTICS_CONFIG.get('session_sample', 200)
+        )
+        if MEMORY_DIAGNOSTICS_CONFIG.get('tracing', False):
+            _memory_diagnostics.iniciar_trazado()
+        else:
+            _memory_diagnostics.iniciar()
+    return _memory_diagnostics
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Diagnóstico de Memoria ===\n")
+
+    diagnostico = MemoryDiagnostics(intervalo=0, top=5)
+    diagnostico.iniciar_trazado()
+    fuga = []
+    for i in range(20000):
+        fuga.append({'turno': i, 'texto': f"mensaje {i}" * 5})
+    informe = diagnostico.informe(instantanea=True, referencia='inicial')
+    print(f"RSS: {informe['rss_mb']} MiB | trazado: {informe['trazado_mb']}")
+    for sitio in informe['sitios']:
+        print(f"  {sitio['diferencia_kib']:>10.1f} KiB  {sitio['sitio']}")
+    print(f"\nTamaño profundo de la lista: {tamano_profundo(fuga) / 2**20:.1f} MiB")
@@ -0,0 +1,256 @@
+"""
+Módulo de control adaptativo del modo de operación
+Vigila el p95 de latencia de /chat y las peticiones en curso y, cuando se
+incumple el objetivo (SLO), baja un escalón el modo efectivo de las nuevas
+peticiones (p. ej. hybrid → basic o llm → basic) para dejar de ejecutar
+las etapas caras. Sube de nuevo cuando la latencia se recupera con margen
+(histéresis) y tras un tiempo de espera, para no oscilar.
+OPERATION_MODE es el techo: el controlador nunca activa etapas que el modo
+configurado no tenga.
+"""
+
+import threading
+import time
+from collections import deque
+
+from log_pipeline import obtener_logger
+
+try:
+    from config import MODE_CONTROLLER_CONFIG, MODE_SETTINGS, OPERATION_MODE
+except ImportError:
+    MODE_CONTROLLER_CONFIG = {'enabled': False}
+    MODE_SETTINGS = {
+        'basic': {'sentiment': False, 'llm': False},
+        'sentiment': {'sentiment': True, 'llm': False},
+        'llm': {'sentiment': False, 'llm': True},
+        'hybrid': {'sentiment': True, 'llm': False},
+    }
+    OPERATION_MODE = 'hybrid'
+
+logger = obtener_logger(__name__)
+
+# De más barato a más caro
+ORDEN_MODOS = ('basic', 'sentiment', 'hybrid', 'llm')
+
+
+def _etapas(modo):
+    ajustes = MODE_SETTINGS.get(modo, MODE_SETTINGS['hybrid'])
+    return frozenset(e for e in ('sentiment', 'llm') if ajustes[e])
+
+
+def escalera_modos(modo_maximo):
+    """
+    Escalones disponibles hasta el modo configurado, de más barato a más caro.
+    Cada escalón activa un subconjunto estricto de las etapas del superior, de
+    modo que bajar nunca enciende una etapa (con OPERATION_MODE=llm se baja a
+    basic, no a hybrid). Entre modos con las mismas etapas (p. ej. sentiment y
+    hybrid) se conserva el más alto.
+
+    Args:
+        modo_maximo (str): OPERATION_MODE
+
+    Returns:
+        list: Nombres de modo
+    """
+    if modo_maximo not in ORDEN_MODOS:
+        modo_maximo = 'hybrid'
+    escalera = [modo_maximo]
+    for modo in reversed(ORDEN_MODOS[:ORDEN_MODOS.index(modo_maximo)]):
+        if _etapas(modo) < _etapas(escalera[0]):
+            escalera.insert(0, modo)
+    return escalera
+
+
+def etapas_de_modo(modo, modo_maximo=OPERATION_MODE):
+    """
+    Args:
+        modo (str): Modo efectivo
+        modo_maximo (str): Modo configurado (techo)
+
+    Returns:
+        dict: {'sentimiento': bool, 'llm': bool} que el modo permite sin superar el techo
+    """
+    etapas = _etapas(modo) & _etapas(modo_maximo)
+    return {'sentimiento': 'sentiment' in etapas, 'llm': 'llm' in etapas}
+
+
+class ModeController:
+    """
+    Controlador del modo efectivo.
+    Cada petición de /chat se envuelve en peticion(), que devuelve el modo
+    con el que debe atenderse y registra su latencia al terminar.
+    """
+
+    def __init__(self, modo_maximo='hybrid', slo_p95_ms=2000, max_en_curso=16, muestras=200,
+                 ventana_segundos=30, min_muestras=20, espera_bajada=5, espera_subida=30, margen_subida=0.5):
+        """
+        Args:
+            modo_maximo (str): Modo configurado (techo)
+            slo_p95_ms (float): Objetivo de p95 de latencia
+            max_en_curso (int): Peticiones simultáneas a partir de las que se baja de modo
+            muestras (int): Latencias recientes que se conservan
+            ventana_segundos (float): Antigüedad máxima de las latencias que cuentan
+            min_muestras (int): Latencias necesarias para decidir por p95
+            espera_bajada (float): Segundos mínimos entre dos bajadas
+            espera_subida (float): Segundos mínimos desde el último cambio antes de subir
+            margen_subida (float): Solo se sube si p95 < slo × margen (histéresis)
+        """
+        self.escalera = escalera_modos(modo_maximo)
+        self.nivel = len(self.escalera) - 1
+        self.slo = slo_p95_ms / 1000.0
+        self.max_en_curso = max_en_curso
+        self.ventana_segundos = ventana_segundos
+        self.min_muestras = min_muestras
+        self.espera_bajada = espera_bajada
+        self.espera_subida = espera_subida
+        self.margen_subida = margen_subida
+        self.en_curso = 0
+        self._latencias = deque(maxlen=muestras)  # (instante, segundos, nivel)
+        self._ultimo_cambio = time.monotonic()
+        self._lock = threading.Lock()
+        self.peticiones_por_modo = {modo: 0 for modo in self.escalera}
+        self.cambios = deque(maxlen=100)
+
+    @property
+    def modo(self):
+        """Modo efectivo actual."""
+        return self.escalera[self.nivel]
+
+    def _p95(self, ahora):
+        """p95 (s) de las latencias recientes medidas en el nivel actual, o None si hay pocas."""
+        recientes = sorted(
+            segundos for instante, segundos, nivel in self._latencias
+            if nivel == self.nivel and ahora - instante <= self.ventana_segundos
+        )
+        if len(recientes) < self.min_muestras:
+            return None
+        return recientes[int(len(recientes) * 0.95) - 1]
+
+    def _cambiar(self, nivel, motivo, ahora):
+        anterior = self.modo
+        self.nivel = nivel
+        self._ultimo_cambio = ahora
+        self.cambios.append({'instante': time.time(), 'de': anterior, 'a': self.modo, 'motivo': motivo})
+        logger.info(f"🔄 Modo efectivo: {anterior} → {self.modo} ({motivo})")
+
+    def _evaluar(self, ahora):
+        """Decide si cambiar de escalón (con _lock tomado)."""
+        desde_cambio = ahora - self._ultimo_cambio
+        p95 = self._p95(ahora)
+        saturado = self.en_curso > self.max_en_curso
+        lento = p95 is not None and p95 > self.slo
+
+        if (saturado or lento) and self.nivel > 0 and desde_cambio >= self.espera_bajada:
+            motivo = f"{self.en_curso} en curso" if saturado else f"p95 {p95 * 1000:.0f} ms"
+            self._cambiar(self.nivel - 1, motivo, ahora)
+        elif (self.nivel < len(self.escalera) - 1 and desde_cambio >= self.espera_subida
+              and self.en_curso <= self.max_en_curso // 2
+              and p95 is not None and p95 < self.slo * self.margen_subida):
+            # Solo se sube con latencias medidas en este escalón (sin tráfico no hay evidencia)
+            self._cambiar(self.nivel + 1, f"p95 {p95 * 1000:.0f} ms", ahora)
+
+    def entrar(self):
+        """
+        Registra el inicio de una petición.
+
+        Returns:
+            tuple: (modo, nivel, instante) para pasar a salir()
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            self.en_curso += 1
+            self._evaluar(ahora)
+            self.peticiones_por_modo[self.modo] += 1
+            return self.modo, self.nivel, ahora
+
+    def salir(self, ficha):
+        """
+        Registra el final de una petición.
+
+        Args:
+            ficha (tuple): Valor devuelto por entrar()
+        """
+        _, nivel, inicio = ficha
+        ahora = time.monotonic()
+        with self._lock:
+            self.en_curso -= 1
+            self._latencias.append((ahora, ahora - inicio, nivel))
+
+    def peticion(self):
+        """Context manager: `with controlador.peticion() as modo:`."""
+        return _Peticion(self)
+
+    def estado(self):
+        """
+        Returns:
+            dict: Modo efectivo y máximo, p95, peticiones en curso, peticiones por modo y cambios recientes
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            p95 = self._p95(ahora)
+            return {
+                'modo_efectivo': self.modo,
+                'modo_maximo': self.escalera[-1],
+                'escalera': list(self.escalera),
+                'slo_p95_ms': self.slo * 1000,
+                'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+                'en_curso': self.en_curso,
+                'peticiones_por_modo': dict(self.peticiones_por_modo),
+                'cambios': list(self.cambios),
+            }
+
+
+class _Peticion:
+    __slots__ = ('controlador', 'ficha')
+
+    def __init__(self, controlador):
+        self.controlador = controlador
+        self.ficha = None
+
+    def __enter__(self):
+        self.ficha = self.controlador.entrar()
+        return self.ficha[0]
+
+    def __exit__(self, *exc):
+        self.controlador.salir(self.ficha)
+        return False
+
+
+def crear_controlador():
+    """
+    Crea el controlador según MODE_CONTROLLER_CONFIG.
+
+    Returns:
+        ModeController: Instancia o None si está desactivado
+    """
+    if not MODE_CONTROLLER_CONFIG.get('enabled', False):
+        return None
+    return ModeController(
+        OPERATION_MODE,
+        slo_p95_ms=MODE_CONTROLLER_CONFIG.get('slo_p95_ms', 2000),
+        max_en_curso=MODE_CONTROLLER_CONFIG.get('max_in_flight', 16),
+        muestras=MODE_CONTROLLER_CONFIG.get('samples', 200),
+        ventana_segundos=MODE_CONTROLLER_CONFIG.get('window_seconds', 30),
+        min_muestras=MODE_CONTROLLER_CONFIG.get('min_samples', 20),
+        espera_bajada=MODE_CONTROLLER_CONFIG.get('cooldown_down', 5),
+        espera_subida=MODE_CONTROLLER_CONFIG.get('cooldown_up', 30),
+        margen_subida=MODE_CONTROLLER_CONFIG.get('recovery_ratio', 0.5)
+    )
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Controlador de Modo ===\n")
+
+    for modo in ORDEN_MODOS:
+        print(f"Escalera con OPERATION_MODE={modo}: {escalera_modos(modo)}")
+
+    controlador = ModeController('llm', slo_p95_ms=50, min_muestras=5, espera_bajada=0, espera_subida=0.2)
+    print()
+    # Latencia simulada por modo: con SLO de 50 ms baja a basic (nunca a hybrid, que
+    # activaría el sentimiento) y solo reintenta llm tras la espera de subida
+    latencias = {'llm': 0.08, 'basic': 0.005}
+    for _ in range(60):
+        with controlador.peticion() as modo:
+            time.sleep(latencias[modo])
+    print(f"\nEstado: {controlador.estado()['modo_efectivo']} | {controlador.estado()['peticiones_por_modo']}")
@@ -0,0 +1,336 @@
+"""
+Módulo de ciclo de vida de los modelos pesados
+Registra Gemma, pysentimiento y spaCy, anota su último uso y los descarga
+tras un tiempo de inactividad o cuando el RSS del proceso supera un presupuesto.
+Los modelos descargados se recargan bajo demanda en el siguiente uso.
+"""
+
+import gc
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from log_pipeline import obtener_logger
+
+try:
+    from config import LIFECYCLE_CONFIG
+except ImportError:
+    LIFECYCLE_CONFIG = {'enabled': True, 'idle_timeout': 1800, 'rss_budget_mb': None,
+                        'check_interval': 30, 'retry_after': 60}
+
+logger = obtener_logger(__name__)
+
+
+def rss_mb():
+    """RSS actual del proceso en MiB (Linux /proc o psutil; 0.0 si no se puede medir)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except Exception:
+        return 0.0
+
+
+def _liberar_memoria():
+    """Recolecta basura y devuelve al sistema la memoria libre del heap (glibc)."""
+    gc.collect()
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except Exception:
+        pass
+
+
+class _ModeloGestionado:
+    """Entrada del registro: funciones de carga/descarga y contadores de uso."""
+
+    __slots__ = ('nombre', 'cargar', 'descargar', 'cargado', 'bajo_demanda', 'lock', 'en_uso',
+                 'ultimo_uso', 'cargas', 'descargas', 'segundos_carga', 'ultimo_fallo', 'descargado_por_gestor')
+
+    def __init__(self, nombre, cargar, descargar, cargado, bajo_demanda):
+        self.nombre = nombre
+        self.cargar = cargar
+        self.descargar = descargar
+        self.cargado = cargado
+        self.bajo_demanda = bajo_demanda
+        # Serializa carga, descarga y cambios de en_uso de este modelo
+        self.lock = threading.RLock()
+        self.en_uso = 0
+        self.ultimo_uso = time.monotonic()
+        self.cargas = 0
+        self.descargas = 0
+        self.segundos_carga = []
+        self.ultimo_fallo = None
+        self.descargado_por_gestor = False
+
+
+class ModelLifecycleManager:
+    """
+    Gestor de carga y descarga de modelos.
+    Un modelo en uso (dentro de usar()) nunca se descarga; los inactivos se
+    descargan por tiempo o, si se supera el presupuesto de RSS, del menos
+    usado recientemente al más reciente.
+    """
+
+    def __init__(self, idle_timeout=1800, rss_budget_mb=None, check_interval=30, retry_after=60):
+        """
+        Args:
+            idle_timeout (float): Segundos sin uso tras los que se descarga un modelo (None = nunca)
+            rss_budget_mb (float): RSS máximo del proceso en MiB (None = sin límite)
+            check_interval (float): Segundos entre revisiones del hilo de fondo
+            retry_after (float): Segundos antes de reintentar una carga fallida
+        """
+        self.idle_timeout = idle_timeout
+        self.rss_budget_mb = rss_budget_mb
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self._modelos = {}
+        self._lock = threading.Lock()
+        self._hilo = None
+        self.eventos = deque(maxlen=200)
+
+    def registrar(self, nombre, cargar, descargar, cargado, bajo_demanda=True):
+        """
+        Registra un modelo.
+
+        Args:
+            nombre (str): Identificador ('llm', 'sentimiento', 'spacy')
+            cargar (callable): Carga el modelo; retorna False si falla
+            descargar (callable): Libera el modelo
+            cargado (callable): Retorna True si el modelo está en memoria
+            bajo_demanda (bool): Cargar en el primer uso aunque nunca se haya cargado
+        """
+        with self._lock:
+            self._modelos[nombre] = _ModeloGestionado(nombre, cargar, descargar, cargado, bajo_demanda)
+
+    def registrado(self, nombre):
+        return nombre in self._modelos
+
+    def disponible(self, nombre):
+        """True si el modelo está cargado o el gestor puede cargarlo en el próximo uso."""
+        entrada = self._modelos.get(nombre)
+        if entrada is None:
+            return False
+        return entrada.cargado() or entrada.bajo_demanda or entrada.descargado_por_gestor
+
+    def _evento(self, nombre, evento, motivo=None, segundos=None):
+        self.eventos.append({
+            'modelo': nombre, 'evento': evento, 'motivo': motivo,
+            'segundos': round(segundos, 3) if segundos is not None else None,
+            'timestamp': time.time(), 'rss_mb': round(rss_mb(), 1),
+        })
+
+    def _cargar(self, entrada):
+        """Carga un modelo (con entrada.lock tomado) y registra el arranque en frío."""
+        if entrada.ultimo_fallo and time.monotonic() - entrada.ultimo_fallo < self.retry_after:
+            return False
+        inicio = time.perf_counter()
+        try:
+            ok = entrada.cargar() is not False and entrada.cargado()
+        except Exception as e:
+            logger.error(f"❌ Error al cargar {entrada.nombre}: {e}")
+            ok = False
+        segundos = time.perf_counter() - inicio
+
+        if not ok:
+            entrada.ultimo_fallo = time.monotonic()
+            self._evento(entrada.nombre, 'error_carga', segundos=segundos)
+            return False
+
+        entrada.ultimo_fallo = None
+        entrada.cargas += 1
+        entrada.segundos_carga.append(segundos)
+        del entrada.segundos_carga[:-20]
+        motivo = 'recarga' if entrada.descargado_por_gestor else 'primer_uso'
+        entrada.descargado_por_gestor = False
+        self._evento(entrada.nombre, 'carga', motivo, segundos)
+        logger.info(f"🔄 Modelo {entrada.nombre} cargado en {segundos:.2f} s ({motivo})")
+        return True
+
+    @contextmanager
+    def usar(self, nombre):
+        """
+        Marca un modelo como en uso mientras dura el bloque, cargándolo si hace falta.
+        Con un nombre no registrado no hace nada.
+
+        Args:
+            nombre (str): Identificador del modelo
+        """
+        entrada = self._modelos.get(nombre)
+        if entrada is None:
+            yield
+            return
+
+        with entrada.lock:
+            if not entrada.cargado() and (entrada.bajo_demanda or entrada.descargado_por_gestor):
+                self._cargar(entrada)
+            entrada.en_uso += 1
+        try:
+            yield
+        finally:
+            with entrada.lock:
+                entrada.en_uso -= 1
+                entrada.ultimo_uso = time.monotonic()
+
+    def descargar(self, nombre, motivo='manual'):
+        """
+        Descarga un modelo si está cargado y nadie lo está usando.
+
+        Returns:
+            bool: True si se descargó
+        """
+        entrada = self._modelos.get(nombre)
+        if entrada is None or not entrada.lock.acquire(blocking=False):
+            return False
+        try:
+            if entrada.en_uso or not entrada.cargado():
+                return False
+            inicio = time.perf_counter()
+            entrada.descargar()
+            entrada.descargas += 1
+            entrada.descargado_por_gestor = True
+        finally:
+            entrada.lock.release()
+
+        _liberar_memoria()
+        self._evento(nombre, 'descarga', motivo, time.perf_counter() - inicio)
+        logger.info(f"✅ Modelo {nombre} descargado ({motivo})")
+        return True
+
+    def revisar(self):
+        """
+        Aplica las políticas de inactividad y presupuesto de memoria una vez.
+
+        Returns:
+            list: Modelos descargados
+        """
+        ahora = time.monotonic()
+        descargados = []
+
+        if self.idle_timeout is not None:
+            for nombre, entrada in list(self._modelos.items()):
+                if not entrada.en_uso and ahora - entrada.ultimo_uso >= self.idle_timeout:
+                    if self.descargar(nombre, 'inactividad'):
+                        descargados.append(nombre)
+
+        if self.rss_budget_mb:
+            candidatos = sorted(
+                (e for e in self._modelos.values() if not e.en_uso and e.cargado()),
+                key=lambda e: e.ultimo_uso
+            )
+            for entrada in candidatos:
+                if rss_mb() <= self.rss_budget_mb:
+                    break
+                if self.descargar(entrada.nombre, 'presupuesto_memoria'):
+                    descargados.append(entrada.nombre)
+
+        return descargados
+
+    def _bucle(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.revisar()
+            except Exception as e:
+                logger.error(f"Error en la revisión de modelos: {e}")
+
+    def iniciar(self):
+        """Arranca (una sola vez) el hilo de fondo que revisa los modelos."""
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name='ciclo-vida-modelos', daemon=True)
+                self._hilo.start()
+
+    def estado(self):
+        """
+        Resume el estado de los modelos registrados.
+
+        Returns:
+            dict: Por modelo: cargado, en uso, segundos de inactividad, cargas,
+                  descargas y arranque en frío medio/último; más RSS y eventos recientes
+        """
+        ahora = time.monotonic()
+        modelos = {}
+        for nombre, entrada in self._modelos.items():
+            tiempos = entrada.segundos_carga
+            modelos[nombre] = {
+                'cargado': bool(entrada.cargado()),
+                'en_uso': entrada.en_uso,
+                'inactivo_segundos': round(ahora - entrada.ultimo_uso, 1),
+                'cargas': entrada.cargas,
+                'descargas': entrada.descargas,
+                'arranque_frio_ultimo': round(tiempos[-1], 3) if tiempos else None,
+                'arranque_frio_medio': round(sum(tiempos) / len(tiempos), 3) if tiempos else None,
+            }
+        return {
+            'rss_mb': round(rss_mb(), 1),
+            'rss_budget_mb': self.rss_budget_mb,
+            'idle_timeout': self.idle_timeout,
+            'modelos': modelos,
+            'eventos': list(self.eventos)[-20:],
+        }
+
+
+# Instancia global del gestor
+_gestor = None
+_gestor_lock = threading.Lock()
+
+
+def get_lifecycle_manager():
+    """
+    Obtiene la instancia global del gestor de modelos.
+    Si LIFECYCLE_CONFIG lo desactiva, registra los modelos pero no los descarga nunca.
+
+    Returns:
+        ModelLifecycleManager: Instancia del gestor
+    """
+    global _gestor
+    with _gestor_lock:
+        if _gestor is None:
+            activo = LIFECYCLE_CONFIG.get('enabled', True)
+            _gestor = ModelLifecycleManager(
+                idle_timeout=LIFECYCLE_CONFIG.get('idle_timeout', 1800) if activo else None,
+                rss_budget_mb=LIFECYCLE_CONFIG.get('rss_budget_mb') if activo else None,
+                check_interval=LIFECYCLE_CONFIG.get('check_interval', 30),
+                retry_after=LIFECYCLE_CONFIG.get('retry_after', 60)
+            )
+            if activo:
+                _gestor.iniciar()
+    return _gestor
+
+
+def uso_modelo(nombre):
+    """Atajo: contexto get_lifecycle_manager().usar(nombre)."""
+    return get_lifecycle_manager().usar(nombre)
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Gestor de Ciclo de Vida ===\n")
+
+    modelo = {'datos': None}
+
+    def cargar():
+        time.sleep(0.2)
+        modelo['datos'] = bytearray(50 * 2**20)
+
+    def descargar():
+        modelo['datos'] = None
+
+    gestor = ModelLifecycleManager(idle_timeout=0.5, check_interval=0.1)
+    gestor.registrar('demo', cargar, descargar, lambda: modelo['datos'] is not None)
+
+    with gestor.usar('demo'):
+        print(f"En uso, revisión descarga: {gestor.revisar()}")
+    time.sleep(0.6)
+    print(f"Tras inactividad descarga: {gestor.revisar()}")
+    with gestor.usar('demo'):
+        pass
+    print(f"\nEstado: {gestor.estado()['modelos']['demo']}")
@@ -0,0 +1,413 @@
+"""
+Servidor local de modelos para separar la inferencia de la capa web
+Un único proceso carga spaCy, pysentimiento y Gemma; los workers de Flask
+se conectan por socket Unix (o TCP local) con un protocolo binario de
+mensajes con prefijo de longitud y el servidor agrupa en lotes las peticiones
+de sentimiento que llegan de muchos workers a la vez.
+
+Uso:
+    python model_server.py          # Inicia el servidor
+    MODEL_SERVER=true python backend.py   # Workers ligeros que delegan en él
+"""
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from sentiment_analyzer import SentimentAnalyzer, get_sentiment_analyzer
+from model_lifecycle import get_lifecycle_manager
+from single_flight import estadisticas_coalescencia
+from log_pipeline import obtener_logger
+
+try:
+    from config import MODEL_SERVER_CONFIG
+except ImportError:
+    MODEL_SERVER_CONFIG = {'enabled': False, 'address': '/tmp/scitech_models.sock',
+                           'batch_max_size': 16, 'batch_wait_ms': 5, 'timeout': 60}
+
+logger = obtener_logger(__name__)
+
+# Cabecera de cada mensaje: longitud del cuerpo JSON (uint32 big-endian)
+_CABECERA = struct.Struct('!I')
+_MAX_MENSAJE = 16 * 1024 * 1024
+
+# Operaciones sin efectos que se pueden reenviar si se pierde la respuesta
+OPERACIONES_REPETIBLES = frozenset((
+    'ping', 'sentiment', 'sentiment_batch', 'sentiment_status', 'analisis', 'llm_status', 'stats', 'models'
+))
+
+# True dentro del propio proceso servidor: allí los getters devuelven modelos reales
+_ES_SERVIDOR = False
+
+
+def servidor_habilitado():
+    """Indica si este proceso debe delegar la inferencia en el servidor de modelos."""
+    return MODEL_SERVER_CONFIG.get('enabled', False) and not _ES_SERVIDOR
+
+
+def _parsear_direccion(direccion):
+    """
+    Convierte la dirección configurada en (familia, dirección de socket).
+    'host:puerto' usa TCP; cualquier otra cadena es la ruta de un socket Unix.
+    """
+    if ':' in direccion and '/' not in direccion and '\\' not in direccion:
+        host, puerto = direccion.rsplit(':', 1)
+        return socket.AF_INET, (host, int(puerto))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise OSError("Los sockets Unix no están disponibles; usa una dirección 'host:puerto'")
+    return socket.AF_UNIX, direccion
+
+
+def enviar_mensaje(sock, datos):
+    """Envía un objeto como JSON con prefijo de longitud."""
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    sock.sendall(_CABECERA.pack(len(cuerpo)) + cuerpo)
+
+
+def _leer_exacto(sock, n):
+    partes = []
+    while n:
+        parte = sock.recv(n)
+        if not parte:
+            raise ConnectionError("Conexión cerrada por el otro extremo")
+        partes.append(parte)
+        n -= len(parte)
+    return b''.join(partes)
+
+
+def recibir_mensaje(sock):
+    """Lee un mensaje con prefijo de longitud y lo decodifica."""
+    (longitud,) = _CABECERA.unpack(_leer_exacto(sock, _CABECERA.size))
+    if longitud > _MAX_MENSAJE:
+        raise ValueError(f"Mensaje demasiado grande: {longitud} bytes")
+    return json.loads(_leer_exacto(sock, longitud).decode('utf-8'))
+
+
+# ========== SERVIDOR ==========
+
+class _PeticionPendiente:
+    """Petición de sentimiento a la espera de su lote."""
+
+    __slots__ = ('texto', 'evento', 'resultado')
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.evento = threading.Event()
+        self.resultado = None
+
+
+class ServidorModelos:
+    """
+    Aloja los modelos y atiende a los workers.
+    Cada conexión se atiende en su hilo; las peticiones de sentimiento pasan
+    por una cola y un hilo agrupador las ejecuta en lotes.
+    """
+
+    def __init__(self, direccion=None, batch_max_size=16, batch_wait_ms=5):
+        """
+        Args:
+            direccion (str): Ruta del socket Unix o 'host:puerto'
+            batch_max_size (int): Máximo de textos por lote de sentimiento
+            batch_wait_ms (float): Espera máxima para completar un lote
+        """
+        self.direccion = direccion or MODEL_SERVER_CONFIG.get('address', '/tmp/scitech_models.sock')
+        self.batch_max_size = batch_max_size
+        self.batch_wait = batch_wait_ms / 1000.0
+        self._cola = queue.Queue()
+        self._lock_llm = threading.Lock()
+        self.sentiment = None
+        self.llm = None
+        self._servidor = None
+        self.estadisticas = {'peticiones': 0, 'lotes': 0, 'textos_en_lotes': 0, 'errores': 0}
+
+    def cargar_modelos(self):
+        """Carga los modelos habilitados en la configuración."""
+        global _ES_SERVIDOR
+        _ES_SERVIDOR = True
+        # Con `python model_server.py` este código vive en __main__, pero los getters
+        # consultan servidor_habilitado() en el módulo importado como model_server
+        import model_server
+        model_server._ES_SERVIDOR = True
+
+        from config import SENTIMENT_CONFIG, LLM_CONFIG
+        if SENTIMENT_CONFIG.get('enabled', False):
+            self.sentiment = get_sentiment_analyzer()
+        if LLM_CONFIG.get('enabled', False):
+            # llm_module solo se importa en el proceso servidor: los workers no
+            # pagan su importación (ni sus avisos) salvo en modo LLM
+            from llm_module import get_gemma_llm
+            self.llm = get_gemma_llm(auto_load=LLM_CONFIG.get('auto_load', False))
+
+    # --- Lotes de sentimiento ---
+
+    def _bucle_lotes(self):
+        while True:
+            lote = [self._cola.get()]
+            limite = time.monotonic() + self.batch_wait
+            while len(lote) < self.batch_max_size:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            try:
+                resultados = self.sentiment.analyze_batch([p.texto for p in lote])
+            except Exception as e:
+                logger.error(f"Error en lote de sentimiento: {e}")
+                self.estadisticas['errores'] += 1
+                resultados = [SentimentAnalyzer._resultado_neutral() for _ in lote]
+
+            self.estadisticas['lotes'] += 1
+            self.estadisticas['textos_en_lotes'] += len(lote)
+            for pendiente, resultado in zip(lote, resultados):
+                pendiente.resultado = resultado
+                pendiente.evento.set()
+
+    def _sentimiento(self, texto):
+        if self.sentiment is None:
+            return SentimentAnalyzer._resultado_neutral()
+        pendiente = _PeticionPendiente(texto)
+        self._cola.put(pendiente)
+        pendiente.evento.wait()
+        return pendiente.resultado
+
+    # --- Despacho de operaciones ---
+
+    def atender(self, operacion, args):
+        """
+        Ejecuta una operación solicitada por un worker.
+
+        Args:
+            operacion (str): Nombre de la operación
+            args (dict): Argumentos
+
+        Returns:
+            object: Resultado serializable en JSON
+        """
+        self.estadisticas['peticiones'] += 1
+
+        if operacion == 'ping':
+            return 'pong'
+        if operacion == 'sentiment':
+            return self._sentimiento(args.get('texto', ''))
+        if operacion == 'sentiment_batch':
+            if self.sentiment is None:
+                return [SentimentAnalyzer._resultado_neutral() for _ in args.get('textos', [])]
+            return self.sentiment.analyze_batch(args.get('textos', []))
+        if operacion == 'sentiment_status':
+            return bool(self.sentiment and self.sentiment.enabled)
+        if operacion == 'analisis':
+            from chatbot_logic import analizar_texto_local
+            return analizar_texto_local(args.get('texto', ''))
+        if operacion == 'llm_status':
+            return bool(self.llm and self.llm.enabled)
+        if operacion == 'llm_load':
+            if self.llm is None:
+                return False
+            with self._lock_llm:
+                return self.llm.enabled or self.llm.load_model()
+        if operacion == 'llm_unload':
+            if self.llm is not None:
+                with self._lock_llm:
+                    self.llm.unload_model()
+            return True
+        if operacion == 'generate':
+            if self.llm is None or not (self.llm.enabled or get_lifecycle_manager().disponible('llm')):
+                return None
+            # La generación no se agrupa: un prompt a la vez por el modelo
+            with self._lock_llm:
+                return self.llm.generar_respuesta(**args)
+        if operacion == 'stats':
+            return dict(self.estadisticas)
+        if operacion == 'models':
+            return dict(get_lifecycle_manager().estado(), coalescencia=estadisticas_coalescencia())
+
+        raise ValueError(f"Operación desconocida: {operacion}")
+
+    def iniciar(self):
+        """Abre el socket y atiende peticiones hasta que se interrumpa."""
+        servidor_modelos = self
+
+        class _Manejador(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        peticion = recibir_mensaje(self.request)
+                    except (ConnectionError, OSError, ValueError):
+                        return
+                    try:
+                        resultado = servidor_modelos.atender(
+                            peticion.get('op'), peticion.get('args') or {}
+                        )
+                        respuesta = {'id': peticion.get('id'), 'ok': True, 'resultado': resultado}
+                    except Exception as e:
+                        servidor_modelos.estadisticas['errores'] += 1
+                        respuesta = {'id': peticion.get('id'), 'ok': False, 'error': str(e)}
+                    try:
+                        enviar_mensaje(self.request, respuesta)
+                    except OSError:
+                        return
+
+        familia, direccion = _parsear_direccion(self.direccion)
+        if familia == socket.AF_INET:
+            clase = socketserver.ThreadingTCPServer
+        else:
+            clase = socketserver.ThreadingUnixStreamServer
+            if os.path.exists(direccion):
+                os.unlink(direccion)
+        clase.daemon_threads = True
+        clase.allow_reuse_address = True
+        clase.request_queue_size = 128  # Muchos workers conectando a la vez
+
+        threading.Thread(target=self._bucle_lotes, daemon=True, name='lotes-sentimiento').start()
+        self._servidor = clase(direccion, _Manejador)
+        logger.info(f"✅ Servidor de modelos escuchando en {self.direccion}")
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+            if familia != socket.AF_INET and os.path.exists(direccion):
+                os.unlink(direccion)
+
+    def detener(self):
+        """Detiene el bucle de atención."""
+        if self._servidor:
+            self._servidor.shutdown()
+
+
+# ========== CLIENTE ==========
+
+class ModelServerClient:
+    """
+    Cliente del servidor de modelos.
+    Mantiene una conexión por hilo y reconecta automáticamente.
+    """
+
+    def __init__(self, direccion=None, timeout=None):
+        self.direccion = direccion or MODEL_SERVER_CONFIG.get('address', '/tmp/scitech_models.sock')
+        self.timeout = timeout if timeout is not None else MODEL_SERVER_CONFIG.get('timeout', 60)
+        self._local = threading.local()
+        self._siguiente_id = 0
+
+    def _conexion(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            familia, direccion = _parsear_direccion(self.direccion)
+            sock = socket.socket(familia, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(direccion)
+            self._local.sock = sock
+        return sock
+
+    def _cerrar(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def llamar(self, operacion, **args):
+        """
+        Ejecuta una operación remota.
+
+        Args:
+            operacion (str): Nombre de la operación
+            **args: Argumentos de la operación
+
+        Returns:
+            object: Resultado devuelto por el servidor
+        """
+        self._siguiente_id += 1
+        peticion = {'id': self._siguiente_id, 'op': operacion, 'args': args}
+        # Un reintento si la conexión del hilo se había cerrado, solo mientras la
+        # petición no haya salido entera: el servidor no ejecuta mensajes incompletos,
+        # pero una generación ya enviada no debe repetirse
+        for intento in range(2):
+            enviada = False
+            try:
+                sock = self._conexion()
+                enviar_mensaje(sock, peticion)
+                enviada = True
+                respuesta = recibir_mensaje(sock)
+                break
+            except (ConnectionError, OSError):
+                self._cerrar()
+                if intento or (enviada and operacion not in OPERACIONES_REPETIBLES):
+                    raise
+        if not respuesta.get('ok'):
+            raise RuntimeError(f"Error en el servidor de modelos: {respuesta.get('error')}")
+        return respuesta.get('resultado')
+
+
+_cliente = None
+
+
+def obtener_cliente():
+    """Obtiene el cliente global del servidor de modelos."""
+    global _cliente
+    if _cliente is None:
+        _cliente = ModelServerClient()
+    return _cliente
+
+
+class RemoteSentimentAnalyzer(SentimentAnalyzer):
+    """
+    Stub RPC de SentimentAnalyzer: misma interfaz, inferencia en el servidor.
+    El tono y los mensajes empáticos se calculan localmente.
+    """
+
+    def __init__(self, cliente=None):
+        self.cliente = cliente or obtener_cliente()
+        self.analyzer = None
+        try:
+            self.enabled = bool(self.cliente.llamar('sentiment_status'))
+            logger.info("✅ Analizador de sentimientos remoto conectado")
+        except (OSError, RuntimeError) as e:
+            # Se asume disponible: el servidor puede arrancar después que el worker
+            self.enabled = True
+            logger.warning(f"⚠️ Servidor de modelos no disponible todavía: {e}")
+
+    def analyze(self, texto):
+        if not self.enabled or not texto:
+            return self._resultado_neutral()
+        try:
+            return self.cliente.llamar('sentiment', texto=texto)
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Error al analizar sentimiento (remoto): {e}")
+            return self._resultado_neutral()
+
+    def analyze_batch(self, textos):
+        if not self.enabled:
+            return [self._resultado_neutral() for _ in textos]
+        try:
+            return self.cliente.llamar('sentiment_batch', textos=list(textos))
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Error al analizar sentimiento en lote (remoto): {e}")
+            return [self._resultado_neutral() for _ in textos]
+
+
+if __name__ == "__main__":
+    try:
+        from config import print_config
+        print_config()
+    except ImportError:
+        pass
+
+    servidor = ServidorModelos(
+        batch_max_size=MODEL_SERVER_CONFIG.get('batch_max_size', 16),
+        batch_wait_ms=MODEL_SERVER_CONFIG.get('batch_wait_ms', 5)
+    )
+    servidor.cargar_modelos()
+    try:
+        servidor.iniciar()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor de modelos detenido")
@@ -0,0 +1,241 @@
+"""
+Módulo de análisis multitarea (sentimiento + emoción + discurso de odio)
+Ejecuta varios modelos de clasificación de pysentimiento sobre los mismos
+textos con un único preprocesado y una única tokenización por lote. Los
+modelos cuyo encoder tiene exactamente los mismos pesos (cabezas entrenadas
+sobre un encoder congelado, ver SENTIMENT_CONFIG['task_models']) comparten
+una sola copia del encoder en memoria y una sola pasada por él; cada tarea
+solo añade su cabeza de clasificación.
+"""
+
+import importlib.util
+
+from log_pipeline import obtener_logger
+
+logger = obtener_logger(__name__)
+
+PYSENTIMIENTO_AVAILABLE = importlib.util.find_spec('pysentimiento') is not None
+
+# Tareas de pysentimiento y la clave con la que se devuelven en el resultado de analyze()
+TAREAS = ('sentiment', 'emotion', 'hate_speech')
+CLAVES_RESULTADO = {'emotion': 'emocion', 'hate_speech': 'odio'}
+
+# Arquitecturas cuya cabeza se aplica directamente a la salida del encoder
+_CABEZA_SOBRE_SECUENCIA = ('roberta', 'xlm-roberta', 'camembert')
+
+
+def _mismos_pesos(a, b):
+    """True si dos encoders tienen la misma arquitectura y exactamente los mismos pesos."""
+    import torch
+    estado_a, estado_b = a.state_dict(), b.state_dict()
+    if estado_a.keys() != estado_b.keys():
+        return False
+    return all(
+        estado_a[k].shape == estado_b[k].shape and torch.equal(estado_a[k], estado_b[k]) for k in estado_a
+    )
+
+
+def formatear_tarea(tarea, probas, multietiqueta):
+    """
+    Resultado de una tarea adicional en el formato del chatbot.
+
+    Args:
+        tarea (str): Tarea de pysentimiento
+        probas (dict): Probabilidad por etiqueta
+        multietiqueta (bool): Las etiquetas son independientes (sigmoide)
+
+    Returns:
+        dict: {'etiquetas': [...], 'probabilidades': {...}} si es multietiqueta;
+              si no, {'etiqueta': str, 'confianza': float, 'probabilidades': {...}}
+    """
+    if multietiqueta:
+        return {'etiquetas': [e for e, p in probas.items() if p >= 0.5], 'probabilidades': probas}
+    etiqueta = max(probas, key=probas.get)
+    return {'etiqueta': etiqueta, 'confianza': probas[etiqueta], 'probabilidades': probas}
+
+
+class _GrupoEncoder:
+    """Un encoder y las tareas que lo usan."""
+
+    __slots__ = ('encoder', 'tareas')
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.tareas = []  # [(tarea, modelo)]
+
+
+class AnalizadorMultitarea:
+    """
+    Varios analizadores de pysentimiento con preprocesado, tokenización y
+    encoders compartidos. predecir() devuelve, por texto, las probabilidades
+    de cada tarea.
+    """
+
+    def __init__(self, tareas=TAREAS, lang='es', modelos=None, tamano_lote=32):
+        """
+        Args:
+            tareas (list): Tareas de pysentimiento ('sentiment' siempre se incluye)
+            lang (str): Idioma
+            modelos (dict): {tarea: nombre de modelo} para no usar el de pysentimiento por defecto
+            tamano_lote (int): Textos por pasada del modelo
+        """
+        self.tareas = ['sentiment'] + [t for t in tareas if t != 'sentiment']
+        self.lang = lang
+        self.modelos = modelos or {}
+        self.tamano_lote = tamano_lote
+        self.analizadores = {}
+        self.multietiqueta = set()
+        self.grupos = []
+        self.independientes = []  # Tareas con otro tokenizador: se predicen por separado
+        self.tokenizer = None
+        self._preprocesado = {}
+
+    def cargar(self):
+        """
+        Carga los modelos y agrupa los que comparten encoder y tokenizador.
+
+        Returns:
+            bool: True si al menos el modelo de sentimiento quedó cargado
+        """
+        if not PYSENTIMIENTO_AVAILABLE:
+            return False
+        from pysentimiento import create_analyzer
+
+        for tarea in self.tareas:
+            try:
+                if self.modelos.get(tarea):
+                    self.analizadores[tarea] = create_analyzer(task=tarea, lang=self.lang, model_name=self.modelos[tarea])
+                else:
+                    self.analizadores[tarea] = create_analyzer(task=tarea, lang=self.lang)
+            except Exception as e:
+                if tarea == 'sentiment':
+                    raise
+                logger.warning(f"⚠️ No se pudo cargar la tarea '{tarea}': {e}")
+
+        principal = self.analizadores['sentiment']
+        self.tokenizer = principal.tokenizer
+        self._preprocesado = dict(getattr(principal, 'preprocessing_args', None) or {})
+        vocabulario = self.tokenizer.get_vocab()
+        for tarea, analizador in self.analizadores.items():
+            modelo = analizador.model
+            modelo.eval()
+            if modelo.config.problem_type == 'multi_label_classification':
+                self.multietiqueta.add(tarea)
+            compatible = (
+                analizador.tokenizer.get_vocab() == vocabulario
+                and dict(getattr(analizador, 'preprocessing_args', None) or {}) == self._preprocesado
+            )
+            if not compatible:
+                self.independientes.append(tarea)
+            else:
+                self._agrupar(tarea, modelo)
+
+        compartidos = sum(len(g.tareas) - 1 for g in self.grupos)
+        logger.info(f"✅ Análisis multitarea: {', '.join(self.analizadores)} "
+                    f"({len(self.grupos)} encoder(s), {compartidos} compartido(s))")
+        return True
+
+    def _agrupar(self, tarea, modelo):
+        """Añade el modelo al grupo cuyo encoder es idéntico o crea uno nuevo."""
+        if modelo.config.model_type in _CABEZA_SOBRE_SECUENCIA:
+            encoder = modelo.base_model
+            for grupo in self.grupos:
+                if grupo.encoder is not None and _mismos_pesos(grupo.encoder, encoder):
+                    # La copia duplicada se sustituye por la del grupo y se libera
+                    setattr(modelo, modelo.base_model_prefix, grupo.encoder)
+                    grupo.tareas.append((tarea, modelo))
+                    return
+        else:
+            # Sin cabeza separable: el modelo completo se ejecuta en su propio grupo
+            encoder = None
+        grupo = _GrupoEncoder(encoder)
+        grupo.tareas.append((tarea, modelo))
+        self.grupos.append(grupo)
+
+    def descargar(self):
+        """Libera todos los modelos."""
+        self.analizadores = {}
+        self.grupos = []
+        self.independientes = []
+        self.multietiqueta = set()
+        self.tokenizer = None
+
+    def memoria_bytes(self):
+        """
+        Returns:
+            int: Bytes de parámetros y buffers distintos (los compartidos cuentan una vez)
+        """
+        vistos, total = set(), 0
+        for analizador in self.analizadores.values():
+            for tensor in list(analizador.model.parameters()) + list(analizador.model.buffers()):
+                if tensor.data_ptr() not in vistos:
+                    vistos.add(tensor.data_ptr())
+                    total += tensor.numel() * tensor.element_size()
+        return total
+
+    def _probabilidades(self, tarea, logits):
+        import torch
+        if tarea in self.multietiqueta:
+            valores = torch.sigmoid(logits)
+        else:
+            valores = torch.softmax(logits, dim=-1)
+        etiquetas = self.analizadores[tarea].model.config.id2label
+        return [{etiquetas[i]: float(p) for i, p in enumerate(fila)} for fila in valores.tolist()]
+
+    def predecir(self, textos):
+        """
+        Probabilidades de todas las tareas para una lista de textos.
+
+        Args:
+            textos (list): Textos no vacíos
+
+        Returns:
+            list: Por texto, {tarea: {etiqueta: probabilidad}}
+        """
+        import torch
+        from pysentimiento.preprocessing import preprocess_tweet
+
+        argumentos = dict(self._preprocesado)
+        argumentos.setdefault('lang', self.lang)
+        resultados = [{} for _ in textos]
+        maximo = min(self.tokenizer.model_max_length, 512)
+
+        for inicio in range(0, len(textos), self.tamano_lote):
+            lote = [preprocess_tweet(t, **argumentos) for t in textos[inicio:inicio + self.tamano_lote]]
+            entradas = self.tokenizer(lote, padding=True, truncation=True, max_length=maximo, return_tensors='pt')
+            entradas = {k: v for k, v in entradas.items() if k in ('input_ids', 'attention_mask')}
+            with torch.inference_mode():
+                for grupo in self.grupos:
+                    dispositivo = next(grupo.tareas[0][1].parameters()).device
+                    en_dispositivo = {k: v.to(dispositivo) for k, v in entradas.items()}
+                    if grupo.encoder is not None:
+                        # Una sola pasada por el encoder para todas las cabezas del grupo
+                        secuencia = grupo.encoder(**en_dispositivo)[0]
+                        salidas = [(tarea, modelo.classifier(secuencia)) for tarea, modelo in grupo.tareas]
+                    else:
+                        salidas = [(tarea, modelo(**en_dispositivo).logits) for tarea, modelo in grupo.tareas]
+                    for tarea, logits in salidas:
+                        for i, probas in enumerate(self._probabilidades(tarea, logits.float().cpu())):
+                            resultados[inicio + i][tarea] = probas
+
+        for tarea in self.independientes:
+            for resultado, salida in zip(resultados, self.analizadores[tarea].predict(textos)):
+                resultado[tarea] = dict(salida.probas)
+        return resultados
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Analizador Multitarea ===\n")
+
+    analizador = AnalizadorMultitarea()
+    if not analizador.cargar():
+        print("❌ pysentimiento no está instalado")
+    else:
+        print(f"Memoria de parámetros: {analizador.memoria_bytes() / 1024 ** 2:.0f} MB\n")
+        textos = ["Me encanta aprender sobre el universo", "Eres inútil y no me ayudas en nada"]
+        for texto, probas in zip(textos, analizador.predecir(textos)):
+            print(f"Texto: '{texto}'")
+            for tarea, valores in probas.items():
+                print(f"  {tarea}: {formatear_tarea(tarea, valores, tarea in analizador.multietiqueta)}")
+            print()
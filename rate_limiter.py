@@ -0,0 +1,103 @@
+"""
+Módulo de limitación de tasa y control de admisión
+Aplica los límites de config.LIMITS: cubetas de tokens por sesión/IP con memoria
+acotada y un tope global de concurrencia para la etapa del LLM
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """
+    Limitador de cubeta de tokens por clave (sesión o IP).
+    Cada clave ocupa una entrada de tamaño fijo; al superar `max_claves`
+    se descarta la menos usada recientemente, por lo que la memoria es O(max_claves).
+    """
+
+    def __init__(self, capacidad=100, periodo=60.0, max_claves=10000):
+        """
+        Args:
+            capacidad (int): Mensajes permitidos en ráfaga
+            periodo (float): Segundos en los que se recarga la cubeta completa
+            max_claves (int): Máximo de claves rastreadas simultáneamente
+        """
+        self.capacidad = float(capacidad)
+        self.tasa = self.capacidad / float(periodo)
+        self.max_claves = max_claves
+        self._cubetas = OrderedDict()  # clave -> [tokens, último_instante]
+        self._lock = threading.Lock()
+
+    def permitir(self, clave, coste=1.0):
+        """
+        Consume tokens de la cubeta de una clave.
+
+        Args:
+            clave (str): Identificador de la sesión o IP
+            coste (float): Tokens a consumir
+
+        Returns:
+            tuple: (permitido, segundos_hasta_reintentar)
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            cubeta = self._cubetas.get(clave)
+            if cubeta is None:
+                cubeta = [self.capacidad, ahora]
+                self._cubetas[clave] = cubeta
+                if len(self._cubetas) > self.max_claves:
+                    self._cubetas.popitem(last=False)
+            else:
+                self._cubetas.move_to_end(clave)
+                cubeta[0] = min(self.capacidad, cubeta[0] + (ahora - cubeta[1]) * self.tasa)
+                cubeta[1] = ahora
+
+            if cubeta[0] >= coste:
+                cubeta[0] -= coste
+                return True, 0.0
+            return False, (coste - cubeta[0]) / self.tasa
+
+    def __len__(self):
+        return len(self._cubetas)
+
+
+class ConcurrencyLimiter:
+    """
+    Tope global de ejecuciones simultáneas de una etapa costosa.
+    No bloquea: si no hay hueco la petición se descarta y el llamador degrada.
+    """
+
+    def __init__(self, max_concurrentes=2):
+        self.max_concurrentes = max_concurrentes
+        self._semaforo = threading.BoundedSemaphore(max_concurrentes)
+        self.rechazadas = 0
+
+    def intentar(self):
+        """Intenta ocupar un hueco. Retorna True si se obtuvo."""
+        if self._semaforo.acquire(blocking=False):
+            return True
+        self.rechazadas += 1
+        return False
+
+    def liberar(self):
+        """Libera un hueco ocupado con intentar()."""
+        self._semaforo.release()
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Limitador de Tasa ===\n")
+
+    limitador = TokenBucketLimiter(capacidad=5, periodo=1.0, max_claves=3)
+    for i in range(7):
+        permitido, espera = limitador.permitir('sesion-a')
+        print(f"Mensaje {i + 1}: {'✅' if permitido else '❌'} (reintentar en {espera:.2f} s)")
+
+    for clave in ['b', 'c', 'd', 'e']:
+        limitador.permitir(clave)
+    print(f"\nClaves rastreadas (máximo 3): {len(limitador)}")
+
+    llm = ConcurrencyLimiter(max_concurrentes=1)
+    print(f"\nPrimer hueco LLM: {llm.intentar()} | segundo: {llm.intentar()}")
+    llm.liberar()
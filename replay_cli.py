@@ -0,0 +1,308 @@
+"""
+Reproducción masiva de conversaciones archivadas
+Pasa un archivo JSONL o CSV de mensajes por responder + SentimentAnalyzer
+y escribe, por mensaje, la intención, el tema, el sentimiento y la latencia
+en CSV o Parquet. La entrada se lee por bloques y solo hay unos pocos bloques
+en vuelo a la vez, así que la memoria no depende del tamaño del archivo.
+
+Cada mensaje se procesa con un estado nuevo ya saludado: se mide el enrutado
+de mensajes sueltos, no conversaciones completas.
+
+Uso:
+    python replay_cli.py mensajes.jsonl --salida resultados.csv [--procesos 4]
+    python replay_cli.py mensajes.csv --salida resultados/ --formato parquet --campo texto
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+
+COLUMNAS = ['id', 'intencion', 'tema', 'sentimiento', 'confianza', 'latencia_ms']
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# ---------- Lectura por bloques ----------
+
+def leer_mensajes(ruta, campo='mensaje', campo_id=None):
+    """
+    Recorre los mensajes de un archivo JSONL o CSV sin cargarlo entero.
+
+    Yields:
+        tuple: (id, mensaje); id es el número de línea si no hay campo_id
+    """
+    es_csv = ruta.lower().endswith('.csv')
+    with open(ruta, encoding='utf-8', newline='') as f:
+        filas = csv.DictReader(f) if es_csv else f
+        for numero, fila in enumerate(filas):
+            if not es_csv:
+                try:
+                    fila = json.loads(fila)
+                except ValueError:
+                    fila = {}
+            if not isinstance(fila, dict):
+                fila = {}
+            mensaje = fila.get(campo)
+            identificador = fila.get(campo_id, numero) if campo_id else numero
+            yield identificador, mensaje if isinstance(mensaje, str) else ''
+
+
+def en_bloques(iterable, tamano):
+    """Agrupa un iterable en listas de como mucho `tamano` elementos."""
+    bloque = []
+    for elemento in iterable:
+        bloque.append(elemento)
+        if len(bloque) == tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+# ---------- Procesamiento (en cada worker) ----------
+
+def _inicializar_worker():
+    """Carga chatbot_logic (y sus modelos) una vez por proceso."""
+    import chatbot_logic  # noqa: F401
+
+
+def procesar_bloque(bloque):
+    """
+    Procesa un bloque de mensajes: sentimiento en lote y después responder.
+
+    Args:
+        bloque (list): Pares (id, mensaje)
+
+    Returns:
+        list: Filas [id, intencion, tema, sentimiento, confianza, latencia_ms]
+    """
+    import chatbot_logic
+    from conversation_history import tema_de_intencion
+    from session_store import nuevo_estado
+
+    sentimientos = [None] * len(bloque)
+    coste_lote = 0.0
+    analizador = chatbot_logic.sentiment_analyzer
+    if analizador and chatbot_logic.SENTIMENT_CONFIG.get('enabled', False):
+        inicio = time.perf_counter()
+        sentimientos = analizador.analyze_batch([mensaje for _, mensaje in bloque])
+        # El coste del lote se reparte entre sus mensajes
+        coste_lote = (time.perf_counter() - inicio) / len(bloque)
+
+    filas = []
+    for (identificador, mensaje), sentimiento in zip(bloque, sentimientos):
+        estado = nuevo_estado()
+        estado['saludo'] = True
+        inicio = time.perf_counter()
+        try:
+            chatbot_logic.responder(mensaje, estado, sentimiento=sentimiento)
+            intencion = estado.get('ultima_intencion')
+        except Exception as e:
+            print(f"Error en el mensaje {identificador}: {e}", file=sys.stderr)
+            intencion = 'error'
+        latencia = (time.perf_counter() - inicio + coste_lote) * 1000
+        filas.append([
+            identificador,
+            intencion,
+            tema_de_intencion(intencion),
+            sentimiento['sentimiento'] if sentimiento else None,
+            round(sentimiento['confianza'], 4) if sentimiento else None,
+            round(latencia, 3),
+        ])
+    return filas
+
+
+# ---------- Salida y punto de control ----------
+
+class SalidaCSV:
+    """CSV único; el punto de control guarda el tamaño en bytes ya confirmado."""
+
+    def __init__(self, ruta, reanudar_desde=None):
+        self.ruta = ruta
+        existe = reanudar_desde is not None and os.path.exists(ruta)
+        self.archivo = open(ruta, 'r+' if existe else 'w', encoding='utf-8', newline='')
+        if existe:
+            # Descarta lo escrito después del último punto de control
+            self.archivo.seek(reanudar_desde['bytes'])
+            self.archivo.truncate()
+        else:
+            csv.writer(self.archivo).writerow(COLUMNAS)
+        self.escritor = csv.writer(self.archivo)
+
+    def escribir(self, filas):
+        self.escritor.writerows(filas)
+        self.archivo.flush()
+        return {'bytes': self.archivo.tell()}
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+class SalidaParquet:
+    """Directorio de partes Parquet, una por bloque (los archivos Parquet no admiten añadir)."""
+
+    def __init__(self, directorio, reanudar_desde=None):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self.partes = reanudar_desde['partes'] if reanudar_desde is not None else 0
+        # Partes escritas después del último punto de control
+        for nombre in os.listdir(directorio):
+            if nombre.startswith('part-') and nombre.endswith('.parquet'):
+                if int(nombre[5:-8]) >= self.partes:
+                    os.remove(os.path.join(directorio, nombre))
+        self.esquema = pa.schema([
+            ('id', pa.string()), ('intencion', pa.string()), ('tema', pa.string()),
+            ('sentimiento', pa.string()), ('confianza', pa.float32()), ('latencia_ms', pa.float32()),
+        ])
+
+    def escribir(self, filas):
+        columnas = list(zip(*filas))
+        tabla = pa.table({
+            'id': [str(x) for x in columnas[0]],
+            'intencion': list(columnas[1]), 'tema': list(columnas[2]), 'sentimiento': list(columnas[3]),
+            'confianza': list(columnas[4]), 'latencia_ms': list(columnas[5]),
+        }, schema=self.esquema)
+        pq.write_table(tabla, os.path.join(self.directorio, f"part-{self.partes:05d}.parquet"))
+        self.partes += 1
+        return {'partes': self.partes}
+
+    def cerrar(self):
+        pass
+
+
+def leer_checkpoint(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def guardar_checkpoint(ruta, datos):
+    """Escritura atómica: un corte a mitad nunca deja un checkpoint corrupto."""
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    os.replace(temporal, ruta)
+
+
+# ---------- Ejecución ----------
+
+def reproducir(entrada, salida, formato='csv', campo='mensaje', campo_id=None,
+               tam_bloque=500, procesos=None, reiniciar=False):
+    """
+    Reproduce un archivo de mensajes y escribe los resultados.
+
+    Args:
+        entrada (str): Archivo JSONL o CSV
+        salida (str): Archivo CSV o directorio Parquet
+        formato (str): 'csv' o 'parquet'
+        campo (str): Campo con el texto del mensaje
+        campo_id (str): Campo identificador (None = número de línea)
+        tam_bloque (int): Mensajes por bloque
+        procesos (int): Procesos del pool (0 = en este proceso)
+        reiniciar (bool): Ignorar un punto de control existente
+
+    Returns:
+        dict: Mensajes procesados, segundos y mensajes/s de esta ejecución
+    """
+    ruta_checkpoint = salida.rstrip('/\\') + '.checkpoint'
+    checkpoint = None if reiniciar else leer_checkpoint(ruta_checkpoint)
+    if checkpoint and checkpoint.get('entrada') != os.path.abspath(entrada):
+        print("⚠️ El punto de control es de otra entrada; se empieza desde cero")
+        checkpoint = None
+    hechos = checkpoint['mensajes'] if checkpoint else 0
+    if hechos:
+        print(f"🔄 Reanudando tras {hechos} mensajes")
+
+    escritor = (SalidaParquet if formato == 'parquet' else SalidaCSV)(
+        salida, checkpoint['salida'] if checkpoint else None
+    )
+
+    mensajes = leer_mensajes(entrada, campo, campo_id)
+    for _ in range(hechos):
+        next(mensajes, None)
+    bloques = en_bloques(mensajes, tam_bloque)
+
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    pool = None
+    if procesos > 0:
+        import multiprocessing as mp
+        pool = mp.Pool(procesos, initializer=_inicializar_worker)
+
+    procesados = 0
+    inicio = time.perf_counter()
+    try:
+        # Como mucho 2 bloques por proceso en vuelo: la memoria no crece con la entrada
+        pendientes = deque()
+        for bloque in bloques:
+            if pool is None:
+                pendientes.append(procesar_bloque(bloque))
+            else:
+                pendientes.append(pool.apply_async(procesar_bloque, (bloque,)))
+            while pendientes and (pool is None or len(pendientes) >= 2 * procesos):
+                procesados += _confirmar(pendientes.popleft(), escritor, ruta_checkpoint, entrada, hechos + procesados)
+        while pendientes:
+            procesados += _confirmar(pendientes.popleft(), escritor, ruta_checkpoint, entrada, hechos + procesados)
+    finally:
+        escritor.cerrar()
+        if pool is not None:
+            pool.terminate()
+
+    duracion = time.perf_counter() - inicio
+    return {
+        'mensajes': procesados,
+        'total': hechos + procesados,
+        'segundos': round(duracion, 2),
+        'mensajes_por_segundo': round(procesados / duracion, 1) if duracion else 0.0,
+    }
+
+
+def _confirmar(pendiente, escritor, ruta_checkpoint, entrada, hechos):
+    """Escribe un bloque terminado (en orden) y avanza el punto de control."""
+    filas = pendiente if isinstance(pendiente, list) else pendiente.get()
+    posicion = escritor.escribir(filas)
+    guardar_checkpoint(ruta_checkpoint, {
+        'entrada': os.path.abspath(entrada),
+        'mensajes': hechos + len(filas),
+        'salida': posicion,
+    })
+    return len(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce mensajes archivados con la lógica del chatbot")
+    parser.add_argument('entrada', help="Archivo JSONL o CSV con los mensajes")
+    parser.add_argument('--salida', required=True, help="Archivo CSV o directorio Parquet")
+    parser.add_argument('--formato', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--campo', default='mensaje', help="Campo con el texto (por defecto: mensaje)")
+    parser.add_argument('--campo-id', help="Campo identificador (por defecto: número de línea)")
+    parser.add_argument('--tam-bloque', type=int, default=500, help="Mensajes por bloque")
+    parser.add_argument('--procesos', type=int, help="Procesos del pool (0 = sin pool; por defecto: núcleos)")
+    parser.add_argument('--reiniciar', action='store_true', help="Ignorar el punto de control y empezar de cero")
+    args = parser.parse_args()
+
+    if args.formato == 'parquet' and not PARQUET_AVAILABLE:
+        print("❌ pyarrow no está instalado. Ejecuta: pip install pyarrow (o usa --formato csv)")
+        sys.exit(1)
+
+    resultado = reproducir(
+        args.entrada, args.salida, formato=args.formato, campo=args.campo, campo_id=args.campo_id,
+        tam_bloque=args.tam_bloque, procesos=args.procesos, reiniciar=args.reiniciar
+    )
+    print(f"✅ {resultado['mensajes']} mensajes en {resultado['segundos']} s "
+          f"({resultado['mensajes_por_segundo']} mensajes/s); total acumulado: {resultado['total']}")
+
+
+if __name__ == "__main__":
+    main()
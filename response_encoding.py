@@ -0,0 +1,143 @@
+"""
+Módulo de codificación de respuestas HTTP
+JSON rápido (orjson si está instalado), compresión gzip/brotli negociada
+con Accept-Encoding y formato columnar compacto para el análisis lingüístico
+"""
+
+import gzip
+import json
+
+from flask import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    from config import COMPRESSION_CONFIG
+except ImportError:
+    COMPRESSION_CONFIG = {'enabled': True, 'min_bytes': 512, 'gzip_level': 5, 'brotli_quality': 4}
+
+# Campos de cada token en /analisis, en el orden de las columnas
+CAMPOS_ANALISIS = ('texto', 'lema', 'pos', 'tag', 'dependencia')
+
+TIPOS_COMPRIMIBLES = ('application/json', 'text/')
+
+
+def dumps(datos):
+    """
+    Serializa a JSON en bytes UTF-8 (orjson si está disponible).
+
+    Args:
+        datos: Objeto serializable
+
+    Returns:
+        bytes: JSON compacto
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def respuesta_json(datos, codigo=200, cabeceras=None):
+    """
+    Crea una respuesta Flask con el JSON de `datos` (sustituto de jsonify).
+
+    Returns:
+        Response: Respuesta application/json
+    """
+    respuesta = Response(dumps(datos), status=codigo, mimetype='application/json')
+    if cabeceras:
+        respuesta.headers.update(cabeceras)
+    return respuesta
+
+
+def analisis_en_columnas(analisis):
+    """
+    Convierte la lista de dicts por token en arrays paralelos, sin repetir
+    los nombres de campo en cada token.
+
+    Args:
+        analisis (list): [{'texto', 'lema', 'pos', 'tag', 'dependencia'}, ...]
+
+    Returns:
+        dict: {'texto': [...], 'lema': [...], 'pos': [...], 'tag': [...], 'dependencia': [...]}
+    """
+    return {campo: [token[campo] for token in analisis] for campo in CAMPOS_ANALISIS}
+
+
+def _codificacion_aceptada(accept_encoding):
+    """Elige 'br' o 'gzip' según Accept-Encoding (ignora las marcadas con q=0)."""
+    aceptadas = set()
+    for parte in accept_encoding.lower().split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        if parametros.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        aceptadas.add(nombre)
+    if BROTLI_AVAILABLE and 'br' in aceptadas:
+        return 'br'
+    if 'gzip' in aceptadas:
+        return 'gzip'
+    return None
+
+
+def comprimir_respuesta(respuesta, accept_encoding):
+    """
+    Comprime el cuerpo de una respuesta si el cliente lo acepta y merece la pena.
+    Pensado para app.after_request.
+
+    Args:
+        respuesta (Response): Respuesta de Flask
+        accept_encoding (str): Cabecera Accept-Encoding de la petición
+
+    Returns:
+        Response: La misma respuesta, comprimida o no
+    """
+    if not COMPRESSION_CONFIG.get('enabled', True):
+        return respuesta
+    if (respuesta.direct_passthrough or respuesta.is_streamed or
+            'Content-Encoding' in respuesta.headers or respuesta.status_code < 200 or
+            not (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES)):
+        return respuesta
+
+    respuesta.vary.add('Accept-Encoding')
+    codificacion = _codificacion_aceptada(accept_encoding or '')
+    if codificacion is None:
+        return respuesta
+
+    cuerpo = respuesta.get_data()
+    # En cuerpos pequeños la cabecera de compresión cuesta más de lo que ahorra
+    if len(cuerpo) < COMPRESSION_CONFIG.get('min_bytes', 512):
+        return respuesta
+
+    if codificacion == 'br':
+        comprimido = brotli.compress(cuerpo, quality=COMPRESSION_CONFIG.get('brotli_quality', 4))
+    else:
+        comprimido = gzip.compress(cuerpo, compresslevel=COMPRESSION_CONFIG.get('gzip_level', 5))
+
+    respuesta.set_data(comprimido)
+    respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba de Codificación de Respuestas ===\n")
+
+    analisis = [
+        {'texto': 'telescopio', 'lema': 'telescopio', 'pos': 'NOUN', 'tag': 'NOUN', 'dependencia': 'nsubj'}
+    ] * 100
+    por_token = dumps({'analisis': analisis})
+    columnas = dumps({'formato': 'columnas', 'analisis': analisis_en_columnas(analisis)})
+    print(f"orjson: {'✅' if ORJSON_AVAILABLE else '❌'} | brotli: {'✅' if BROTLI_AVAILABLE else '❌'}")
+    print(f"Por token: {len(por_token)} bytes | columnas: {len(columnas)} bytes")
+    print(f"gzip: {len(gzip.compress(por_token, 5))} bytes | {len(gzip.compress(columnas, 5))} bytes")
+    print(f"Negociación 'gzip, br;q=0': {_codificacion_aceptada('gzip, br;q=0')}")
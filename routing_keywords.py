@@ -0,0 +1,96 @@
+"""
+Palabras clave usadas por el enrutamiento de intenciones del chatbot
+Centraliza las listas para que la lógica conversacional y los índices
+de corrección tipográfica compartan exactamente el mismo vocabulario
+"""
+
+# ========== CONVERSACIÓN ==========
+PALABRAS_SALUDO = ["hola", "buenas", "saludos", "hey", "holi", "buenos", "dias", "tardes", "noches"]
+PALABRAS_DESPEDIDA = ["adios", "chao", "hasta luego", "nos vemos", "bye", "adió"]
+PALABRAS_ANIMO_POSITIVO = ["bien", "feliz", "excelente", "contento", "alegre", "genial", "perfecto"]
+PALABRAS_ANIMO_NEGATIVO = ["mal", "triste", "regular", "cansado", "aburrido"]
+PALABRAS_AGRADECIMIENTO = ["gracias", "gracia", "thank", "agradezco"]
+PALABRAS_IDENTIDAD = ["quién", "quien", "eres", "qué eres", "que eres", "tu nombre"]
+PALABRAS_AYUDA = ["ayuda", "help", "como funciona", "qué puedes", "que puedes"]
+
+# ========== TEMAS DE CIENCIA Y TECNOLOGÍA ==========
+PALABRAS_IA = [
+    "inteligencia", "artificial", "ia", "ai", "machine", "learning", "aprendizaje", "automático", "chatgpt", "gpt",
+    "neural", "robot", "automatización", "deep", "modelo", "algoritmo", "datos", "big data"
+]
+PALABRAS_ESPACIO = [
+    "espacio", "nasa", "astronomía", "planeta", "marte", "luna", "telescopio", "james webb", "webb",
+    "estrella", "galaxia", "universo", "spacex", "cohete", "satélite", "agujero negro", "exoplaneta"
+]
+PALABRAS_COMPUTACION = [
+    "cuántica", "quantum", "computación", "ordenador", "supercomputadora", "procesador", "chip",
+    "semiconductor", "transistor", "informática", "hardware"
+]
+PALABRAS_MEDICINA = [
+    "medicina", "salud", "cáncer", "enfermedad", "vacuna", "crispr", "genética", "adn", "gen",
+    "terapia", "farmaco", "tratamiento", "diagnóstico", "biomedicina", "célula"
+]
+PALABRAS_ENERGIA = [
+    "energía", "renovable", "solar", "eólica", "fusión", "nuclear", "batería", "electricidad",
+    "sostenible", "clima", "carbono", "emisiones", "calentamiento", "ambiental"
+]
+PALABRAS_BLOCKCHAIN = [
+    "blockchain", "bitcoin", "criptomoneda", "crypto", "ethereum", "nft", "web3", "metaverso",
+    "realidad", "virtual", "aumentada", "vr", "ar", "gafas"
+]
+PALABRAS_NOTICIAS = [
+    "recomienda", "noticia", "novedad", "descubrimiento", "avance", "innovación", "investigación",
+    "estudio", "científico", "tecnológico", "reciente", "actual", "último", "últimas"
+]
+PALABRAS_FUERA_TEMA = ["futbol", "fútbol", "deporte", "comida", "musica", "música", "película", "juego", "videojuego"]
+
+# Palabras clave para identificar la categoría del tema
+CATEGORIAS_TEMA = {
+    "ia": ["inteligencia", "artificial", "ia", "ai", "machine", "learning", "chatgpt", "gpt", "robot", "automatización", "algoritmo"],
+    "espacio": ["espacio", "nasa", "astronomía", "planeta", "marte", "luna", "telescopio", "james webb", "webb", "estrella", "galaxia", "spacex"],
+    "computacion": ["cuántica", "quantum", "computación", "ordenador", "procesador", "chip", "semiconductor", "hardware"],
+    "medicina": ["medicina", "salud", "cáncer", "enfermedad", "vacuna", "crispr", "genética", "adn", "gen", "terapia"],
+    "energia": ["energía", "renovable", "solar", "eólica", "fusión", "nuclear", "batería", "clima", "carbono"],
+    "blockchain": ["blockchain", "bitcoin", "criptomoneda", "crypto", "ethereum", "nft", "web3", "metaverso", "realidad", "virtual", "vr", "ar"]
+}
+
+# Intenciones conversacionales: nunca son destino de una corrección tipográfica
+# ("contexto" no es "contento" ni "graciosa" un agradecimiento)
+PALABRAS_CONVERSACIONALES = frozenset(
+    PALABRAS_SALUDO + PALABRAS_DESPEDIDA + PALABRAS_ANIMO_POSITIVO + PALABRAS_ANIMO_NEGATIVO
+    + PALABRAS_AGRADECIMIENTO
+)
+
+# Palabras comunes a una o dos ediciones de una palabra clave que nunca se corrigen
+# (p. ej. "planta" no es "planeta" ni "bueno" un saludo)
+PALABRAS_NO_CORREGIBLES = frozenset([
+    "bueno", "buena", "tarde", "noche", "planta", "soltar", "martes", "marta", "dados",
+    "estrecha", "bacteria", "comido",
+])
+
+
+def construir_vocabulario():
+    """
+    Reúne todas las palabras clave de enrutamiento en orden de prioridad.
+
+    Returns:
+        list: Palabras clave únicas, en el orden en que las evalúa `responder`
+    """
+    listas = [
+        PALABRAS_SALUDO, PALABRAS_DESPEDIDA, PALABRAS_ANIMO_POSITIVO, PALABRAS_ANIMO_NEGATIVO,
+        PALABRAS_AGRADECIMIENTO, PALABRAS_IDENTIDAD, PALABRAS_AYUDA,
+        PALABRAS_IA, PALABRAS_ESPACIO, PALABRAS_COMPUTACION, PALABRAS_MEDICINA,
+        PALABRAS_ENERGIA, PALABRAS_BLOCKCHAIN, PALABRAS_NOTICIAS, PALABRAS_FUERA_TEMA,
+    ]
+    vocabulario = []
+    vistas = set()
+    for lista in listas:
+        for palabra in lista:
+            if palabra not in vistas:
+                vistas.add(palabra)
+                vocabulario.append(palabra)
+    return vocabulario
+
+
+# Vocabulario completo (orden de prioridad de las ramas de `responder`)
+VOCABULARIO_ENRUTAMIENTO = construir_vocabulario()
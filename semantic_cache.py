@@ -0,0 +1,349 @@
+"""
+Módulo de caché semántica de respuestas del LLM
+Guarda las respuestas de generar_respuesta_cientifica y las reutiliza para
+preguntas parecidas ("¿qué es CRISPR?" / "explícame CRISPR"), que una caché
+por texto exacto no reconoce. Cada pregunta se representa con un vector de
+n-gramas de caracteres y palabras (hashing trick, sin modelo de embeddings)
+y se busca la más parecida del mismo tema con un producto matricial de NumPy.
+Un acierto exige además que ambas preguntas tengan las mismas palabras con
+contenido: "desventajas de la energía solar" se parece mucho a "ventajas de
+la energía solar", pero no es la misma pregunta.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+from log_pipeline import obtener_logger
+
+try:
+    from config import SEMANTIC_CACHE_CONFIG
+except ImportError:
+    SEMANTIC_CACHE_CONFIG = {
+        'enabled': True, 'threshold': 0.8, 'same_words': True, 'capacity': 2000, 'dim': 1024, 'path': None,
+        'save_every': 20
+    }
+
+logger = obtener_logger(__name__)
+
+# Palabras que cambian la forma de preguntar pero no lo que se pregunta
+PALABRAS_VACIAS = frozenset((
+    'que', 'es', 'son', 'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'de', 'del', 'al', 'a',
+    'en', 'y', 'o', 'me', 'te', 'se', 'lo', 'mi', 'por', 'favor', 'sobre', 'acerca', 'algo', 'puedes',
+    'podrias', 'explicame', 'explica', 'explicar', 'cuentame', 'contarme', 'hablame', 'dime', 'define',
+    'definicion', 'significa', 'quiero', 'saber', 'conocer', 'entender', 'informacion', 'sabes', 'eso',
+    'esto', 'esta', 'este', 'exactamente', 'breve', 'brevemente', 'como', 'cual', 'cuales', 'ha', 'han',
+    'hay',
+))
+
+_NO_PALABRA = re.compile(r'[^\w\s]')
+
+# Peso de las palabras completas frente a los trigramas de caracteres
+PESO_PALABRA = 2.0
+
+
+def normalizar_pregunta(texto):
+    """
+    Minúsculas, sin tildes ni puntuación y sin palabras vacías.
+
+    Args:
+        texto (str): Pregunta del usuario
+
+    Returns:
+        list: Palabras con contenido
+    """
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [p for p in _NO_PALABRA.sub(' ', texto).split() if p not in PALABRAS_VACIAS]
+
+
+def raices(palabras):
+    """
+    Conjunto de raíces de las palabras con contenido: sin plural y recortadas
+    a 5 letras, de modo que "vacuna"/"vacunas" o "descubierto"/"descubrimientos"
+    coinciden pero "ventajas"/"desventajas" no.
+
+    Args:
+        palabras (list): Salida de normalizar_pregunta
+
+    Returns:
+        frozenset: Raíces
+    """
+    resultado = set()
+    for palabra in palabras:
+        if len(palabra) > 4 and palabra.endswith('es'):
+            palabra = palabra[:-2]
+        elif len(palabra) > 3 and palabra.endswith('s'):
+            palabra = palabra[:-1]
+        resultado.add(palabra[:5])
+    return frozenset(resultado)
+
+
+def vectorizar(palabras, dim):
+    """
+    Vector normalizado (L2) de palabras y trigramas de caracteres.
+    Usa crc32 en lugar de hash() para que el vector no cambie entre procesos
+    (la caché se persiste en disco).
+
+    Args:
+        palabras (list): Salida de normalizar_pregunta
+        dim (int): Dimensión del vector
+
+    Returns:
+        numpy.ndarray: float32 de tamaño dim (ceros si no hay palabras)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for palabra in palabras:
+        vector[zlib.crc32(palabra.encode()) % dim] += PESO_PALABRA
+        marcada = f"#{palabra}#"
+        for i in range(len(marcada) - 2):
+            vector[zlib.crc32(marcada[i:i + 3].encode()) % dim] += 1.0
+    norma = np.linalg.norm(vector)
+    if norma > 0:
+        vector /= norma
+    return vector
+
+
+class SemanticCache:
+    """
+    Tabla de vectores (capacidad × dim) con sus respuestas.
+    buscar() devuelve la respuesta de la pregunta más parecida del mismo
+    tema si la similitud coseno supera el umbral; al llenarse se expulsa
+    la entrada usada hace más tiempo (LRU).
+    """
+
+    def __init__(self, umbral=0.8, capacidad=2000, dim=1024, ruta=None, guardar_cada=20, mismas_palabras=True):
+        """
+        Args:
+            umbral (float): Similitud coseno mínima para reutilizar una respuesta
+            mismas_palabras (bool): Exigir además las mismas palabras con contenido (ver raices)
+            capacidad (int): Entradas máximas
+            dim (int): Dimensión de los vectores
+            ruta (str): Archivo .npz de persistencia (None = solo en memoria)
+            guardar_cada (int): Inserciones entre guardados automáticos (0 = solo al llamar a guardar)
+        """
+        self.umbral = umbral
+        self.mismas_palabras = mismas_palabras
+        self.capacidad = capacidad
+        self.dim = dim
+        self.ruta = ruta
+        self.guardar_cada = guardar_cada
+        self._lock = threading.Lock()
+        self._vaciar()
+        self.estadisticas = {'consultas': 0, 'aciertos': 0, 'inserciones': 0, 'expulsiones': 0}
+        if ruta:
+            self.cargar()
+
+    def _vaciar(self):
+        self.vectores = np.zeros((self.capacidad, self.dim), dtype=np.float32)
+        self.ultimo_uso = np.zeros(self.capacidad, dtype=np.int64)  # 0 = hueco libre
+        self.id_tema = np.full(self.capacidad, -1, dtype=np.int32)  # -1 = hueco libre
+        self._ids_temas = {}
+        self.temas = [None] * self.capacidad
+        self.preguntas = [None] * self.capacidad
+        self.raices = [None] * self.capacidad
+        self.respuestas = [None] * self.capacidad
+        self._reloj = 0
+        self._pendientes = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.ultimo_uso))
+
+    def _id_tema(self, tema):
+        return self._ids_temas.setdefault(tema, len(self._ids_temas))
+
+    def _consultar(self, tema, vector):
+        """Índice y similitud de la entrada más parecida del mismo tema (con _lock tomado)."""
+        id_tema = self._ids_temas.get(tema)
+        if id_tema is None:
+            return None, 0.0
+        similitudes = np.where(self.id_tema == id_tema, self.vectores @ vector, -1.0)
+        mejor = int(np.argmax(similitudes))
+        if similitudes[mejor] < -0.5:
+            return None, 0.0
+        return mejor, float(similitudes[mejor])
+
+    def _equivalente(self, indice, similitud, raices_pregunta):
+        """Indica si la entrada encontrada responde a la misma pregunta (con _lock tomado)."""
+        if indice is None or similitud < self.umbral:
+            return False
+        return not self.mismas_palabras or self.raices[indice] == raices_pregunta
+
+    def buscar(self, tema, pregunta):
+        """
+        Busca una respuesta guardada para una pregunta equivalente.
+
+        Args:
+            tema (str): Tema científico
+            pregunta (str): Pregunta del usuario
+
+        Returns:
+            tuple: (respuesta o None, similitud, pregunta guardada o None)
+        """
+        palabras = normalizar_pregunta(pregunta)
+        if not palabras:
+            return None, 0.0, None
+        vector = vectorizar(palabras, self.dim)
+        tema = (tema or '').lower()
+        with self._lock:
+            self.estadisticas['consultas'] += 1
+            indice, similitud = self._consultar(tema, vector)
+            if not self._equivalente(indice, similitud, raices(palabras)):
+                return None, similitud, None
+            self.estadisticas['aciertos'] += 1
+            self._reloj += 1
+            self.ultimo_uso[indice] = self._reloj
+            return self.respuestas[indice], similitud, self.preguntas[indice]
+
+    def guardar_respuesta(self, tema, pregunta, respuesta):
+        """
+        Inserta (o reemplaza, si ya hay una equivalente) la respuesta de una pregunta.
+
+        Args:
+            tema (str): Tema científico
+            pregunta (str): Pregunta del usuario
+            respuesta (str): Respuesta generada
+        """
+        palabras = normalizar_pregunta(pregunta)
+        if not palabras or not respuesta:
+            return
+        vector = vectorizar(palabras, self.dim)
+        tema = (tema or '').lower()
+        raices_pregunta = raices(palabras)
+        with self._lock:
+            indice, similitud = self._consultar(tema, vector)
+            if not self._equivalente(indice, similitud, raices_pregunta):
+                # Hueco libre o, si no hay, la entrada usada hace más tiempo
+                indice = int(np.argmin(self.ultimo_uso))
+                if self.ultimo_uso[indice]:
+                    self.estadisticas['expulsiones'] += 1
+            self._reloj += 1
+            self.vectores[indice] = vector
+            self.ultimo_uso[indice] = self._reloj
+            self.id_tema[indice] = self._id_tema(tema)
+            self.temas[indice] = tema
+            self.preguntas[indice] = pregunta
+            self.raices[indice] = raices_pregunta
+            self.respuestas[indice] = respuesta
+            self.estadisticas['inserciones'] += 1
+            self._pendientes += 1
+            guardar = self.ruta and self.guardar_cada and self._pendientes >= self.guardar_cada
+        if guardar:
+            self.guardar()
+
+    def guardar(self):
+        """Escribe la caché en self.ruta (escritura atómica)."""
+        if not self.ruta:
+            return
+        with self._lock:
+            ocupados = np.flatnonzero(self.ultimo_uso)
+            metadatos = {
+                'dim': self.dim,
+                'temas': [self.temas[i] for i in ocupados],
+                'preguntas': [self.preguntas[i] for i in ocupados],
+                'respuestas': [self.respuestas[i] for i in ocupados],
+            }
+            vectores = self.vectores[ocupados].copy()
+            usos = self.ultimo_uso[ocupados].copy()
+            self._pendientes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            # Los vectores son dispersos: comprimidos ocupan ~60 veces menos
+            np.savez_compressed(
+                f, vectores=vectores, usos=usos, metadatos=np.array(json.dumps(metadatos, ensure_ascii=False))
+            )
+        os.replace(temporal, self.ruta)
+
+    def cargar(self):
+        """
+        Carga la caché desde self.ruta si existe y es compatible.
+
+        Returns:
+            int: Entradas cargadas
+        """
+        try:
+            with np.load(self.ruta, allow_pickle=False) as datos:
+                vectores, usos = datos['vectores'], datos['usos']
+                metadatos = json.loads(str(datos['metadatos']))
+        except (OSError, KeyError, ValueError):
+            return 0
+        if metadatos.get('dim') != self.dim:
+            logger.warning(f"⚠️ La caché semántica de {self.ruta} usa otra dimensión; se ignora")
+            return 0
+        # Si la capacidad es menor que lo guardado, se conservan las más recientes
+        orden = np.argsort(usos)[::-1][:self.capacidad]
+        with self._lock:
+            self._vaciar()
+            for destino, origen in enumerate(orden):
+                self.vectores[destino] = vectores[origen]
+                self.ultimo_uso[destino] = usos[origen]
+                self.id_tema[destino] = self._id_tema(metadatos['temas'][origen])
+                self.temas[destino] = metadatos['temas'][origen]
+                self.preguntas[destino] = metadatos['preguntas'][origen]
+                self.raices[destino] = raices(normalizar_pregunta(self.preguntas[destino]))
+                self.respuestas[destino] = metadatos['respuestas'][origen]
+            self._reloj = int(usos.max()) if len(usos) else 0
+        return len(orden)
+
+    def obtener_estadisticas(self):
+        """
+        Returns:
+            dict: Consultas, aciertos, tasa de aciertos, inserciones, expulsiones y entradas
+        """
+        with self._lock:
+            datos = dict(self.estadisticas)
+        datos['tasa_aciertos'] = round(datos['aciertos'] / datos['consultas'], 4) if datos['consultas'] else 0.0
+        datos['entradas'] = len(self)
+        return datos
+
+
+# Instancia global de la caché
+_semantic_cache = None
+
+def get_semantic_cache():
+    """
+    Obtiene la caché semántica global según SEMANTIC_CACHE_CONFIG.
+
+    Returns:
+        SemanticCache: Instancia o None si está desactivada
+    """
+    global _semantic_cache
+    if _semantic_cache is None and SEMANTIC_CACHE_CONFIG.get('enabled', True):
+        _semantic_cache = SemanticCache(
+            umbral=SEMANTIC_CACHE_CONFIG.get('threshold', 0.8),
+            mismas_palabras=SEMANTIC_CACHE_CONFIG.get('same_words', True),
+            capacidad=SEMANTIC_CACHE_CONFIG.get('capacity', 2000),
+            dim=SEMANTIC_CACHE_CONFIG.get('dim', 1024),
+            ruta=SEMANTIC_CACHE_CONFIG.get('path'),
+            guardar_cada=SEMANTIC_CACHE_CONFIG.get('save_every', 20)
+        )
+        if _semantic_cache.ruta:
+            import atexit
+            atexit.register(_semantic_cache.guardar)
+    return _semantic_cache
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba de la Caché Semántica ===\n")
+
+    cache = SemanticCache()
+    cache.guardar_respuesta("Medicina", "¿Qué es CRISPR?", "CRISPR es una técnica de edición genética...")
+    cache.guardar_respuesta("Energía", "¿Qué es la fusión nuclear?", "La fusión une núcleos ligeros...")
+    cache.guardar_respuesta("Energía", "ventajas de la energía solar", "Es renovable y no emite CO2...")
+
+    for tema, pregunta in [("Medicina", "explícame CRISPR"), ("Energía", "háblame de la fusión nuclear"),
+                           ("Energía", "¿qué es la fisión nuclear?"), ("Espacio", "¿qué es CRISPR?"),
+                           ("Energía", "riesgos de la fusión nuclear"),
+                           ("Energía", "desventajas de la energía solar")]:
+        respuesta, similitud, original = cache.buscar(tema, pregunta)
+        estado = "✅" if respuesta else "❌"
+        print(f"{estado} [{tema}] {pregunta!r}: similitud {similitud:.2f} -> {original!r}")
+
+    print(f"\nEstadísticas: {cache.obtener_estadisticas()}")
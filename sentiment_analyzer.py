@@ -3,12 +3,33 @@ Módulo de análisis de sentimientos usando pysentimiento
 Analiza el sentimiento del usuario para adaptar las respuestas del chatbot
 """
 
+import importlib.util
+import threading
+
+from model_lifecycle import get_lifecycle_manager, uso_modelo
+from single_flight import SingleFlight, normalizar_clave, COALESCING_CONFIG
+from multitask_analyzer import AnalizadorMultitarea, CLAVES_RESULTADO, formatear_tarea
+from log_pipeline import obtener_logger
+
+logger = obtener_logger(__name__)
+
 try:
-    from pysentimiento import create_analyzer
-    SENTIMENT_AVAILABLE = True
+    from config import SENTIMENT_CONFIG
 except ImportError:
-    SENTIMENT_AVAILABLE = False
-    print("⚠️ pysentimiento no está instalado. Ejecuta: pip install pysentimiento")
+    SENTIMENT_CONFIG = {'window_tokens': 120, 'window_overlap': 32, 'max_windows': 8, 'extra_tasks': []}
+
+# pysentimiento arrastra torch y transformers: solo se importa al crear el analizador,
+# así los workers que delegan en el servidor de modelos no lo cargan
+SENTIMENT_AVAILABLE = importlib.util.find_spec('pysentimiento') is not None
+if not SENTIMENT_AVAILABLE:
+    logger.warning("⚠️ pysentimiento no está instalado. Ejecuta: pip install pysentimiento")
+
+# Mensajes idénticos analizados a la vez comparten una sola inferencia
+_vuelos_sentimiento = SingleFlight(
+    'sentimiento',
+    timeout=COALESCING_CONFIG.get('sentiment_timeout', 10),
+    habilitado=COALESCING_CONFIG.get('enabled', True)
+)
 
 class SentimentAnalyzer:
     """
@@ -17,17 +38,52 @@ class SentimentAnalyzer:
     
     def __init__(self):
         """Inicializa el analizador de sentimientos."""
-        if SENTIMENT_AVAILABLE:
+        self.enabled = False
+        self.analyzer = None
+        self.multitarea = None
+        self.cargar()
+    
+    def cargar(self):
+        """
+        Carga el modelo de pysentimiento y, si SENTIMENT_CONFIG['extra_tasks']
+        no está vacío, los de emoción / discurso de odio (ver multitask_analyzer).
+        
+        Returns:
+            bool: True si el modelo quedó cargado
+        """
+        if not SENTIMENT_AVAILABLE:
+            return False
+        try:
+            from pysentimiento import create_analyzer
             try:
+                # pysentimiento acaba de importar torch: fijar sus hilos antes de usarlo
+                from config import apply_concurrency_settings
+                apply_concurrency_settings()
+            except ImportError:
+                pass
+            tareas = SENTIMENT_CONFIG.get('extra_tasks', [])
+            if tareas:
+                self.multitarea = AnalizadorMultitarea(
+                    ['sentiment'] + list(tareas), lang="es", modelos=SENTIMENT_CONFIG.get('task_models')
+                )
+                self.multitarea.cargar()
+                self.analyzer = self.multitarea.analizadores['sentiment']
+            else:
                 self.analyzer = create_analyzer(task="sentiment", lang="es")
-                self.enabled = True
-                print("✅ Analizador de sentimientos cargado correctamente")
-            except Exception as e:
-                self.enabled = False
-                print(f"⚠️ Error al cargar el analizador: {e}")
-        else:
+            self.enabled = True
+            logger.info("✅ Analizador de sentimientos cargado correctamente")
+        except Exception as e:
             self.enabled = False
             self.analyzer = None
+            self.multitarea = None
+            logger.error(f"⚠️ Error al cargar el analizador: {e}")
+        return self.enabled
+    
+    def descargar(self):
+        """Libera el modelo; se recarga en el siguiente análisis (ver model_lifecycle)."""
+        self.analyzer = None
+        self.multitarea = None
+        self.enabled = False
     
     def analyze(self, texto):
         """
@@ -41,47 +97,172 @@ class SentimentAnalyzer:
                 'sentimiento': 'POS'|'NEG'|'NEU',
                 'probabilidades': {'POS': 0.x, 'NEG': 0.x, 'NEU': 0.x},
                 'confianza': float,
-                'descripcion': str
+                'descripcion': str,
+                'emocion': {...}, 'odio': {...}  # solo con SENTIMENT_CONFIG['extra_tasks']
             }
         """
-        if not self.enabled or not texto:
-            return {
-                'sentimiento': 'NEU',
-                'probabilidades': {'POS': 0.33, 'NEG': 0.33, 'NEU': 0.34},
-                'confianza': 0.0,
-                'descripcion': 'neutral'
-            }
+        if not texto:
+            return self._resultado_neutral()
         
         try:
-            resultado = self.analyzer.predict(texto)
-            sentimiento = resultado.output
-            probas = resultado.probas
+            return _vuelos_sentimiento.ejecutar(normalizar_clave(texto), self._analizar, texto)
+        except TimeoutError as e:
+            logger.error(f"Error al analizar sentimiento: {e}")
+            return self._resultado_neutral()
+    
+    def _analizar(self, texto):
+        """Inferencia de analyze() (sin coalescencia)."""
+        with uso_modelo('sentimiento'):
+            if not self.enabled:
+                return self._resultado_neutral()
+            try:
+                return self._predecir([texto])[0]
             
-            # Obtener la confianza (probabilidad máxima)
-            confianza = max(probas.values())
+            except Exception as e:
+                logger.error(f"Error al analizar sentimiento: {e}")
+                return self._resultado_neutral()
+    
+    def _ventanas(self, texto):
+        """
+        Divide un texto largo en ventanas solapadas de tokens que el modelo no trunca.
+        
+        Args:
+            texto (str): Texto a analizar
             
-            # Descripción del sentimiento
-            descripciones = {
-                'POS': 'positivo',
-                'NEG': 'negativo',
-                'NEU': 'neutral'
-            }
+        Returns:
+            tuple: (textos de las ventanas, peso de cada una = número de tokens)
+        """
+        tokenizer = getattr(self.analyzer, 'tokenizer', None)
+        if tokenizer is None:
+            return [texto], [1]
+        ids = tokenizer(texto, add_special_tokens=False)['input_ids']
+        # Margen para los tokens especiales y para lo que añade el preprocesado de pysentimiento
+        tamano = min(SENTIMENT_CONFIG.get('window_tokens', 120), tokenizer.model_max_length - 8)
+        if len(ids) <= tamano:
+            return [texto], [len(ids) or 1]
+        
+        paso = max(1, tamano - SENTIMENT_CONFIG.get('window_overlap', 32))
+        inicios = list(range(0, len(ids) - tamano + paso, paso))
+        maximo = SENTIMENT_CONFIG.get('max_windows', 8)
+        if len(inicios) > maximo:
+            # Se reparten por todo el texto (incluidos principio y final) en lugar de quedarse con el comienzo
+            inicios = [inicios[round(i * (len(inicios) - 1) / (maximo - 1))] for i in range(maximo)] if maximo > 1 else inicios[:1]
+        ventanas = [ids[inicio:inicio + tamano] for inicio in inicios]
+        return [tokenizer.decode(v, skip_special_tokens=True) for v in ventanas], [len(v) for v in ventanas]
+    
+    def _predecir(self, textos):
+        """
+        Predice el sentimiento (y las tareas adicionales) de varios textos en
+        una sola pasada del modelo; los textos largos se dividen en ventanas y
+        sus probabilidades se promedian ponderadas por el número de tokens de
+        cada ventana (en las tareas multietiqueta se toma la máxima).
+        
+        Args:
+            textos (list): Textos no vacíos
             
-            return {
-                'sentimiento': sentimiento,
-                'probabilidades': probas,
-                'confianza': confianza,
-                'descripcion': descripciones.get(sentimiento, 'neutral')
-            }
+        Returns:
+            list: Un resultado formateado por texto
+        """
+        entradas, pesos, tramos = [], [], []
+        for texto in textos:
+            ventanas, pesos_texto = self._ventanas(texto)
+            tramos.append((len(entradas), len(entradas) + len(ventanas)))
+            entradas.extend(ventanas)
+            pesos.extend(pesos_texto)
         
-        except Exception as e:
-            print(f"Error al analizar sentimiento: {e}")
-            return {
-                'sentimiento': 'NEU',
-                'probabilidades': {'POS': 0.33, 'NEG': 0.33, 'NEU': 0.34},
-                'confianza': 0.0,
-                'descripcion': 'neutral'
+        if self.multitarea is not None:
+            salidas = self.multitarea.predecir(entradas)
+            multietiqueta = self.multitarea.multietiqueta
+        else:
+            salidas = [{'sentiment': salida.probas} for salida in self.analyzer.predict(entradas)]
+            multietiqueta = ()
+        
+        resultados = []
+        for inicio, fin in tramos:
+            agregadas = {
+                tarea: self._agregar([s[tarea] for s in salidas[inicio:fin]], pesos[inicio:fin], tarea in multietiqueta)
+                for tarea in salidas[inicio]
             }
+            probas = agregadas.pop('sentiment')
+            resultado = self._formatear_probas(max(probas, key=probas.get), probas)
+            for tarea, valores in agregadas.items():
+                resultado[CLAVES_RESULTADO.get(tarea, tarea)] = formatear_tarea(tarea, valores, tarea in multietiqueta)
+            if fin - inicio > 1:
+                resultado['ventanas'] = fin - inicio
+            resultados.append(resultado)
+        return resultados
+    
+    @staticmethod
+    def _agregar(probas_ventanas, pesos, maximo):
+        """Combina las probabilidades de las ventanas de un texto (media ponderada o máximo)."""
+        if len(probas_ventanas) == 1:
+            return dict(probas_ventanas[0])
+        if maximo:
+            return {e: max(p[e] for p in probas_ventanas) for e in probas_ventanas[0]}
+        total = float(sum(pesos))
+        return {e: sum(p[e] * peso for p, peso in zip(probas_ventanas, pesos)) / total for e in probas_ventanas[0]}
+    
+    def analyze_batch(self, textos):
+        """
+        Analiza el sentimiento de varios textos en una sola pasada del modelo.
+        
+        Args:
+            textos (list): Textos a analizar
+            
+        Returns:
+            list: Un resultado (mismo formato que analyze) por texto
+        """
+        # Los textos vacíos no se envían al modelo y los repetidos se analizan una sola vez
+        unicos = {}
+        for i, texto in enumerate(textos):
+            if texto:
+                unicos.setdefault(normalizar_clave(texto), []).append(i)
+        resultados = [self._resultado_neutral() for _ in textos]
+        if not unicos:
+            return resultados
+        
+        with uso_modelo('sentimiento'):
+            if not self.enabled:
+                return resultados
+            try:
+                grupos = list(unicos.values())
+                salidas = self._predecir([textos[indices[0]] for indices in grupos])
+                for indices, resultado in zip(grupos, salidas):
+                    for i in indices:
+                        resultados[i] = resultado
+            except Exception as e:
+                logger.error(f"Error al analizar sentimiento en lote: {e}")
+        return resultados
+    
+    @staticmethod
+    def _formatear_probas(sentimiento, probas):
+        """Resultado del chatbot a partir de la etiqueta y sus probabilidades."""
+        # Obtener la confianza (probabilidad máxima)
+        confianza = max(probas.values())
+        
+        # Descripción del sentimiento
+        descripciones = {
+            'POS': 'positivo',
+            'NEG': 'negativo',
+            'NEU': 'neutral'
+        }
+        
+        return {
+            'sentimiento': sentimiento,
+            'probabilidades': probas,
+            'confianza': confianza,
+            'descripcion': descripciones.get(sentimiento, 'neutral')
+        }
+    
+    @staticmethod
+    def _resultado_neutral():
+        """Resultado por defecto cuando no hay modelo o texto."""
+        return {
+            'sentimiento': 'NEU',
+            'probabilidades': {'POS': 0.33, 'NEG': 0.33, 'NEU': 0.34},
+            'confianza': 0.0,
+            'descripcion': 'neutral'
+        }
     
     def get_response_tone(self, sentimiento_analizado):
         """
@@ -144,14 +325,89 @@ class SentimentAnalyzer:
         return None
 
 
+class SentimientoDiferido:
+    """
+    Sentimiento de un mensaje que solo se calcula si alguna rama lo pide.
+    valor() llama al modelo la primera vez y memoriza el resultado; con un
+    ejecutor el análisis empieza en segundo plano mientras se enruta y
+    cerrar() lo cancela si nadie llegó a usarlo.
+    """
+
+    def __init__(self, analizador, texto, precalculado=None, ejecutor=None):
+        """
+        Args:
+            analizador (SentimentAnalyzer): Analizador (None = sentimiento desactivado)
+            texto (str): Mensaje del usuario
+            precalculado (dict): Resultado ya calculado (p. ej. en lote)
+            ejecutor (Executor): Si se indica, el análisis se lanza de forma especulativa
+        """
+        self.analizador = analizador
+        self.texto = texto
+        self.resultado = precalculado
+        # Cómo se obtuvo el resultado: None (aún no), 'precalculado', 'bajo_demanda', 'especulativo', 'error'
+        self.origen = 'precalculado' if precalculado is not None else None
+        self._futuro = None
+        self._lock = threading.Lock()
+        if self.origen is None and analizador is not None and ejecutor is not None:
+            self._futuro = ejecutor.submit(analizador.analyze, texto)
+
+    def valor(self):
+        """
+        Devuelve el sentimiento, calculándolo si hace falta.
+
+        Returns:
+            dict: Resultado de analyze() o None si no hay analizador o falló
+        """
+        with self._lock:
+            if self.origen is None and self.analizador is not None:
+                try:
+                    if self._futuro is not None:
+                        self.resultado = self._futuro.result()
+                        self.origen = 'especulativo'
+                    else:
+                        self.resultado = self.analizador.analyze(self.texto)
+                        self.origen = 'bajo_demanda'
+                except Exception as e:
+                    logger.error(f"Error en análisis de sentimientos: {e}")
+                    self.origen = 'error'
+            return self.resultado
+
+    def cerrar(self):
+        """
+        Termina el uso del valor: cancela el análisis especulativo que nadie pidió.
+
+        Returns:
+            str: Origen del resultado, 'evitado' si el modelo no llegó a ejecutarse,
+                 'descartado' si se ejecutó en segundo plano sin usarse, o None sin analizador
+        """
+        if self.origen is not None or self.analizador is None:
+            return self.origen
+        if self._futuro is not None and not self._futuro.cancel():
+            return 'descartado'
+        return 'evitado'
+
+
 # Instancia global del analizador
 _sentiment_analyzer = None
 
 def get_sentiment_analyzer():
-    """Obtiene la instancia global del analizador de sentimientos."""
+    """
+    Obtiene la instancia global del analizador de sentimientos.
+    Si el servidor de modelos está activado devuelve un stub RPC con la misma interfaz.
+    """
     global _sentiment_analyzer
     if _sentiment_analyzer is None:
-        _sentiment_analyzer = SentimentAnalyzer()
+        from model_server import servidor_habilitado
+        if servidor_habilitado():
+            from model_server import RemoteSentimentAnalyzer
+            _sentiment_analyzer = RemoteSentimentAnalyzer()
+        else:
+            analizador = SentimentAnalyzer()
+            get_lifecycle_manager().registrar(
+                'sentimiento', analizador.cargar, analizador.descargar, lambda: analizador.enabled,
+                bajo_demanda=SENTIMENT_AVAILABLE
+            )
+            _sentiment_analyzer = analizador
     return _sentiment_analyzer
 
 
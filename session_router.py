@@ -0,0 +1,594 @@
+"""
+Enrutador de sesiones para ejecutar varios nodos de backend.py
+El estado de la conversación de cada sesión vive en el nodo que la atiende
+(SESSION_BACKEND=memory), así que todas las peticiones de una sesión deben
+llegar al mismo nodo. Este proceso recibe el tráfico, obtiene el id de sesión
+igual que backend.py (campo 'session_id', ?session_id=, cabecera X-Session-Id
+o IP de origen) y lo asigna a un nodo con hashing consistente y nodos
+virtuales: al añadir o quitar un nodo solo cambian de nodo las sesiones del
+tramo del anillo afectado (~1/N). Los nodos caídos se detectan con
+comprobaciones periódicas de salud y por errores de conexión; sus sesiones
+pasan al siguiente nodo del anillo y vuelven cuando el nodo se recupera.
+Los WebSocket (/ws) se reenvían como un túnel TCP al nodo de la sesión.
+
+Uso:
+    python -c "from backend import app; app.run(port=5001, threaded=True)"   # Un proceso por nodo
+    ROUTER_NODES=http://127.0.0.1:5001,http://127.0.0.1:5002 python session_router.py
+    curl -X POST localhost:5000/router/nodos -d '{"nodo": "http://127.0.0.1:5003"}'   # Añadir un nodo
+"""
+
+import bisect
+import hashlib
+import http.client
+import json
+import select
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from log_pipeline import obtener_logger
+from session_store import id_sesion
+
+try:
+    from config import ROUTER_CONFIG
+except ImportError:
+    ROUTER_CONFIG = {
+        'nodes': ['http://127.0.0.1:5001'], 'host': '127.0.0.1', 'port': 5000, 'virtual_nodes': 160,
+        'health_interval': 2.0, 'health_timeout': 1.0, 'max_failures': 2, 'timeout': 60
+    }
+
+logger = obtener_logger(__name__)
+
+# Cabeceras de un solo salto: no se reenvían (RFC 7230, 6.1)
+_CABECERAS_SALTO = frozenset((
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection',
+    'te', 'trailer', 'transfer-encoding', 'upgrade'
+))
+
+# El enrutador escribe su propio Content-Length: el del cliente no se reenvía (duplicado)
+_CABECERAS_NO_REENVIADAS = _CABECERAS_SALTO | {'content-length'}
+
+# Cabecera de la respuesta con el nodo que la atendió
+CABECERA_NODO = 'X-Backend-Node'
+
+
+def posicion(clave):
+    """Posición de una clave en el anillo: 64 bits de MD5 (estable entre procesos, a diferencia de hash())."""
+    return int.from_bytes(hashlib.md5(clave.encode('utf-8')).digest()[:8], 'big')
+
+
+class AnilloHash:
+    """
+    Anillo de hashing consistente con nodos virtuales.
+    Cada nodo ocupa `virtuales` posiciones; una clave pertenece al primer
+    nodo que aparece en sentido horario desde su posición.
+    """
+
+    def __init__(self, nodos=(), virtuales=160):
+        """
+        Args:
+            nodos (list): Nodos iniciales
+            virtuales (int): Posiciones por nodo
+        """
+        self.virtuales = virtuales
+        self.nodos = []
+        # (posiciones ordenadas, nodo de cada posición, nodos distintos); se sustituye entero al cambiar
+        self._anillo = ((), (), 0)
+        for nodo in nodos:
+            self.agregar(nodo)
+
+    def _reconstruir(self):
+        puntos = sorted(
+            (posicion(f"{nodo}#{i}"), nodo) for nodo in self.nodos for i in range(self.virtuales)
+        )
+        self._anillo = (tuple(p for p, _ in puntos), tuple(n for _, n in puntos), len(self.nodos))
+
+    def agregar(self, nodo):
+        """Añade un nodo (si no estaba)."""
+        if nodo not in self.nodos:
+            self.nodos = self.nodos + [nodo]
+            self._reconstruir()
+
+    def quitar(self, nodo):
+        """Quita un nodo (si estaba)."""
+        if nodo in self.nodos:
+            self.nodos = [n for n in self.nodos if n != nodo]
+            self._reconstruir()
+
+    def nodo_para(self, clave, valido=None):
+        """
+        Nodo de una clave.
+
+        Args:
+            clave (str): Id de sesión
+            valido (callable): Si se indica, se salta en sentido horario a los nodos que no lo cumplan
+
+        Returns:
+            str: Nodo o None si no hay ninguno (válido)
+        """
+        posiciones, duenos, distintos = self._anillo
+        if not posiciones:
+            return None
+        inicio = bisect.bisect(posiciones, posicion(clave))
+        descartados = set()
+        for k in range(len(posiciones)):
+            nodo = duenos[(inicio + k) % len(posiciones)]
+            if nodo in descartados:
+                continue
+            if valido is None or valido(nodo):
+                return nodo
+            descartados.add(nodo)
+            if len(descartados) == distintos:
+                break
+        return None
+
+    def reparto(self):
+        """
+        Returns:
+            dict: Fracción del anillo (y por tanto de las sesiones esperadas) de cada nodo
+        """
+        posiciones, duenos, _ = self._anillo
+        fracciones = {nodo: 0.0 for nodo in self.nodos}
+        if not posiciones:
+            return fracciones
+        total = 2 ** 64
+        for i, nodo in enumerate(duenos):
+            # Cada posición es dueña del tramo que va desde la anterior hasta ella
+            anterior = posiciones[i - 1] if i else posiciones[-1] - total
+            fracciones[nodo] += (posiciones[i] - anterior) / total
+        return fracciones
+
+
+def extraer_sesion(metodo, ruta, cabeceras, cuerpo, cliente):
+    """
+    Id de sesión de una petición, con la precedencia de backend.obtener_id_sesion
+    (session_store.id_sesion): el cuerpo JSON en POST /chat o los parámetros de la
+    URL en /ws, después X-Session-Id y por último la IP.
+
+    Args:
+        metodo (str): Método HTTP
+        ruta (str): Ruta con la query string
+        cabeceras: Cabeceras de la petición (admite .get)
+        cuerpo (bytes): Cuerpo de la petición
+        cliente (str): IP de origen
+
+    Returns:
+        str: Id de sesión (como mucho 128 caracteres)
+    """
+    datos = None
+    if metodo == 'GET':
+        datos = {clave: valores[0] for clave, valores in parse_qs(urlsplit(ruta).query).items()}
+    elif cuerpo and 'json' in (cabeceras.get('Content-Type') or ''):
+        try:
+            datos = json.loads(cuerpo)
+        except ValueError:
+            pass
+    return id_sesion(datos if isinstance(datos, dict) else None, cabeceras, cliente)
+
+
+class _SinConexion(Exception):
+    """No se pudo conectar con el nodo: la petición no llegó y puede reintentarse en otro."""
+
+
+class EnrutadorSesiones:
+    """
+    Asignación de sesiones a nodos, estado de salud de los nodos y
+    reenvío de peticiones HTTP (con conexiones persistentes por hilo).
+    """
+
+    def __init__(self, nodos, virtuales=160, intervalo_salud=2.0, timeout_salud=1.0, fallos_maximos=2, timeout=60):
+        """
+        Args:
+            nodos (list): URLs de los nodos (http://host:puerto)
+            virtuales (int): Posiciones de cada nodo en el anillo
+            intervalo_salud (float): Segundos entre comprobaciones de salud
+            timeout_salud (float): Segundos de espera de cada comprobación
+            fallos_maximos (int): Comprobaciones fallidas seguidas para dar un nodo por caído
+            timeout (float): Segundos de espera por la respuesta de un nodo
+        """
+        self.anillo = AnilloHash(virtuales=virtuales)
+        self.intervalo_salud = intervalo_salud
+        self.timeout_salud = timeout_salud
+        self.fallos_maximos = fallos_maximos
+        self.timeout = timeout
+        self.salud = {}  # nodo -> {'fallos', 'peticiones', 'errores'}
+        self.estadisticas = {'peticiones': 0, 'reintentos': 0, 'sin_nodo': 0, 'websockets': 0}
+        self._sanos = set()
+        self._direcciones = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._detener = threading.Event()
+        self._hilo = None
+        for nodo in nodos:
+            self.agregar_nodo(nodo)
+
+    # ---------- Nodos ----------
+
+    @staticmethod
+    def normalizar(nodo):
+        """URL de un nodo sin barra final y con esquema."""
+        nodo = nodo.strip().rstrip('/')
+        return nodo if '://' in nodo else f"http://{nodo}"
+
+    def agregar_nodo(self, nodo):
+        """
+        Añade un nodo al anillo (se considera sano hasta que falle).
+
+        Returns:
+            str: Nodo normalizado
+        """
+        nodo = self.normalizar(nodo)
+        partes = urlsplit(nodo)
+        with self._lock:
+            self._direcciones[nodo] = (partes.scheme, partes.hostname, partes.port or (443 if partes.scheme == 'https' else 80))
+            self.salud.setdefault(nodo, {'fallos': 0, 'peticiones': 0, 'errores': 0})
+            self._sanos.add(nodo)
+            self.anillo.agregar(nodo)
+        logger.info(f"✅ Nodo añadido: {nodo} ({len(self.anillo.nodos)} nodos)")
+        return nodo
+
+    def quitar_nodo(self, nodo):
+        """
+        Quita un nodo del anillo; sus sesiones pasan a los nodos siguientes.
+
+        Returns:
+            bool: True si el nodo estaba en el anillo
+        """
+        nodo = self.normalizar(nodo)
+        with self._lock:
+            if nodo not in self._direcciones:
+                return False
+            self.anillo.quitar(nodo)
+            self._sanos.discard(nodo)
+            self.salud.pop(nodo, None)
+            del self._direcciones[nodo]
+        logger.info(f"🔄 Nodo quitado: {nodo} ({len(self.anillo.nodos)} nodos)")
+        return True
+
+    def nodo_para(self, clave):
+        """Nodo sano que atiende una sesión (None si no queda ninguno)."""
+        return self.anillo.nodo_para(clave, self._sanos.__contains__)
+
+    def marcar(self, nodo, sano):
+        """
+        Registra el resultado de una comprobación de salud de un nodo.
+
+        Args:
+            nodo (str): Nodo
+            sano (bool): La comprobación tuvo éxito
+        """
+        with self._lock:
+            salud = self.salud.get(nodo)
+            if salud is None:
+                return
+            if sano:
+                salud['fallos'] = 0
+                if nodo not in self._sanos:
+                    self._sanos.add(nodo)
+                    logger.info(f"✅ Nodo recuperado: {nodo}")
+                return
+            salud['fallos'] += 1
+            if salud['fallos'] >= self.fallos_maximos and nodo in self._sanos:
+                self._sanos.discard(nodo)
+                logger.warning(f"⚠️ Nodo caído: {nodo} (sus sesiones pasan al siguiente nodo del anillo)")
+
+    def _caido(self, nodo):
+        """Un error de conexión da el nodo por caído sin esperar a la comprobación de salud."""
+        for _ in range(self.fallos_maximos):
+            self.marcar(nodo, False)
+
+    # ---------- Salud ----------
+
+    def comprobar(self, nodo):
+        """
+        Returns:
+            bool: El nodo responde a GET / sin error de servidor
+        """
+        direccion = self._direcciones.get(nodo)
+        if direccion is None:
+            return False
+        conexion = self._nueva_conexion(direccion, self.timeout_salud)
+        try:
+            conexion.request('GET', '/')
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            return respuesta.status < 500
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conexion.close()
+
+    def _bucle_salud(self):
+        while not self._detener.wait(self.intervalo_salud):
+            for nodo in list(self._direcciones):
+                self.marcar(nodo, self.comprobar(nodo))
+
+    def iniciar(self):
+        """Inicia las comprobaciones de salud en segundo plano."""
+        if self._hilo is None:
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle_salud, name='salud-nodos', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        """Detiene las comprobaciones de salud."""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    # ---------- Reenvío ----------
+
+    def _nueva_conexion(self, direccion, timeout):
+        esquema, host, puerto = direccion
+        clase = http.client.HTTPSConnection if esquema == 'https' else http.client.HTTPConnection
+        return clase(host, puerto, timeout=timeout)
+
+    def _conexion(self, nodo):
+        """Conexión persistente de este hilo con el nodo."""
+        conexiones = getattr(self._local, 'conexiones', None)
+        if conexiones is None:
+            conexiones = self._local.conexiones = {}
+        conexion = conexiones.get(nodo)
+        if conexion is None:
+            conexion = conexiones[nodo] = self._nueva_conexion(self._direcciones[nodo], self.timeout)
+        return conexion
+
+    def _enviar(self, nodo, metodo, ruta, cuerpo, cabeceras):
+        conexion = self._conexion(nodo)
+        for intento in range(2):
+            reutilizada = conexion.sock is not None
+            if not reutilizada:
+                try:
+                    conexion.connect()
+                except OSError as e:
+                    conexion.close()
+                    raise _SinConexion(str(e))
+            try:
+                conexion.putrequest(metodo, ruta, skip_host=True, skip_accept_encoding=True)
+                for nombre, valor in cabeceras:
+                    conexion.putheader(nombre, valor)
+                if cuerpo or metodo in ('POST', 'PUT', 'PATCH'):
+                    conexion.putheader('Content-Length', str(len(cuerpo)))
+                conexion.endheaders(cuerpo or None)
+                respuesta = conexion.getresponse()
+                datos = respuesta.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conexion.close()
+                # El nodo cerró una conexión persistente inactiva: se reintenta una vez con una nueva
+                if reutilizada and intento == 0:
+                    continue
+                raise
+            except (OSError, http.client.HTTPException):
+                conexion.close()
+                raise
+            if respuesta.will_close:
+                conexion.close()
+            return respuesta.status, respuesta.getheaders(), datos
+
+    def reenviar(self, clave, metodo, ruta, cuerpo, cabeceras):
+        """
+        Reenvía una petición al nodo de la sesión. Si no se puede conectar,
+        lo da por caído y prueba con el siguiente nodo del anillo.
+
+        Args:
+            clave (str): Id de sesión
+            metodo (str): Método HTTP
+            ruta (str): Ruta con la query string
+            cuerpo (bytes): Cuerpo de la petición
+            cabeceras (list): [(nombre, valor)] sin cabeceras de un solo salto
+
+        Returns:
+            tuple: (código, [(cabecera, valor)], cuerpo, nodo); nodo es None si no había ninguno disponible
+        """
+        self.estadisticas['peticiones'] += 1
+        for _ in range(max(1, len(self.anillo.nodos))):
+            nodo = self.nodo_para(clave)
+            if nodo is None:
+                break
+            salud = self.salud.get(nodo)
+            try:
+                codigo, cabeceras_respuesta, datos = self._enviar(nodo, metodo, ruta, cuerpo, cabeceras)
+            except _SinConexion:
+                self._caido(nodo)
+                self.estadisticas['reintentos'] += 1
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                # La petición pudo llegar al nodo: no se reintenta en otro
+                if salud is not None:
+                    salud['errores'] += 1
+                logger.error(f"❌ Error al reenviar a {nodo}: {e}")
+                return 502, [('Content-Type', 'application/json')], _json({'error': 'Error del nodo'}), nodo
+            if salud is not None:
+                salud['peticiones'] += 1
+            return codigo, cabeceras_respuesta, datos, nodo
+        self.estadisticas['sin_nodo'] += 1
+        return 503, [('Content-Type', 'application/json'), ('Retry-After', '5')], \
+            _json({'error': 'No hay nodos disponibles'}), None
+
+    def conectar_directo(self, clave):
+        """
+        Socket con el nodo de la sesión para un túnel (WebSocket).
+
+        Returns:
+            tuple: (socket, nodo) o (None, None) si no hay nodo disponible
+        """
+        for _ in range(max(1, len(self.anillo.nodos))):
+            nodo = self.nodo_para(clave)
+            if nodo is None:
+                break
+            _, host, puerto = self._direcciones[nodo]
+            try:
+                return socket.create_connection((host, puerto), timeout=self.timeout_salud), nodo
+            except OSError:
+                self._caido(nodo)
+        return None, None
+
+    def obtener_estadisticas(self):
+        """
+        Returns:
+            dict: Contadores globales y, por nodo, salud, peticiones y fracción del anillo
+        """
+        reparto = self.anillo.reparto()
+        return dict(
+            self.estadisticas,
+            virtuales=self.anillo.virtuales,
+            nodos={
+                nodo: dict(salud, sano=nodo in self._sanos, reparto=round(reparto.get(nodo, 0.0), 4))
+                for nodo, salud in list(self.salud.items())
+            }
+        )
+
+
+def _json(datos):
+    return json.dumps(datos, ensure_ascii=False).encode('utf-8')
+
+
+class _ManejadorProxy(BaseHTTPRequestHandler):
+    """Atiende cada conexión de cliente y reenvía sus peticiones al nodo de la sesión."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, formato, *args):
+        logger.debug("%s " + formato, self.address_string(), *args)
+
+    def do_GET(self):
+        self._atender()
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = do_GET
+
+    def _responder(self, codigo, cabeceras, cuerpo, nodo=None):
+        self.send_response_only(codigo)
+        for nombre, valor in cabeceras:
+            if nombre.lower() not in _CABECERAS_NO_REENVIADAS:
+                self.send_header(nombre, valor)
+        if nodo:
+            self.send_header(CABECERA_NODO, nodo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(cuerpo)
+
+    def _atender(self):
+        enrutador = self.server.enrutador
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            self.close_connection = True
+            return self._responder(411, [('Content-Type', 'application/json')], _json({'error': 'Se requiere Content-Length'}))
+        longitud = int(self.headers.get('Content-Length') or 0)
+        cuerpo = self.rfile.read(longitud) if longitud else b''
+
+        if urlsplit(self.path).path.startswith('/router/'):
+            return self._administrar(enrutador, cuerpo)
+
+        cliente = self.client_address[0]
+        clave = extraer_sesion(self.command, self.path, self.headers, cuerpo, cliente)
+        cabeceras = [(k, v) for k, v in self.headers.items() if k.lower() not in _CABECERAS_NO_REENVIADAS]
+        # Sin session_id explícito backend.py usaría la IP del enrutador: se le pasa la clave usada aquí
+        if not self.headers.get('X-Session-Id'):
+            cabeceras.append(('X-Session-Id', clave))
+        reenviado = self.headers.get('X-Forwarded-For')
+        cabeceras.append(('X-Forwarded-For', f"{reenviado}, {cliente}" if reenviado else cliente))
+
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            return self._tunel(enrutador, clave, cabeceras)
+        codigo, cabeceras_respuesta, datos, nodo = enrutador.reenviar(clave, self.command, self.path, cuerpo, cabeceras)
+        self._responder(codigo, cabeceras_respuesta, datos, nodo)
+
+    def _tunel(self, enrutador, clave, cabeceras):
+        """Reenvía el handshake y después copia bytes en ambos sentidos hasta que uno cierre."""
+        self.close_connection = True
+        destino, nodo = enrutador.conectar_directo(clave)
+        if destino is None:
+            return self._responder(503, [('Content-Type', 'application/json')], _json({'error': 'No hay nodos disponibles'}))
+        enrutador.estadisticas['websockets'] += 1
+        lineas = [f"{self.command} {self.path} HTTP/1.1"]
+        lineas += [f"{k}: {v}" for k, v in cabeceras]
+        lineas += ["Connection: Upgrade", f"Upgrade: {self.headers['Upgrade']}", "", ""]
+        origen = self.connection
+        try:
+            destino.settimeout(None)
+            destino.sendall("\r\n".join(lineas).encode('latin-1'))
+            sockets = [origen, destino]
+            while True:
+                listos, _, _ = select.select(sockets, [], [])
+                for lectura in listos:
+                    datos = lectura.recv(65536)
+                    if not datos:
+                        return
+                    (destino if lectura is origen else origen).sendall(datos)
+        except OSError:
+            pass
+        finally:
+            destino.close()
+
+    def _administrar(self, enrutador, cuerpo):
+        """/router/estado (GET) y /router/nodos (POST añade, DELETE quita; solo desde la propia máquina)."""
+        ruta = urlsplit(self.path).path
+        tipo = [('Content-Type', 'application/json')]
+        if ruta == '/router/estado' and self.command == 'GET':
+            return self._responder(200, tipo, _json(enrutador.obtener_estadisticas()))
+        if ruta != '/router/nodos' or self.command not in ('POST', 'DELETE'):
+            return self._responder(404, tipo, _json({'error': 'No encontrado'}))
+        if self.client_address[0] not in ('127.0.0.1', '::1'):
+            return self._responder(403, tipo, _json({'error': 'Solo se admite desde la propia máquina'}))
+        try:
+            nodo = json.loads(cuerpo or b'{}').get('nodo')
+        except (ValueError, AttributeError):
+            nodo = None
+        if not nodo:
+            return self._responder(400, tipo, _json({'error': "Falta el campo 'nodo'"}))
+        if self.command == 'POST':
+            return self._responder(200, tipo, _json({'nodo': enrutador.agregar_nodo(nodo), 'nodos': enrutador.anillo.nodos}))
+        if not enrutador.quitar_nodo(nodo):
+            return self._responder(404, tipo, _json({'error': 'Nodo desconocido'}))
+        return self._responder(200, tipo, _json({'nodos': enrutador.anillo.nodos}))
+
+
+def crear_enrutador(nodos=None):
+    """
+    Crea un enrutador según ROUTER_CONFIG.
+
+    Args:
+        nodos (list): URLs de los nodos (por defecto ROUTER_CONFIG['nodes'])
+
+    Returns:
+        EnrutadorSesiones: Instancia sin iniciar
+    """
+    return EnrutadorSesiones(
+        nodos if nodos is not None else ROUTER_CONFIG.get('nodes', []),
+        virtuales=ROUTER_CONFIG.get('virtual_nodes', 160),
+        intervalo_salud=ROUTER_CONFIG.get('health_interval', 2.0),
+        timeout_salud=ROUTER_CONFIG.get('health_timeout', 1.0),
+        fallos_maximos=ROUTER_CONFIG.get('max_failures', 2),
+        timeout=ROUTER_CONFIG.get('timeout', 60)
+    )
+
+
+def crear_servidor(enrutador, host='127.0.0.1', puerto=5000):
+    """
+    Servidor HTTP (un hilo por conexión de cliente) que reenvía al enrutador.
+
+    Returns:
+        ThreadingHTTPServer: Servidor listo para serve_forever()
+    """
+    servidor = ThreadingHTTPServer((host, puerto), _ManejadorProxy)
+    servidor.daemon_threads = True
+    servidor.enrutador = enrutador
+    return servidor
+
+
+if __name__ == "__main__":
+    enrutador = crear_enrutador()
+    host, puerto = ROUTER_CONFIG.get('host', '127.0.0.1'), ROUTER_CONFIG.get('port', 5000)
+    servidor = crear_servidor(enrutador, host, puerto)
+    enrutador.iniciar()
+    print(f"🔀 Enrutador de sesiones en http://{host}:{puerto} → {len(enrutador.anillo.nodos)} nodo(s): "
+          f"{', '.join(enrutador.anillo.nodos)}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Enrutador detenido")
+    finally:
+        enrutador.detener()
+        servidor.server_close()
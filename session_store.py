@@ -0,0 +1,350 @@
+"""
+Módulo de almacenamiento de sesiones del chatbot
+Permite guardar el `estado` de cada conversación en memoria o en un servidor
+compatible con Redis, de modo que varias instancias de backend.py compartan sesiones
+"""
+
+import itertools
+import json
+from abc import ABC, abstractmethod
+import threading
+import time
+import zlib
+
+from conversation_history import HistorialConversacion
+from log_pipeline import obtener_logger
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = obtener_logger(__name__)
+
+# Prefijos del formato serializado: JSON plano o JSON comprimido con zlib
+_FORMATO_JSON = b'j'
+_FORMATO_ZLIB = b'z'
+_UMBRAL_COMPRESION = 512  # bytes
+
+
+def id_sesion(datos, cabeceras, ip):
+    """
+    Identifica la sesión de una petición. backend.py y session_router.py usan esta
+    misma precedencia para que el enrutador envíe cada sesión al nodo que la guarda.
+
+    Args:
+        datos (dict): Cuerpo JSON (POST /chat) o parámetros de la URL (/ws)
+        cabeceras: Cabeceras de la petición (admite .get)
+        ip (str): IP de origen, si no hay 'session_id' ni X-Session-Id
+
+    Returns:
+        str: Id de sesión (como mucho 128 caracteres)
+    """
+    session_id = (datos.get('session_id') if datos else None) or cabeceras.get('X-Session-Id')
+    if not session_id:
+        session_id = ip or 'anonimo'
+    return str(session_id)[:128]
+
+
+def nuevo_estado():
+    """Crea el estado inicial de una conversación."""
+    return {
+        'saludo': False,
+        'ultimo_tema': None,
+        'temas_discutidos': [],
+        'analisis_sentimiento': None,
+        'contador_mensajes': 0,
+        'historial': None  # HistorialConversacion, se crea con el primer mensaje
+    }
+
+
+def serializar_estado(estado):
+    """
+    Serializa un estado de conversación en bytes compactos.
+
+    Args:
+        estado (dict): Estado de la conversación
+
+    Returns:
+        bytes: Estado serializado (JSON sin espacios, comprimido si es grande)
+    """
+    datos = dict(estado)
+    historial = datos.get('historial')
+    if historial is not None:
+        datos['historial'] = historial.to_columnas()
+
+    # El análisis de sentimiento solo se usa en la respuesta actual:
+    # se guarda lo imprescindible para mostrarlo
+    sentimiento = datos.get('analisis_sentimiento')
+    if sentimiento:
+        datos['analisis_sentimiento'] = {
+            'sentimiento': sentimiento.get('sentimiento'),
+            'confianza': round(sentimiento.get('confianza', 0.0), 4),
+            'descripcion': sentimiento.get('descripcion'),
+        }
+
+    crudo = json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(crudo) > _UMBRAL_COMPRESION:
+        return _FORMATO_ZLIB + zlib.compress(crudo, 6)
+    return _FORMATO_JSON + crudo
+
+
+def deserializar_estado(datos, max_caracteres=500):
+    """
+    Reconstruye un estado serializado con serializar_estado.
+
+    Args:
+        datos (bytes): Estado serializado
+        max_caracteres (int): Longitud máxima guardada por mensaje en el historial
+
+    Returns:
+        dict: Estado de la conversación
+    """
+    formato, cuerpo = datos[:1], datos[1:]
+    if formato == _FORMATO_ZLIB:
+        cuerpo = zlib.decompress(cuerpo)
+    estado = json.loads(cuerpo.decode('utf-8'))
+    if estado.get('historial') is not None:
+        estado['historial'] = HistorialConversacion.from_columnas(
+            estado['historial'], max_caracteres=max_caracteres
+        )
+    return estado
+
+
+class SessionStore(ABC):
+    """
+    Interfaz común de los almacenes de sesiones.
+    """
+
+    def __init__(self, ttl=1800):
+        """
+        Args:
+            ttl (int): Segundos de inactividad tras los que expira una sesión
+        """
+        self.ttl = ttl
+
+    def cargar(self, session_id):
+        """Devuelve el estado de una sesión (uno nuevo si no existe o expiró)."""
+        return self.cargar_varias([session_id])[session_id]
+
+    def guardar(self, session_id, estado):
+        """Guarda el estado de una sesión y renueva su expiración."""
+        self.guardar_varias({session_id: estado})
+
+    @abstractmethod
+    def cargar_varias(self, session_ids):
+        """
+        Carga varias sesiones de una vez.
+
+        Returns:
+            dict: {session_id: estado}
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def guardar_varias(self, estados):
+        """Guarda varias sesiones de una vez ({session_id: estado})."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def eliminar(self, session_id):
+        """Elimina una sesión."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def contar(self):
+        """Número de sesiones activas."""
+        raise NotImplementedError
+
+    def muestra(self, n):
+        """
+        Hasta n estados guardados en este proceso (para estimar su memoria).
+
+        Returns:
+            list: Estados; vacía si las sesiones viven fuera del proceso
+        """
+        return []
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Almacén en memoria del proceso (una sola instancia de backend).
+    Las sesiones inactivas se purgan de forma perezosa.
+    """
+
+    def __init__(self, ttl=1800, intervalo_purga=60):
+        super().__init__(ttl)
+        self._sesiones = {}
+        self._expiraciones = {}
+        self._lock = threading.Lock()
+        self._intervalo_purga = intervalo_purga
+        self._ultima_purga = time.monotonic()
+
+    def _purgar(self, ahora):
+        if ahora - self._ultima_purga < self._intervalo_purga:
+            return
+        self._ultima_purga = ahora
+        vencidas = [sid for sid, vence in self._expiraciones.items() if vence <= ahora]
+        for sid in vencidas:
+            self._sesiones.pop(sid, None)
+            self._expiraciones.pop(sid, None)
+
+    def cargar_varias(self, session_ids):
+        ahora = time.monotonic()
+        resultado = {}
+        with self._lock:
+            self._purgar(ahora)
+            for sid in session_ids:
+                estado = self._sesiones.get(sid)
+                if estado is None or self._expiraciones.get(sid, 0) <= ahora:
+                    estado = nuevo_estado()
+                    self._sesiones[sid] = estado
+                self._expiraciones[sid] = ahora + self.ttl
+                resultado[sid] = estado
+        return resultado
+
+    def guardar_varias(self, estados):
+        vence = time.monotonic() + self.ttl
+        with self._lock:
+            for sid, estado in estados.items():
+                self._sesiones[sid] = estado
+                self._expiraciones[sid] = vence
+
+    def eliminar(self, session_id):
+        with self._lock:
+            self._sesiones.pop(session_id, None)
+            self._expiraciones.pop(session_id, None)
+
+    def contar(self):
+        with self._lock:
+            self._purgar(time.monotonic())
+            return len(self._sesiones)
+
+    def muestra(self, n):
+        with self._lock:
+            return list(itertools.islice(self._sesiones.values(), n))
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Almacén en un servidor compatible con Redis, compartido entre instancias.
+    Usa un pool de conexiones y pipelines para agrupar lecturas y escrituras;
+    el TTL de cada clave es el timeout de la sesión.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', ttl=1800, prefijo='scitech:sesion:',
+                 max_connections=20, client=None, max_caracteres=500):
+        """
+        Args:
+            url (str): URL del servidor Redis
+            ttl (int): Segundos de inactividad tras los que expira una sesión
+            prefijo (str): Prefijo de las claves
+            max_connections (int): Tamaño máximo del pool de conexiones
+            client: Cliente ya creado (por ejemplo fakeredis.FakeRedis())
+            max_caracteres (int): Longitud máxima guardada por mensaje en el historial
+        """
+        super().__init__(ttl)
+        self.prefijo = prefijo
+        self.max_caracteres = max_caracteres
+        if client is not None:
+            self.client = client
+        else:
+            if not REDIS_AVAILABLE:
+                raise ImportError("redis no está instalado. Ejecuta: pip install redis")
+            pool = redis.ConnectionPool.from_url(url, max_connections=max_connections)
+            self.client = redis.Redis(connection_pool=pool)
+
+    def _clave(self, session_id):
+        return f"{self.prefijo}{session_id}"
+
+    def cargar_varias(self, session_ids):
+        session_ids = list(session_ids)
+        # GET + EXPIRE de todas las sesiones en un solo viaje de red
+        pipe = self.client.pipeline(transaction=False)
+        for sid in session_ids:
+            clave = self._clave(sid)
+            pipe.get(clave)
+            pipe.expire(clave, self.ttl)
+        respuestas = pipe.execute()
+
+        resultado = {}
+        for sid, datos in zip(session_ids, respuestas[::2]):
+            if datos:
+                try:
+                    resultado[sid] = deserializar_estado(datos, self.max_caracteres)
+                    continue
+                except (ValueError, zlib.error) as e:
+                    logger.warning(f"⚠️ Sesión {sid} corrupta, se reinicia: {e}")
+            resultado[sid] = nuevo_estado()
+        return resultado
+
+    def guardar_varias(self, estados):
+        pipe = self.client.pipeline(transaction=False)
+        for sid, estado in estados.items():
+            pipe.set(self._clave(sid), serializar_estado(estado), ex=self.ttl)
+        pipe.execute()
+
+    def eliminar(self, session_id):
+        self.client.delete(self._clave(session_id))
+
+    def contar(self):
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefijo}*", count=500))
+
+
+def crear_session_store(config=None):
+    """
+    Crea el almacén de sesiones según la configuración.
+
+    Args:
+        config (dict): SESSION_CONFIG (backend, redis_url, ttl, key_prefix, max_connections)
+
+    Returns:
+        SessionStore: Almacén configurado (en memoria si Redis no está disponible)
+    """
+    config = config or {}
+    ttl = config.get('ttl', 1800)
+    max_caracteres = config.get('max_caracteres_historial', 500)
+
+    if config.get('backend') == 'redis':
+        try:
+            store = RedisSessionStore(
+                url=config.get('redis_url', 'redis://localhost:6379/0'),
+                ttl=ttl,
+                prefijo=config.get('key_prefix', 'scitech:sesion:'),
+                max_connections=config.get('max_connections', 20),
+                max_caracteres=max_caracteres
+            )
+            store.client.ping()
+            logger.info("✅ Sesiones almacenadas en Redis")
+            return store
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo usar Redis para las sesiones ({e}). Usando memoria local")
+
+    return MemorySessionStore(ttl=ttl)
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    print("=== Prueba del Almacén de Sesiones ===\n")
+
+    estado = nuevo_estado()
+    estado['saludo'] = True
+    estado['historial'] = HistorialConversacion(5)
+    estado['historial'].agregar("¿qué es crispr?", "medicina.genetica", "NEU")
+
+    datos = serializar_estado(estado)
+    print(f"Estado serializado: {len(datos)} bytes")
+    print(f"Reconstruido: {deserializar_estado(datos)['historial'].to_columnas()}\n")
+
+    try:
+        import fakeredis
+        store = RedisSessionStore(client=fakeredis.FakeRedis(), ttl=60)
+        print("Usando fakeredis")
+    except ImportError:
+        store = MemorySessionStore(ttl=60)
+        print("fakeredis no instalado, usando memoria")
+
+    store.guardar('demo', estado)
+    print(f"Sesiones activas: {store.contar()}")
+    print(f"Saludo recuperado: {store.cargar('demo')['saludo']}")
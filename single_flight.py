@@ -0,0 +1,155 @@
+"""
+Módulo de coalescencia de peticiones en vuelo (single-flight)
+Cuando varias sesiones piden a la vez lo mismo (p. ej. pulsan el mismo tema
+sugerido), solo la primera llamada ejecuta el modelo; las demás esperan su
+resultado. Si la ejecución falla, el error llega a todos los que esperaban.
+"""
+
+import threading
+import time
+import unicodedata
+
+try:
+    from config import COALESCING_CONFIG
+except ImportError:
+    COALESCING_CONFIG = {'enabled': True, 'sentiment_timeout': 10, 'llm_timeout': 120}
+
+# Instancias creadas, para el informe conjunto
+_registro = []
+
+
+def normalizar_clave(texto):
+    """Forma canónica de un texto: NFC y espacios colapsados (no cambia mayúsculas)."""
+    return ' '.join(unicodedata.normalize('NFC', texto).split())
+
+
+class _Vuelo:
+    """Una ejecución en curso y su resultado."""
+
+    __slots__ = ('evento', 'inicio', 'resultado', 'error')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.inicio = time.monotonic()
+        self.resultado = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Registro de ejecuciones en vuelo por clave.
+    ejecutar() devuelve el resultado de la ejecución en curso para la misma
+    clave o, si no hay ninguna, ejecuta la función y lo comparte.
+    """
+
+    def __init__(self, nombre, timeout=None, habilitado=True):
+        """
+        Args:
+            nombre (str): Nombre para el informe y los mensajes de error
+            timeout (float): Segundos máximos de espera por una ejecución ajena (None = sin límite)
+            habilitado (bool): False = ejecutar siempre (sin coalescencia)
+        """
+        self.nombre = nombre
+        self.timeout = timeout
+        self.habilitado = habilitado
+        self._vuelos = {}
+        self._lock = threading.Lock()
+        self.contadores = {'llamadas': 0, 'ejecutadas': 0, 'compartidas': 0, 'errores': 0, 'timeouts': 0}
+        _registro.append(self)
+
+    def ejecutar(self, clave, funcion, *args, timeout=None, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) o se une a la ejecución en curso de `clave`.
+
+        Args:
+            clave: Clave hashable que identifica entradas equivalentes
+            funcion (callable): Cálculo a compartir
+            timeout (float): Espera máxima para esta clave (None = la de la instancia).
+                             Una ejecución más antigua que este plazo no se comparte.
+
+        Returns:
+            Resultado de la función
+
+        Raises:
+            TimeoutError: Si la ejecución compartida no termina a tiempo
+            Exception: La misma excepción que lanzó la ejecución compartida
+        """
+        if not self.habilitado:
+            return funcion(*args, **kwargs)
+
+        limite = timeout if timeout is not None else self.timeout
+        with self._lock:
+            self.contadores['llamadas'] += 1
+            vuelo = self._vuelos.get(clave)
+            # Una ejecución colgada más allá del plazo no arrastra a las nuevas llamadas
+            if vuelo is not None and limite is not None and time.monotonic() - vuelo.inicio > limite:
+                vuelo = None
+            propio = vuelo is None
+            if propio:
+                vuelo = _Vuelo()
+                self._vuelos[clave] = vuelo
+                self.contadores['ejecutadas'] += 1
+            else:
+                self.contadores['compartidas'] += 1
+
+        if not propio:
+            espera = None if limite is None else max(0.0, limite - (time.monotonic() - vuelo.inicio))
+            if not vuelo.evento.wait(espera):
+                with self._lock:
+                    self.contadores['timeouts'] += 1
+                raise TimeoutError(f"{self.nombre}: la ejecución compartida no terminó en {limite} s")
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = funcion(*args, **kwargs)
+            return vuelo.resultado
+        except Exception as e:
+            vuelo.error = e
+            with self._lock:
+                self.contadores['errores'] += 1
+            raise
+        finally:
+            with self._lock:
+                if self._vuelos.get(clave) is vuelo:
+                    del self._vuelos[clave]
+            vuelo.evento.set()
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Contadores, ejecuciones en vuelo y fracción de llamadas compartidas
+        """
+        with self._lock:
+            datos = dict(self.contadores, en_vuelo=len(self._vuelos))
+        datos['tasa_compartidas'] = round(datos['compartidas'] / datos['llamadas'], 4) if datos['llamadas'] else 0.0
+        return datos
+
+
+def estadisticas_coalescencia():
+    """
+    Returns:
+        dict: {nombre: estadisticas()} de todas las instancias
+    """
+    return {vuelos.nombre: vuelos.estadisticas() for vuelos in _registro}
+
+
+if __name__ == "__main__":
+    # Pruebas del módulo
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("=== Prueba de Coalescencia Single-Flight ===\n")
+
+    vuelos = SingleFlight('prueba', timeout=2)
+
+    def lento(texto):
+        time.sleep(0.2)
+        return texto.upper()
+
+    with ThreadPoolExecutor(16) as ejecutor:
+        resultados = list(ejecutor.map(
+            lambda _: vuelos.ejecutar(normalizar_clave("hola  mundo"), lento, "hola mundo"), range(16)
+        ))
+    print(f"Resultados distintos: {set(resultados)}")
+    print(f"Estadísticas: {vuelos.estadisticas()}")
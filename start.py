@@ -112,6 +112,36 @@ def create_env_file():
         print("\n✅ Archivo .env existe")
 
 
+def snapshot_llm_model(preguntar=True):
+    """
+    Crea (una sola vez) el snapshot local del modelo LLM para arranques rápidos.
+    
+    Args:
+        preguntar (bool): Pedir confirmación antes de descargar el modelo
+    """
+    try:
+        from config import LLM_CONFIG
+        from llm_module import LLM_AVAILABLE, crear_snapshot, leer_snapshot
+    except ImportError:
+        print("⚠️  No se pudo importar la configuración del LLM")
+        return False
+    
+    directorio = LLM_CONFIG.get('snapshot_dir')
+    snapshot = leer_snapshot(directorio)
+    if snapshot and snapshot.get('model_name') == LLM_CONFIG.get('model_name'):
+        print(f"\n✅ Snapshot del modelo disponible en {directorio} ({snapshot.get('dtype')})")
+        return True
+    if not LLM_AVAILABLE:
+        print("\n⚠️  Dependencias del LLM no instaladas: se omite el snapshot")
+        return False
+    
+    if preguntar:
+        respuesta = input(f"\n¿Crear snapshot local de {LLM_CONFIG.get('model_name')} en {directorio}? (s/n): ").lower()
+        if respuesta not in ('s', 'si', 'y', 'yes'):
+            return False
+    return crear_snapshot() is not None
+
+
 def start_chatbot():
     """Inicia el chatbot."""
     print("\n" + "="*60)
@@ -157,7 +187,15 @@ def main():
     # 5. Mostrar configuración
     show_config()
     
-    # 6. Preguntar si iniciar
+    # 6. Snapshot local del LLM (solo si está activado)
+    try:
+        from config import LLM_CONFIG
+        if LLM_CONFIG.get('enabled', False):
+            snapshot_llm_model()
+    except ImportError:
+        pass
+    
+    # 7. Preguntar si iniciar
     print("\n" + "="*60)
     respuesta = input("\n¿Iniciar el chatbot? (s/n): ").lower()
     
@@ -170,6 +208,9 @@ def main():
 
 if __name__ == "__main__":
     try:
+        # `python start.py --snapshot` solo crea el snapshot del LLM (sin preguntas)
+        if '--snapshot' in sys.argv[1:]:
+            sys.exit(0 if snapshot_llm_model(preguntar=False) else 1)
         main()
     except KeyboardInterrupt:
         print("\n\n👋 Instalación cancelada. ¡Hasta luego!")